@@ -0,0 +1,109 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SOURCE)
+
+from interpreter import Interpreter
+from interpreterListener import InterpreterListener
+from lox import Lox
+
+# Three ways to run each program, timed in turn so drift hits them alike:
+# a fresh Interpreter; one that had a listener and lost it again, which is
+# what "hooks disabled" means; and one with a listener that does nothing, the
+# cheapest enabled case. A second plain run gives the noise to judge by.
+def plain():
+  return Interpreter()
+
+def detached():
+  interpreter = Interpreter()
+  listener = InterpreterListener()
+  interpreter.addListener(listener)
+  interpreter.removeListener(listener)
+  return interpreter
+
+def attached():
+  interpreter = Interpreter()
+  interpreter.addListener(InterpreterListener())
+  return interpreter
+
+# Seconds a sample should take at least.
+SAMPLE = 0.02
+
+MODES = [("plain", plain), ("again", plain), ("disabled", detached), ("listener", attached)]
+
+# Short programs are run several times per sample, on the same interpreter,
+# so that a sample is long enough to time.
+def run(statements, make, times=1):
+  interpreter = make()
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    for _ in range(times):
+      interpreter.interpret(statements)
+  return (time.perf_counter() - start) / times
+
+def measure(path, repeat, budget):
+  with open(path) as file:
+    source = file.read()
+
+  lox = Lox()
+  statements = lox.compile(source)
+  if (statements == None):
+    return None
+
+  try:
+    first = run(statements, plain)
+  except RuntimeError:
+    return None
+
+  # Long programs get fewer rounds, but never fewer than three. Each round
+  # starts at a different mode so none always runs first.
+  times = max(1, int(SAMPLE / first))
+  rounds = max(3, min(repeat, int(budget / (first * times * len(MODES)))))
+  samples = {name: [] for name, _ in MODES}
+
+  for round in range(rounds):
+    for index in range(len(MODES)):
+      name, make = MODES[(round + index) % len(MODES)]
+      samples[name].append(run(statements, make, times))
+
+  return {name: statistics.median(values) for name, values in samples.items()}
+
+def change(ratio):
+  return f"{ratio - 1:>+7.1%}"
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Cost of the interpreter's listener hooks on the src/tests programs.")
+  argParser.add_argument("--repeat", type=int, default=15)
+  argParser.add_argument("--budget", type=float, default=5.0,
+    help="rough seconds to spend per program; long ones get fewer rounds")
+  options = argParser.parse_args(args)
+
+  print(f"{'program':<40} {'plain ms':>9} {'noise':>7} {'disabled':>9} {'listener':>9}")
+  ratios = {name: [] for name, _ in MODES}
+
+  for path in sorted(glob.glob(os.path.join(SOURCE, "tests", "**", "*.lox"), recursive=True)):
+    medians = measure(path, options.repeat, options.budget)
+    if (medians == None):
+      continue
+
+    base = medians["plain"]
+    for name, value in medians.items():
+      ratios[name].append(value / base)
+
+    name = os.path.relpath(path, os.path.join(SOURCE, "tests"))
+    print(f"{name:<40} {base * 1000:>9.2f} {change(medians['again'] / base)} {change(medians['disabled'] / base):>9} {change(medians['listener'] / base):>9}")
+
+  # Programs differ in length by orders of magnitude, so they are summed up by
+  # the geometric mean of their ratios rather than by total time.
+  means = {name: statistics.geometric_mean(values) for name, values in ratios.items()}
+  print(f"{'geometric mean':<40} {'':>9} {change(means['again'])} {change(means['disabled']):>9} {change(means['listener']):>9}")
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
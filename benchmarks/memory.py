@@ -0,0 +1,111 @@
+import argparse
+import glob
+import os
+import sys
+import tracemalloc
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SOURCE)
+
+from interpreter import Interpreter
+from loxClass import LoxClass
+from loxFunction import LoxFunction
+from loxInstance import LoxInstance
+from parserC import ParserC
+from resolver import Resolver
+from scanner import Scanner
+from tokenC import TokenC
+from tokenType import TokenType
+
+FUNCTION = "fun add(a, b) { var c = a + b; return c; }"
+
+# make() returns a closure over n; unrelated is a fresh 1 KB string per call
+# that the closure doesn't use.
+CLOSURE = f"""
+var prefix = "{'x' * 1024}";
+fun make() {{ var unrelated = prefix + "!"; var n = 1; fun get() {{ return n; }} return get; }}
+"""
+
+# Returns the bytes still allocated after build() runs, divided by count.
+def bytesPer(build, count):
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  kept = build()
+  after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del kept
+  return (after - before) / count
+
+def corpus():
+  text = ""
+  for path in sorted(glob.glob(os.path.join(SOURCE, "tests", "**", "*.lox"), recursive=True)):
+    with open(path) as file:
+      text += file.read() + "\n"
+  return text
+
+def measureTokens(repeat):
+  source = corpus() * repeat
+  count = len(Scanner(source).scanTokens())
+  return bytesPer(lambda: Scanner(source).scanTokens(), count)
+
+def parse(source):
+  statements = ParserC(Scanner(source).scanTokens()).parse()
+  Resolver().resolve(statements)
+  return statements
+
+# A call frame is the slot list created per call of a two-parameter function
+# with one local.
+def measureFrames(count):
+  function = LoxFunction(parse(FUNCTION)[0], [], False)
+  arguments = [1.0, 2.0]
+  return bytesPer(lambda: [function.frame(None, arguments) for _ in range(count)], count)
+
+# What a closure keeps alive: itself and the cells it captured, but not the
+# other locals of the call that created it.
+def measureClosures(count):
+  interpreter = Interpreter()
+  interpreter.interpret(parse(CLOSURE))
+  make = interpreter.globals.values[interpreter.globals.indexes["make"]]
+  return bytesPer(lambda: [make.call(interpreter, []) for _ in range(count)], count)
+
+def measureBoundMethods(count):
+  method = LoxFunction(parse(FUNCTION)[0], [], False)
+  instance = LoxInstance(LoxClass("A", None, {}))
+  return bytesPer(lambda: [method.bind(instance) for _ in range(count)], count)
+
+def measureInstances(count):
+  klass = LoxClass("A", None, {})
+  return bytesPer(lambda: [LoxInstance(klass) for _ in range(count)], count)
+
+# An instance shaped like a tree node, with left, right and value fields.
+def measureNodes(count):
+  klass = LoxClass("Node", None, {})
+  names = [TokenC(TokenType.IDENTIFIER, name, None, 1) for name in ("left", "right", "value")]
+
+  def build():
+    nodes = []
+    for _ in range(count):
+      node = LoxInstance(klass)
+      for name in names:
+        node.set(name, None)
+      nodes.append(node)
+    return nodes
+
+  return bytesPer(build, count)
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Bytes per runtime object, measured with tracemalloc.")
+  argParser.add_argument("--count", type=int, default=100000)
+  argParser.add_argument("--repeat", type=int, default=200, help="copies of the src/tests corpus to scan")
+  options = argParser.parse_args(args)
+
+  print(f"{'object':<14} {'bytes':>8}")
+  print(f"{'token':<14} {measureTokens(options.repeat):>8.1f}")
+  print(f"{'call frame':<14} {measureFrames(options.count):>8.1f}")
+  print(f"{'closure':<14} {measureClosures(options.count):>8.1f}")
+  print(f"{'bound method':<14} {measureBoundMethods(options.count):>8.1f}")
+  print(f"{'instance':<14} {measureInstances(options.count):>8.1f}")
+  print(f"{'tree node':<14} {measureNodes(options.count):>8.1f}")
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
@@ -0,0 +1,97 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from interpreter import Interpreter
+from parserC import ParserC
+from resolver import Resolver
+from scanner import Scanner
+
+# One expression per operator, in the order visitBinaryExpr used to test them,
+# so a position-dependent dispatch shows up as a rising column.
+OPERATIONS = [
+  ("a > b", ">"),
+  ("a >= b", ">="),
+  ("a < b", "<"),
+  ("a <= b", "<="),
+  ("a != b", "!="),
+  ("a == b", "=="),
+  ("a - b", "-"),
+  ("a + b", "+"),
+  ("a / b", "/"),
+  ("a * b", "*"),
+  ("-a", "unary -"),
+  ("!a", "unary !"),
+  ("t and a", "and"),
+  ("f or a", "or"),
+]
+
+BASELINE = "a"
+
+PROGRAM = """
+{
+  var a = 3;
+  var b = 4;
+  var t = true;
+  var f = false;
+  var i = 0;
+  while (i < %d) {
+    %s;
+    i = i + 1;
+  }
+}
+"""
+
+def prepare(expression, iterations):
+  tokens = Scanner(PROGRAM % (iterations, expression)).scanTokens()
+  statements = ParserC(tokens).parse()
+  Resolver().resolve(statements)
+  return statements
+
+def run(expression, iterations):
+  statements = prepare(expression, iterations)
+  interpreter = Interpreter()
+  start = time.perf_counter()
+  interpreter.interpret(statements)
+  return time.perf_counter() - start
+
+# The baseline and the expression are timed in turn, so drift hits them alike,
+# and each round starts with a different one. Returns the times of both.
+def measure(expression, iterations, repeat):
+  samples = {BASELINE: [], expression: []}
+
+  for round in range(repeat):
+    order = [BASELINE, expression] if round % 2 == 0 else [expression, BASELINE]
+    for timed in order:
+      samples[timed].append(run(timed, iterations))
+
+  return samples[BASELINE], samples[expression]
+
+def perOperation(seconds, iterations):
+  return seconds / iterations * 1e9
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Per-operator cost on the tree-walking interpreter.")
+  argParser.add_argument("--iterations", type=int, default=50000)
+  argParser.add_argument("--repeat", type=int, default=5)
+  options = argParser.parse_args(args)
+
+  # The cost is the best expression time less the best baseline time. The
+  # noise is how far the median of each is from its best; a cost below it is
+  # only marked, and never shown as negative.
+  print(f"{'operator':<10} {'ns/op':>8} {'noise':>8}")
+
+  for expression, name in OPERATIONS:
+    baselines, times = measure(expression, options.iterations, options.repeat)
+    cost = perOperation(min(times) - min(baselines), options.iterations)
+    spread = max(statistics.median(baselines) - min(baselines), statistics.median(times) - min(times))
+    noise = perOperation(spread, options.iterations)
+    note = "  within noise" if cost <= noise else ""
+    print(f"{name:<10} {max(cost, 0):>8.0f} {noise:>8.0f}{note}")
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
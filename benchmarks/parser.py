@@ -0,0 +1,107 @@
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SOURCE)
+
+from parserC import ParserC
+from prattParser import PrattParser
+from regexScanner import RegexScanner
+
+BINARY = ["+", "-", "*", "/", "==", "!=", "<", "<=", ">", ">=", "and", "or"]
+
+# Compared on top of src/tests: precedence, associativity, assignment targets
+# and the parse errors both parsers must recover from the same way.
+EDGE_CASES = [
+  "a = b = c; a.b.c = d; a.b().c = -!d;",
+  "print 1 - 2 - 3 * 4 / 5 + -6;",
+  "print a or b and c == d != e < f <= g > h >= i;",
+  "print !!a.b(c, d)(e).f;",
+  "print super.m(this.x);",
+  "a + b = c; print 1;",
+  "print (1 + ; print 2;",
+  "print f(1, 2,;",
+  "a.;",
+]
+
+def generate(statements, seed):
+  generator = random.Random(seed)
+
+  def expression(depth):
+    if (depth == 0 or generator.random() < 0.2):
+      return generator.choice(["a", "b.c", "12.5", "\"s\"", "true", "nil", "f(x, y)", "this.v"])
+    kind = generator.random()
+    if (kind < 0.7):
+      return f"{expression(depth - 1)} {generator.choice(BINARY)} {expression(depth - 1)}"
+    if (kind < 0.8):
+      return f"{generator.choice(['-', '!'])}{expression(depth - 1)}"
+    if (kind < 0.9):
+      return f"({expression(depth - 1)})"
+    return f"g({expression(depth - 1)}, {expression(depth - 1)}).h"
+
+  return "\n".join(f"x{i} = {expression(5)};" for i in range(statements))
+
+def sameTree(a, b):
+  if (type(a) != type(b)):
+    return False
+  if (isinstance(a, list)):
+    return len(a) == len(b) and all(sameTree(x, y) for x, y in zip(a, b))
+  if (hasattr(a, "__dict__")):
+    return vars(a).keys() == vars(b).keys() and all(sameTree(vars(a)[key], vars(b)[key]) for key in vars(a))
+  return a is b or a == b
+
+# Both parsers read the same token list, so matching trees share tokens.
+def check(sources):
+  failures = 0
+
+  for name, source in sources:
+    tokens = RegexScanner(source).scanTokens()
+    if (not sameTree(ParserC(tokens).parse(), PrattParser(tokens).parse())):
+      print(f"trees differ: {name}")
+      failures += 1
+
+  print(f"{len(sources) - failures}/{len(sources)} sources parse identically")
+  return failures == 0
+
+def throughput(parserClass, tokens, repeat):
+  best = None
+
+  for _ in range(repeat):
+    start = time.perf_counter()
+    parserClass(tokens).parse()
+    elapsed = time.perf_counter() - start
+    if (best == None or elapsed < best):
+      best = elapsed
+
+  return len(tokens) / best / 1e6
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Compare PrattParser with ParserC, then measure both.")
+  argParser.add_argument("--statements", type=int, default=5000, help="generated expression statements")
+  argParser.add_argument("--repeat", type=int, default=5)
+  argParser.add_argument("--seed", type=int, default=1)
+  options = argParser.parse_args(args)
+
+  generated = generate(options.statements, options.seed)
+  sources = [(path, open(path).read()) for path in sorted(glob.glob(os.path.join(SOURCE, "tests", "**", "*.lox"), recursive=True))]
+  sources += [(repr(source), source) for source in EDGE_CASES]
+  sources += [("generated", generated)]
+
+  if (not check(sources)):
+    sys.exit(1)
+
+  tokens = RegexScanner(generated).scanTokens()
+  print(f"{len(tokens)} tokens")
+  print(f"{'parser':<12} {'Mtokens/s':>10}")
+
+  baseline = throughput(ParserC, tokens, options.repeat)
+  print(f"{'ParserC':<12} {baseline:>10.2f}")
+  fast = throughput(PrattParser, tokens, options.repeat)
+  print(f"{'PrattParser':<12} {fast:>10.2f}  ({fast / baseline:.1f}x)")
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
@@ -0,0 +1,90 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SOURCE)
+
+from regexScanner import RegexScanner
+from scanner import Scanner
+
+# Sources the token streams are compared on besides src/tests, covering the
+# cases RegexScanner hands back to Scanner.
+EDGE_CASES = [
+  "",
+  "a",
+  "12.5.x 1. .5 12abc 3.14x",
+  "var é = 1; var aé1 = 2; print 1٣ + 1.٣;",
+  "!= == <= >= ! = < > / // comment\n/",
+  "\"multi\nline\" after",
+  "\t\r\n  \n",
+]
+
+def paths():
+  return sorted(glob.glob(os.path.join(SOURCE, "tests", "**", "*.lox"), recursive=True))
+
+def tokens(scanner):
+  return [(token.type, token.lexeme, token.literal, token.line) for token in scanner.scanTokens()]
+
+def outcome(scannerClass, source):
+  try:
+    return tokens(scannerClass(source))
+  except Exception as error:
+    return (type(error), str(error))
+
+# Both scanners must give the same tokens, or the same error, for every input.
+def check():
+  sources = [(path, open(path).read()) for path in paths()]
+  sources += [(repr(source), source) for source in EDGE_CASES]
+  sources += [("unterminated string", "print \"abc\n"), ("unexpected character", "var a = 1;\n@")]
+  failures = 0
+
+  for name, source in sources:
+    if (outcome(Scanner, source) != outcome(RegexScanner, source)):
+      print(f"tokens differ: {name}")
+      failures += 1
+
+  print(f"{len(sources) - failures}/{len(sources)} sources scan identically")
+  return failures == 0
+
+def corpus():
+  text = ""
+  for path in paths():
+    with open(path) as file:
+      text += file.read() + "\n"
+  return text
+
+def throughput(scannerClass, source, repeat):
+  best = None
+
+  for _ in range(repeat):
+    start = time.perf_counter()
+    scannerClass(source).scanTokens()
+    elapsed = time.perf_counter() - start
+    if (best == None or elapsed < best):
+      best = elapsed
+
+  return len(source) / best / 1e6
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Compare RegexScanner with Scanner, then measure both.")
+  argParser.add_argument("--copies", type=int, default=400, help="copies of the src/tests corpus to scan")
+  argParser.add_argument("--repeat", type=int, default=3)
+  options = argParser.parse_args(args)
+
+  if (not check()):
+    sys.exit(1)
+
+  source = corpus() * options.copies
+  print(f"{len(source) / 1e6:.1f} MB source")
+  print(f"{'scanner':<14} {'MB/s':>8}")
+
+  baseline = throughput(Scanner, source, options.repeat)
+  print(f"{'Scanner':<14} {baseline:>8.2f}")
+  fast = throughput(RegexScanner, source, options.repeat)
+  print(f"{'RegexScanner':<14} {fast:>8.2f}  ({fast / baseline:.1f}x)")
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
@@ -0,0 +1,170 @@
+import argparse
+import json
+import math
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, "..", "src", "main.py")
+WORKLOADS = os.path.join(HERE, "lox")
+
+ENGINES = {
+  "tree": [],
+  "stack": ["--stack"],
+  "closures": ["--closures"],
+  "vm": ["--vm"],
+  "python": ["--python"],
+}
+
+# Memoization would answer most of fib from its cache, so it is off unless
+# --flags says otherwise.
+DEFAULT_FLAGS = "--no-memoize"
+
+def workloads():
+  return sorted(name[:-len(".lox")] for name in os.listdir(WORKLOADS) if name.endswith(".lox"))
+
+# Runs one benchmark in a fresh process and returns its wall time in seconds
+# and peak resident set size in bytes. wait4 gives the child's own resource
+# usage, which getrusage can't separate from earlier children.
+def runOnce(command):
+  start = time.perf_counter()
+  process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  _, status, usage = os.wait4(process.pid, 0)
+  elapsed = time.perf_counter() - start
+  process.returncode = os.waitstatus_to_exitcode(status)
+
+  if (process.returncode != 0):
+    raise RuntimeError(f"{shlex.join(command)} exited with {process.returncode}")
+
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+  rss = usage.ru_maxrss
+  if (sys.platform != "darwin"):
+    rss *= 1024
+  return elapsed, rss
+
+# Nearest-rank percentile.
+def percentile(values, fraction):
+  ordered = sorted(values)
+  return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def measure(name, engine, flags, runs, warmup):
+  command = [sys.executable, MAIN] + ENGINES[engine] + flags + [os.path.join(WORKLOADS, name + ".lox")]
+
+  for _ in range(warmup):
+    runOnce(command)
+
+  times = []
+  peakRss = 0
+  for _ in range(runs):
+    elapsed, rss = runOnce(command)
+    times.append(elapsed)
+    peakRss = max(peakRss, rss)
+
+  return {
+    "median": statistics.median(times),
+    "p95": percentile(times, 0.95),
+    "min": min(times),
+    "max": max(times),
+    "peakRss": peakRss,
+    "times": times,
+  }
+
+def run(options):
+  names = options.benchmarks or workloads()
+  unknown = [name for name in names if name not in workloads()]
+  if (unknown):
+    raise SystemExit(f"unknown benchmark: {', '.join(unknown)}")
+
+  flags = shlex.split(options.flags)
+  results = {
+    "engine": options.engine,
+    "flags": flags,
+    "python": platform.python_version(),
+    "runs": options.runs,
+    "warmup": options.warmup,
+    "benchmarks": {},
+  }
+
+  print(f"{'benchmark':<18} {'median s':>9} {'p95 s':>9} {'peak RSS MB':>12}", file=sys.stderr)
+  for name in names:
+    result = measure(name, options.engine, flags, options.runs, options.warmup)
+    results["benchmarks"][name] = result
+    print(f"{name:<18} {result['median']:>9.3f} {result['p95']:>9.3f} {result['peakRss'] / 2**20:>12.1f}", file=sys.stderr)
+
+  if (options.output != None):
+    with open(options.output, "w") as file:
+      json.dump(results, file, indent=2)
+  else:
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+def describe(results):
+  return " ".join([results["engine"]] + results["flags"])
+
+# A benchmark regressed when its new median is more than threshold slower and
+# also slower than the old p95, so a single noisy run doesn't count. Peak RSS
+# has no spread to go by and only needs to grow by more than threshold.
+def compare(options):
+  with open(options.base) as file:
+    base = json.load(file)
+  with open(options.new) as file:
+    new = json.load(file)
+
+  print(f"base: {describe(base)}  new: {describe(new)}")
+  print(f"{'benchmark':<18} {'base s':>9} {'new s':>9} {'time':>8} {'RSS':>8}")
+  regressions = 0
+
+  for name in sorted(set(base["benchmarks"]) & set(new["benchmarks"])):
+    old = base["benchmarks"][name]
+    now = new["benchmarks"][name]
+    timeRatio = now["median"] / old["median"]
+    rssRatio = now["peakRss"] / old["peakRss"]
+
+    notes = []
+    if (timeRatio > 1 + options.threshold and now["median"] > old["p95"]):
+      notes.append("slower")
+    elif (timeRatio < 1 - options.threshold and now["median"] < old["min"]):
+      notes.append("faster")
+    if (rssRatio > 1 + options.threshold):
+      notes.append("more memory")
+    regressions += len([note for note in notes if note != "faster"])
+
+    print(f"{name:<18} {old['median']:>9.3f} {now['median']:>9.3f} {timeRatio - 1:>+8.1%} {rssRatio - 1:>+8.1%}  {', '.join(notes)}")
+
+  if (regressions != 0):
+    print(f"{regressions} regression(s) over {options.threshold:.0%}")
+    return 1
+  return 0
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Standard Lox workloads: run them on one engine, or compare two runs.")
+  commands = argParser.add_subparsers(dest="command", required=True)
+
+  runParser = commands.add_parser("run", help="run the benchmarks and write the results as JSON")
+  runParser.add_argument("benchmarks", nargs="*", help=f"which to run (default: all of {', '.join(workloads())})")
+  runParser.add_argument("--engine", choices=list(ENGINES), default="tree")
+  runParser.add_argument("--runs", type=int, default=10, help="timed runs per benchmark")
+  runParser.add_argument("--warmup", type=int, default=2,
+    help="untimed runs first; they also fill the __loxcache__ so timed runs skip compiling")
+  runParser.add_argument("--flags", default=DEFAULT_FLAGS, help=f"more options for main.py (default: {DEFAULT_FLAGS})")
+  runParser.add_argument("--output", "-o", metavar="FILE", help="write the JSON here instead of stdout")
+
+  compareParser = commands.add_parser("compare", help="compare two result files, from two commits or two engines")
+  compareParser.add_argument("base")
+  compareParser.add_argument("new")
+  compareParser.add_argument("--threshold", type=float, default=0.05,
+    help="relative change that counts as a regression (default: 0.05)")
+
+  options = argParser.parse_args(args)
+  if (options.command == "run"):
+    run(options)
+  else:
+    return compare(options)
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,8 @@
+# Holds a local variable that an inner function captures. The frame of the
+# function declaring it and every closure that uses it share the cell, so the
+# variable outlives its frame. Locals nobody captures stay in the frame itself.
+class Cell:
+  __slots__ = ("value",)
+
+  def __init__(self, value):
+    self.value = value
@@ -0,0 +1,25 @@
+import struct
+
+class ChunkC:
+  def __init__(self):
+    self.code = []
+    self.lines = []
+    self.constants = []
+    self.constantIndexes = {}
+
+  def write(self, byte, line):
+    self.code.append(byte)
+    self.lines.append(line)
+
+  def addConstant(self, value):
+    key = (type(value), value)
+    # 0.0 == -0.0, so numbers are told apart by their bits instead.
+    if (type(value) is float):
+      key = (float, struct.pack("<d", value))
+
+    if (key in self.constantIndexes):
+      return self.constantIndexes[key]
+
+    self.constants.append(value)
+    self.constantIndexes[key] = len(self.constants) - 1
+    return len(self.constants) - 1
@@ -0,0 +1,539 @@
+import operator
+
+from cell import Cell
+from closureFunction import ClosureFunction
+import expressions
+from loxCallable import LoxCallable
+from loxClass import LoxClass
+from loxInstance import LoxInstance
+import statements
+from tailCall import TailCall
+from tokenType import TokenType
+
+def callValue(interpreter, function, values):
+  if (not isinstance(function, LoxCallable)):
+    raise RuntimeError("Can only call functions and classes.")
+
+  if (len(values) != function.arity()):
+    raise RuntimeError(f"Expected {function.arity()} arguments but got {len(values)}.")
+
+  return function.call(interpreter, values)
+
+NUMBER_OPERATORS = {
+  TokenType.GREATER: operator.gt,
+  TokenType.GREATER_EQUAL: operator.ge,
+  TokenType.LESS: operator.lt,
+  TokenType.LESS_EQUAL: operator.le,
+  TokenType.MINUS: operator.sub,
+  TokenType.SLASH: operator.truediv,
+  TokenType.STAR: operator.mul,
+}
+
+# Statement closures return None to fall through to the next statement, or a
+# one-element tuple holding the value of an executed 'return'.
+class ClosureCompiler(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self, interpreter):
+    self.interpreter = interpreter
+
+  def compile(self, statements):
+    return [statement.accept(self) for statement in statements]
+
+  def compileExpression(self, expr):
+    return expr.accept(self)
+
+  def compileBody(self, body):
+    statements = self.compile(body)
+
+    def runBody(frame):
+      for statement in statements:
+        completion = statement(frame)
+        if (completion != None):
+          return completion
+      return None
+
+    return runBody
+
+  def variableGetter(self, expr, name):
+    slot = expr.slot
+
+    if (expr.depth == None):
+      globals = self.interpreter.globals
+
+      def getGlobal(frame):
+        if (expr.globalVersion == globals.version):
+          globals.hits += 1
+          return globals.values[expr.globalIndex]
+        return globals.lookup(expr, name)
+      return getGlobal
+
+    if (expr.cell):
+      def getCell(frame):
+        return frame[slot].value
+      return getCell
+
+    def getLocal(frame):
+      return frame[slot]
+    return getLocal
+
+  def declarationSetter(self, stmt):
+    slot = stmt.slot
+
+    if (slot == None):
+      globals = self.interpreter.globals
+      lexeme = stmt.name.lexeme
+
+      def defineGlobal(frame, value):
+        globals.define(lexeme, value)
+      return defineGlobal
+
+    if (stmt.cell):
+      def defineCell(frame, value):
+        frame[slot] = Cell(value)
+      return defineCell
+
+    def defineLocal(frame, value):
+      frame[slot] = value
+    return defineLocal
+
+  # Sets a local declared earlier by declarationSetter, keeping its cell.
+  def initializationSetter(self, stmt):
+    slot = stmt.slot
+
+    if (slot == None or not stmt.cell):
+      return self.declarationSetter(stmt)
+
+    def initializeCell(frame, value):
+      frame[slot].value = value
+    return initializeCell
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    value = self.interpreter.visitLiteralExpr(expr)
+
+    def literal(frame):
+      return value
+    return literal
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    return self.compileExpression(expr.expression)
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    right = self.compileExpression(expr.right)
+    token = expr.operator
+    interpreter = self.interpreter
+
+    if (token.type == TokenType.MINUS):
+      def negate(frame):
+        value = right(frame)
+        interpreter.checkNumberOperand(token, value)
+        return -value
+      return negate
+
+    def bang(frame):
+      value = right(frame)
+      return value == None or value is False
+    return bang
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    left = self.compileExpression(expr.left)
+    right = self.compileExpression(expr.right)
+    token = expr.operator
+    interpreter = self.interpreter
+
+    if (token.type == TokenType.PLUS):
+      def plus(frame):
+        a = left(frame)
+        b = right(frame)
+        if (type(a) is float and type(b) is float):
+          return a + b
+        return interpreter.plus(token, a, b)
+      return plus
+
+    if (token.type == TokenType.EQUAL_EQUAL):
+      def equal(frame):
+        a = left(frame)
+        b = right(frame)
+        return type(a) is type(b) and a == b
+      return equal
+
+    if (token.type == TokenType.BANG_EQUAL):
+      def notEqual(frame):
+        a = left(frame)
+        b = right(frame)
+        return type(a) is not type(b) or a != b
+      return notEqual
+
+    apply = NUMBER_OPERATORS[token.type]
+
+    def numberOperation(frame):
+      a = left(frame)
+      b = right(frame)
+      if (type(a) is float and type(b) is float):
+        return apply(a, b)
+      a, b = interpreter.numberOperands(token, a, b)
+      return apply(a, b)
+    return numberOperation
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    left = self.compileExpression(expr.left)
+    right = self.compileExpression(expr.right)
+
+    if (expr.operator.type == TokenType.OR):
+      def logicalOr(frame):
+        value = left(frame)
+        if (value != None and value is not False):
+          return value
+        return right(frame)
+      return logicalOr
+
+    def logicalAnd(frame):
+      value = left(frame)
+      if (value == None or value is False):
+        return value
+      return right(frame)
+    return logicalAnd
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    return self.variableGetter(expr, expr.name)
+
+  def visitThisExpr(self, expr: expressions.This):
+    return self.variableGetter(expr, expr.keyword)
+
+  def visitAssignExpr(self, expr: expressions.Assign):
+    value = self.compileExpression(expr.value)
+    slot = expr.slot
+    name = expr.name
+
+    if (expr.depth == None):
+      globals = self.interpreter.globals
+
+      def assignGlobal(frame):
+        result = value(frame)
+        globals.store(expr, name, result)
+        return result
+      return assignGlobal
+
+    if (expr.cell):
+      def assignCell(frame):
+        result = value(frame)
+        frame[slot].value = result
+        return result
+      return assignCell
+
+    def assignLocal(frame):
+      result = value(frame)
+      frame[slot] = result
+      return result
+    return assignLocal
+
+  def visitCallExpr(self, expr: expressions.Call):
+    if (type(expr.callee) is expressions.Get):
+      return self.compileInvoke(expr, expr.callee)
+
+    callee = self.compileExpression(expr.callee)
+    arguments = [self.compileExpression(argument) for argument in expr.arguments]
+    argumentCount = len(arguments)
+    interpreter = self.interpreter
+
+    def call(frame):
+      function = callee(frame)
+      values = [argument(frame) for argument in arguments]
+
+      if (type(function) is ClosureFunction):
+        if (argumentCount != function.arityCount):
+          raise RuntimeError(f"Expected {function.arityCount} arguments but got {argumentCount}.")
+        return function.call(interpreter, values)
+
+      return callValue(interpreter, function, values)
+    return call
+
+  # obj.method(args) runs the method with the instance as its receiver,
+  # without creating a bound method.
+  def compileInvoke(self, expr, callee):
+    obj = self.compileExpression(callee.obj)
+    arguments = [self.compileExpression(argument) for argument in expr.arguments]
+    argumentCount = len(arguments)
+    interpreter = self.interpreter
+
+    def invoke(frame):
+      instance = obj(frame)
+
+      if (type(instance) is LoxInstance):
+        if (instance.shape is not callee.cacheShape):
+          interpreter.cacheProperty(instance, callee)
+
+        method = callee.cacheMethod
+        if (callee.cacheIndex == None and type(method) is ClosureFunction):
+          if (argumentCount != method.arityCount):
+            raise RuntimeError(f"Expected {method.arityCount} arguments but got {argumentCount}.")
+          return method.invoke(interpreter, instance, [argument(frame) for argument in arguments])
+
+      function = interpreter.getProperty(instance, callee)
+      return callValue(interpreter, function, [argument(frame) for argument in arguments])
+    return invoke
+
+  def visitGetExpr(self, expr: expressions.Get):
+    obj = self.compileExpression(expr.obj)
+    interpreter = self.interpreter
+
+    def get(frame):
+      instance = obj(frame)
+      if (type(instance) is LoxInstance and instance.shape is expr.cacheShape):
+        if (expr.cacheIndex != None):
+          return instance.values[expr.cacheIndex]
+        return expr.cacheMethod.bind(instance)
+      return interpreter.getProperty(instance, expr)
+    return get
+
+  def visitSetExpr(self, expr: expressions.Set):
+    obj = self.compileExpression(expr.obj)
+    value = self.compileExpression(expr.value)
+    name = expr.name
+    interpreter = self.interpreter
+
+    def set(frame):
+      instance = obj(frame)
+      if (not isinstance(instance, LoxInstance)):
+        raise RuntimeError(name, "Only instances have fields.")
+      result = value(frame)
+      if (instance.shape is expr.cacheShape):
+        if (expr.cacheTransition == None):
+          instance.values[expr.cacheIndex] = result
+        else:
+          instance.values.append(result)
+          instance.shape = expr.cacheTransition
+        return result
+      interpreter.setProperty(instance, expr, result)
+      return result
+    return set
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    slot = expr.slot
+    thisSlot = expr.thisSlot
+    thisCell = expr.thisCell
+    method = expr.method
+
+    def superMethod(frame):
+      superclass = frame[slot].value
+      instance = frame[thisSlot]
+      if (thisCell):
+        instance = instance.value
+      function = superclass.findMethod(method.lexeme)
+      if (function == None):
+        raise RuntimeError(method, f"Undefined property {method.lexeme}.")
+      return function.bind(instance)
+    return superMethod
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    expression = self.compileExpression(stmt.expression)
+
+    def expressionStatement(frame):
+      expression(frame)
+    return expressionStatement
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    expression = self.compileExpression(stmt.expression)
+    stringify = self.interpreter.stringify
+
+    def printStatement(frame):
+      print(stringify(expression(frame)))
+    return printStatement
+
+  def visitVarStmt(self, stmt: statements.Var):
+    setter = self.declarationSetter(stmt)
+
+    if (stmt.initializer == None):
+      def declare(frame):
+        setter(frame, None)
+      return declare
+
+    initializer = self.compileExpression(stmt.initializer)
+
+    if (stmt.readsItself):
+      def defineAfterNil(frame):
+        setter(frame, None)
+        setter(frame, initializer(frame))
+      return defineAfterNil
+
+    if (stmt.slot != None and not stmt.cell):
+      slot = stmt.slot
+
+      def defineLocal(frame):
+        frame[slot] = initializer(frame)
+      return defineLocal
+
+    def define(frame):
+      setter(frame, initializer(frame))
+    return define
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    body = self.compileBody(stmt.statements)
+    slotCount = stmt.slotCount
+
+    # Only top-level blocks have a frame of their own.
+    if (slotCount == 0):
+      return body
+
+    def block(frame):
+      return body([None] * slotCount)
+    return block
+
+  def visitIfStmt(self, stmt: statements.If):
+    condition = self.compileExpression(stmt.condition)
+    thenBranch = stmt.thenBranch.accept(self)
+
+    if (stmt.elseBranch == None):
+      def ifThen(frame):
+        value = condition(frame)
+        if (value != None and value is not False):
+          return thenBranch(frame)
+        return None
+      return ifThen
+
+    elseBranch = stmt.elseBranch.accept(self)
+
+    def ifThenElse(frame):
+      value = condition(frame)
+      if (value != None and value is not False):
+        return thenBranch(frame)
+      return elseBranch(frame)
+    return ifThenElse
+
+  def visitWhileStmt(self, stmt: statements.While):
+    condition = self.compileExpression(stmt.condition)
+    body = stmt.body.accept(self)
+
+    def whileLoop(frame):
+      value = condition(frame)
+      while (value != None and value is not False):
+        completion = body(frame)
+        if (completion != None):
+          return completion
+        value = condition(frame)
+      return None
+    return whileLoop
+
+  def compileFunction(self, stmt: statements.Function, isInitializer, memo=None):
+    name = stmt.name.lexeme
+    arity = len(stmt.params)
+    slotCount = stmt.slotCount
+    cellSlots = stmt.cellSlots
+    upvalueSources = stmt.upvalueSources
+    upvalueSlots = stmt.upvalueSlots
+    body = self.compile(stmt.body)
+
+    def makeFunction(frame):
+      upvalues = [frame[slot] for slot in upvalueSources]
+      return ClosureFunction(name, arity, slotCount, cellSlots, upvalueSlots, body, upvalues, isInitializer, None, memo)
+    return makeFunction
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    memo = None
+    if (self.interpreter.memoizer != None):
+      memo = self.interpreter.memoizer.cacheFor(stmt)
+
+    makeFunction = self.compileFunction(stmt, False, memo)
+    setter = self.declarationSetter(stmt)
+
+    if (stmt.slot != None and stmt.cell):
+      slot = stmt.slot
+
+      # The function may capture its own name, so the cell comes first.
+      def recursiveFunction(frame):
+        cell = Cell(None)
+        frame[slot] = cell
+        cell.value = makeFunction(frame)
+      return recursiveFunction
+
+    def function(frame):
+      setter(frame, makeFunction(frame))
+    return function
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    if (stmt.value == None):
+      def returnNil(frame):
+        return (None,)
+      return returnNil
+
+    if (stmt.tailCall):
+      return self.compileTailCall(stmt.value)
+
+    value = self.compileExpression(stmt.value)
+
+    def returnValue(frame):
+      return (value(frame),)
+    return returnValue
+
+  # 'return f(...)' in tail position: calls to Lox functions are returned as a
+  # TailCall and run by ClosureFunction.run, anything else is called here.
+  def compileTailCall(self, expr: expressions.Call):
+    arguments = [self.compileExpression(argument) for argument in expr.arguments]
+    argumentCount = len(arguments)
+    interpreter = self.interpreter
+
+    def tailCallTo(function, receiver, frame):
+      if (argumentCount != function.arityCount):
+        raise RuntimeError(f"Expected {function.arityCount} arguments but got {argumentCount}.")
+      return (TailCall(function, receiver, [argument(frame) for argument in arguments]),)
+
+    if (type(expr.callee) is expressions.Get):
+      callee = expr.callee
+      obj = self.compileExpression(callee.obj)
+
+      def tailInvoke(frame):
+        instance = obj(frame)
+
+        if (type(instance) is LoxInstance):
+          if (instance.shape is not callee.cacheShape):
+            interpreter.cacheProperty(instance, callee)
+          if (callee.cacheIndex == None and type(callee.cacheMethod) is ClosureFunction):
+            return tailCallTo(callee.cacheMethod, instance, frame)
+
+        function = interpreter.getProperty(instance, callee)
+        if (type(function) is ClosureFunction):
+          return tailCallTo(function, function.receiver, frame)
+        return (callValue(interpreter, function, [argument(frame) for argument in arguments]),)
+      return tailInvoke
+
+    calleeGetter = self.compileExpression(expr.callee)
+
+    def tailCall(frame):
+      function = calleeGetter(frame)
+      if (type(function) is ClosureFunction):
+        return tailCallTo(function, function.receiver, frame)
+      return (callValue(interpreter, function, [argument(frame) for argument in arguments]),)
+    return tailCall
+
+  def visitClassStmt(self, stmt: statements.Class):
+    superclassGetter = None
+    if (stmt.superclass != None):
+      superclassGetter = self.compileExpression(stmt.superclass)
+
+    name = stmt.name
+    setter = self.declarationSetter(stmt)
+    initializer = self.initializationSetter(stmt)
+    superSlot = stmt.superSlot
+    slotCount = stmt.slotCount
+    methods = [(method.name.lexeme, self.compileFunction(method, method.name.lexeme == "init")) for method in stmt.methods]
+
+    def classDeclaration(frame):
+      superclass = None
+
+      if (superclassGetter != None):
+        superclass = superclassGetter(frame)
+        if (not isinstance(superclass, LoxClass)):
+          raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
+
+      setter(frame, None)
+
+      methodFrame = frame
+      if (superclass != None):
+        if (slotCount != 0):
+          methodFrame = [None] * slotCount
+        methodFrame[superSlot] = Cell(superclass)
+
+      functions = {}
+      for methodName, makeFunction in methods:
+        functions[methodName] = makeFunction(methodFrame)
+
+      initializer(frame, LoxClass(name.lexeme, superclass, functions))
+    return classDeclaration
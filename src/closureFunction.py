@@ -0,0 +1,87 @@
+from cell import Cell
+from loxCallable import LoxCallable
+from loxFunction import receiverOf
+from memoCache import MISSING
+from tailCall import TailCall
+
+class ClosureFunction(LoxCallable):
+  __slots__ = ("name", "arityCount", "slotCount", "cellSlots", "upvalueSlots", "body", "upvalues", "isInitializer", "receiver", "memo")
+
+  def __init__(self, name, arityCount, slotCount, cellSlots, upvalueSlots, body, upvalues, isInitializer, receiver=None, memo=None):
+    self.name = name
+    self.arityCount = arityCount
+    self.slotCount = slotCount
+    self.cellSlots = cellSlots
+    self.upvalueSlots = upvalueSlots
+    self.body = body
+    self.upvalues = upvalues
+    self.isInitializer = isInitializer
+    self.receiver = receiver
+    self.memo = memo
+
+  # Memoized like LoxFunction.call.
+  def call(self, interpreter, arguments):
+    memo = self.memo
+
+    if (memo != None):
+      key = memo.key(arguments)
+      if (key != None):
+        value = memo.get(key)
+        if (value is MISSING):
+          value = self.run(self.frame(self.receiver, arguments))
+          memo.put(key, value)
+        return value
+
+    return self.run(self.frame(self.receiver, arguments))
+
+  def invoke(self, interpreter, receiver, arguments):
+    return self.run(self.frame(receiver, arguments))
+
+  # Laid out like LoxFunction.frame.
+  def frame(self, receiver, arguments):
+    values = [None] * self.slotCount
+
+    if (receiver == None):
+      values[0:len(arguments)] = arguments
+    else:
+      values[0] = receiver
+      values[1:len(arguments) + 1] = arguments
+
+    for slot in self.cellSlots:
+      values[slot] = Cell(values[slot])
+    if (self.upvalues):
+      for slot, cell in zip(self.upvalueSlots, self.upvalues):
+        values[slot] = cell
+
+    return values
+
+  # Same trampoline as LoxFunction.run: tail calls are run in this loop.
+  def run(self, frame):
+    function = self
+
+    while True:
+      value = None
+
+      for statement in function.body:
+        completion = statement(frame)
+        if (completion != None):
+          value = completion[0]
+          break
+
+      if (function.isInitializer):
+        return receiverOf(frame)
+
+      if (type(value) is not TailCall):
+        return value
+
+      function = value.function
+      frame = function.frame(value.receiver, value.arguments)
+
+  def arity(self):
+    return self.arityCount
+
+  def toString(self):
+    return f"<fn {self.name} >"
+
+  def bind(self, instance):
+    return ClosureFunction(self.name, self.arityCount, self.slotCount, self.cellSlots, self.upvalueSlots, self.body, self.upvalues, self.isInitializer, instance)
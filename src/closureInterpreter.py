@@ -0,0 +1,12 @@
+from closureCompiler import ClosureCompiler
+from interpreter import Interpreter
+
+class ClosureInterpreter(Interpreter):
+  def interpret(self, statements):
+    program = ClosureCompiler(self).compile(statements)
+
+    try:
+      for statement in program:
+        statement(None)
+    except:
+      raise RuntimeError("error")
@@ -0,0 +1,464 @@
+from enum import Enum
+
+import expressions
+import statements
+from opCode import OpCode
+from parserC import ParserError
+from tokenType import TokenType
+from vmFunction import VMFunction
+
+class CompiledFunctionType(Enum):
+  SCRIPT = 1
+  FUNCTION = 2
+  METHOD = 3
+  INITIALIZER = 4
+
+class Local:
+  def __init__(self, name, depth):
+    self.name = name
+    self.depth = depth
+    self.isCaptured = False
+    self.readsNil = False
+
+class FunctionState:
+  def __init__(self, enclosing, function, type):
+    self.enclosing = enclosing
+    self.function = function
+    self.type = type
+    self.locals = []
+    self.upvalues = []
+    self.scopeDepth = 0
+
+    # Slot zero holds the callee itself, or the receiver inside methods.
+    if (type == CompiledFunctionType.METHOD or type == CompiledFunctionType.INITIALIZER):
+      self.locals.append(Local("this", 0))
+    else:
+      self.locals.append(Local("", 0))
+
+class ClassState:
+  def __init__(self, enclosing):
+    self.enclosing = enclosing
+    self.hasSuperclass = False
+
+BINARY_OPCODES = {
+  TokenType.PLUS: OpCode.ADD,
+  TokenType.MINUS: OpCode.SUBTRACT,
+  TokenType.STAR: OpCode.MULTIPLY,
+  TokenType.SLASH: OpCode.DIVIDE,
+  TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+  TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+  TokenType.GREATER: OpCode.GREATER,
+  TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+  TokenType.LESS: OpCode.LESS,
+  TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+}
+
+class Compiler(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self, stringNumbers=False):
+    self.stringNumbers = stringNumbers
+    self.current = None
+    self.currentClass = None
+    self.line = 0
+
+  def compile(self, statements):
+    self.beginFunction(VMFunction(None), CompiledFunctionType.SCRIPT)
+    self.compileStatements(statements)
+    return self.endFunction()
+
+  def compileStatements(self, statements):
+    for statement in statements:
+      statement.accept(self)
+
+  def compileExpression(self, expr):
+    expr.accept(self)
+
+  def beginFunction(self, function, type):
+    self.current = FunctionState(self.current, function, type)
+
+  def endFunction(self):
+    self.emitReturn()
+    function = self.current.function
+    function.upvalueCount = len(self.current.upvalues)
+    self.current = self.current.enclosing
+    return function
+
+  def chunk(self):
+    return self.current.function.chunk
+
+  def emit(self, *bytes):
+    chunk = self.chunk()
+    for byte in bytes:
+      chunk.write(int(byte), self.line)
+
+  def emitConstant(self, value):
+    self.emit(OpCode.CONSTANT, self.chunk().addConstant(value))
+
+  def nameConstant(self, name):
+    return self.chunk().addConstant(name.lexeme)
+
+  def emitJump(self, instruction):
+    self.emit(instruction, 0)
+    return len(self.chunk().code) - 1
+
+  def patchJump(self, offset):
+    self.chunk().code[offset] = len(self.chunk().code)
+
+  def emitLoop(self, loopStart):
+    self.emit(OpCode.LOOP, loopStart)
+
+  def emitReturn(self):
+    if (self.current.type == CompiledFunctionType.INITIALIZER):
+      self.emit(OpCode.GET_LOCAL, 0)
+    else:
+      self.emit(OpCode.NIL)
+
+    self.emit(OpCode.RETURN)
+
+  def beginScope(self):
+    self.current.scopeDepth += 1
+
+  def endScope(self):
+    state = self.current
+    state.scopeDepth -= 1
+
+    while (len(state.locals) > 0 and state.locals[-1].depth > state.scopeDepth):
+      if (state.locals[-1].isCaptured):
+        self.emit(OpCode.CLOSE_UPVALUE)
+      else:
+        self.emit(OpCode.POP)
+      state.locals.pop()
+
+  def addLocal(self, name):
+    self.current.locals.append(Local(name, -1))
+
+  def markInitialized(self):
+    self.current.locals[-1].depth = self.current.scopeDepth
+
+  def declareVariable(self, name):
+    if (self.current.scopeDepth == 0):
+      return
+
+    self.addLocal(name.lexeme)
+
+  def defineVariable(self, name):
+    if (self.current.scopeDepth > 0):
+      self.markInitialized()
+      return
+
+    self.emit(OpCode.DEFINE_GLOBAL, self.nameConstant(name))
+
+  def resolveLocal(self, state, name):
+    for i in range(len(state.locals) - 1, -1, -1):
+      local = state.locals[i]
+      if (local.name == name and local.depth != -1):
+        return i
+
+    return -1
+
+  def readsNil(self, name):
+    local = self.current.locals[-1]
+    return local.depth == -1 and local.name == name and local.readsNil
+
+  def addUpvalue(self, state, index, isLocal):
+    for i, upvalue in enumerate(state.upvalues):
+      if (upvalue == (index, isLocal)):
+        return i
+
+    state.upvalues.append((index, isLocal))
+    return len(state.upvalues) - 1
+
+  def resolveUpvalue(self, state, name):
+    if (state.enclosing == None):
+      return -1
+
+    local = self.resolveLocal(state.enclosing, name)
+    if (local != -1):
+      state.enclosing.locals[local].isCaptured = True
+      return self.addUpvalue(state, local, True)
+
+    upvalue = self.resolveUpvalue(state.enclosing, name)
+    if (upvalue != -1):
+      return self.addUpvalue(state, upvalue, False)
+
+    return -1
+
+  def namedVariable(self, expr, name, assign):
+    # Only expressions the resolver bound to a local scope carry a depth.
+    if (expr.depth == 0 and not assign and self.readsNil(name)):
+      self.emit(OpCode.NIL)
+      return
+
+    if (expr.depth != None):
+      arg = self.resolveLocal(self.current, name)
+      if (arg != -1):
+        getOp, setOp = OpCode.GET_LOCAL, OpCode.SET_LOCAL
+      else:
+        arg = self.resolveUpvalue(self.current, name)
+        getOp, setOp = OpCode.GET_UPVALUE, OpCode.SET_UPVALUE
+
+      if (arg == -1):
+        arg = self.chunk().addConstant(name)
+        getOp, setOp = OpCode.GET_GLOBAL, OpCode.SET_GLOBAL
+    else:
+      arg = self.chunk().addConstant(name)
+      getOp, setOp = OpCode.GET_GLOBAL, OpCode.SET_GLOBAL
+
+    if (assign):
+      self.emit(setOp, arg)
+    else:
+      self.emit(getOp, arg)
+
+  def syntheticVariable(self, name):
+    arg = self.resolveLocal(self.current, name)
+    if (arg != -1):
+      self.emit(OpCode.GET_LOCAL, arg)
+      return
+
+    arg = self.resolveUpvalue(self.current, name)
+    if (arg != -1):
+      self.emit(OpCode.GET_UPVALUE, arg)
+      return
+
+    self.emit(OpCode.GET_GLOBAL, self.chunk().addConstant(name))
+
+  def function(self, stmt: statements.Function, type):
+    self.beginFunction(VMFunction(stmt.name.lexeme), type)
+    self.beginScope()
+
+    self.current.function.arity = len(stmt.params)
+    for param in stmt.params:
+      self.declareVariable(param)
+      self.defineVariable(param)
+
+    self.compileStatements(stmt.body)
+
+    upvalues = self.current.upvalues
+    function = self.endFunction()
+
+    self.emit(OpCode.CLOSURE, self.chunk().addConstant(function))
+    for index, isLocal in upvalues:
+      self.emit(1 if isLocal else 0, index)
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    self.compileExpression(stmt.expression)
+    self.emit(OpCode.POP)
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    self.compileExpression(stmt.expression)
+    self.emit(OpCode.PRINT)
+
+  def visitVarStmt(self, stmt: statements.Var):
+    self.line = stmt.name.line
+    self.declareVariable(stmt.name)
+
+    if (stmt.initializer != None):
+      # A new local its own initializer reads has no stack slot yet; the
+      # resolver flags it, and reads of it push nil.
+      if (stmt.readsItself):
+        self.current.locals[-1].readsNil = True
+      self.compileExpression(stmt.initializer)
+    else:
+      self.emit(OpCode.NIL)
+
+    self.defineVariable(stmt.name)
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    self.beginScope()
+    self.compileStatements(stmt.statements)
+    self.endScope()
+
+  def visitIfStmt(self, stmt: statements.If):
+    self.compileExpression(stmt.condition)
+
+    thenJump = self.emitJump(OpCode.JUMP_IF_FALSE)
+    self.emit(OpCode.POP)
+    stmt.thenBranch.accept(self)
+
+    elseJump = self.emitJump(OpCode.JUMP)
+    self.patchJump(thenJump)
+    self.emit(OpCode.POP)
+
+    if (stmt.elseBranch != None):
+      stmt.elseBranch.accept(self)
+
+    self.patchJump(elseJump)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    loopStart = len(self.chunk().code)
+    self.compileExpression(stmt.condition)
+
+    exitJump = self.emitJump(OpCode.JUMP_IF_FALSE)
+    self.emit(OpCode.POP)
+    stmt.body.accept(self)
+    self.emitLoop(loopStart)
+
+    self.patchJump(exitJump)
+    self.emit(OpCode.POP)
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.line = stmt.name.line
+    self.declareVariable(stmt.name)
+    if (self.current.scopeDepth > 0):
+      self.markInitialized()
+
+    self.function(stmt, CompiledFunctionType.FUNCTION)
+    self.defineVariable(stmt.name)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    self.line = stmt.keyword.line
+
+    if (self.current.type == CompiledFunctionType.SCRIPT):
+      raise ParserError(stmt.keyword, "Can't return from top-level code.")
+
+    if (stmt.value == None or self.current.type == CompiledFunctionType.INITIALIZER):
+      self.emitReturn()
+      return
+
+    if (stmt.tailCall):
+      self.compileCall(stmt.value, True)
+    else:
+      self.compileExpression(stmt.value)
+    self.emit(OpCode.RETURN)
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.line = stmt.name.line
+    nameConstant = self.nameConstant(stmt.name)
+    self.declareVariable(stmt.name)
+
+    self.emit(OpCode.CLASS, nameConstant)
+    self.defineVariable(stmt.name)
+
+    self.currentClass = ClassState(self.currentClass)
+
+    if (stmt.superclass != None):
+      self.visitVariableExpr(stmt.superclass)
+
+      self.beginScope()
+      self.addLocal("super")
+      self.markInitialized()
+
+      self.syntheticVariable(stmt.name.lexeme)
+      self.emit(OpCode.INHERIT)
+      self.currentClass.hasSuperclass = True
+
+    self.syntheticVariable(stmt.name.lexeme)
+
+    for method in stmt.methods:
+      type = CompiledFunctionType.METHOD
+      if (method.name.lexeme == "init"):
+        type = CompiledFunctionType.INITIALIZER
+
+      self.function(method, type)
+      self.emit(OpCode.METHOD, self.nameConstant(method.name))
+
+    self.emit(OpCode.POP)
+
+    if (self.currentClass.hasSuperclass):
+      self.endScope()
+
+    self.currentClass = self.currentClass.enclosing
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    if (isinstance(expr.value, bool)):
+      self.emit(OpCode.TRUE if expr.value else OpCode.FALSE)
+    elif (expr.value == None):
+      self.emit(OpCode.NIL)
+    elif (self.stringNumbers and isinstance(expr.value, float)):
+      self.emitConstant(str(expr.value))
+    else:
+      self.emitConstant(expr.value)
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    self.compileExpression(expr.expression)
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    self.compileExpression(expr.right)
+    self.line = expr.operator.line
+
+    if (expr.operator.type == TokenType.MINUS):
+      self.emit(OpCode.NEGATE)
+    else:
+      self.emit(OpCode.NOT)
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    self.compileExpression(expr.left)
+    self.compileExpression(expr.right)
+    self.line = expr.operator.line
+    self.emit(BINARY_OPCODES[expr.operator.type])
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    self.compileExpression(expr.left)
+
+    if (expr.operator.type == TokenType.AND):
+      endJump = self.emitJump(OpCode.JUMP_IF_FALSE)
+      self.emit(OpCode.POP)
+      self.compileExpression(expr.right)
+      self.patchJump(endJump)
+    else:
+      elseJump = self.emitJump(OpCode.JUMP_IF_FALSE)
+      endJump = self.emitJump(OpCode.JUMP)
+      self.patchJump(elseJump)
+      self.emit(OpCode.POP)
+      self.compileExpression(expr.right)
+      self.patchJump(endJump)
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    self.line = expr.name.line
+    self.namedVariable(expr, expr.name.lexeme, False)
+
+  def visitAssignExpr(self, expr: expressions.Assign):
+    self.compileExpression(expr.value)
+    self.line = expr.name.line
+    self.namedVariable(expr, expr.name.lexeme, True)
+
+  def visitCallExpr(self, expr: expressions.Call):
+    self.compileCall(expr, False)
+
+  # A tail call replaces the current frame when the callee is a closure; the
+  # RETURN after it only runs for other callees.
+  def compileCall(self, expr: expressions.Call, isTail):
+    if (isinstance(expr.callee, expressions.Get)):
+      self.compileExpression(expr.callee.obj)
+      self.compileArguments(expr.arguments)
+      self.line = expr.paren.line
+      opCode = OpCode.TAIL_INVOKE if isTail else OpCode.INVOKE
+      self.emit(opCode, self.nameConstant(expr.callee.name), len(expr.arguments))
+      return
+
+    if (isinstance(expr.callee, expressions.Super)):
+      self.syntheticVariable("this")
+      self.compileArguments(expr.arguments)
+      self.syntheticVariable("super")
+      self.line = expr.paren.line
+      self.emit(OpCode.SUPER_INVOKE, self.nameConstant(expr.callee.method), len(expr.arguments))
+      return
+
+    self.compileExpression(expr.callee)
+    self.compileArguments(expr.arguments)
+    self.line = expr.paren.line
+    self.emit(OpCode.TAIL_CALL if isTail else OpCode.CALL, len(expr.arguments))
+
+  def compileArguments(self, arguments):
+    for argument in arguments:
+      self.compileExpression(argument)
+
+  def visitGetExpr(self, expr: expressions.Get):
+    self.compileExpression(expr.obj)
+    self.line = expr.name.line
+    self.emit(OpCode.GET_PROPERTY, self.nameConstant(expr.name))
+
+  def visitSetExpr(self, expr: expressions.Set):
+    self.compileExpression(expr.obj)
+    self.compileExpression(expr.value)
+    self.line = expr.name.line
+    self.emit(OpCode.SET_PROPERTY, self.nameConstant(expr.name))
+
+  def visitThisExpr(self, expr: expressions.This):
+    self.line = expr.keyword.line
+    self.syntheticVariable("this")
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    self.line = expr.keyword.line
+    self.syntheticVariable("this")
+    self.syntheticVariable("super")
+    self.emit(OpCode.GET_SUPER, self.nameConstant(expr.method))
@@ -0,0 +1,5 @@
+# Statement visitors return None when execution goes on to the next statement
+# and RETURN when a return statement ran; the returned value is left in the
+# interpreter's returnValue. Blocks, ifs and loops hand RETURN straight back up
+# to LoxFunction.run, so returning doesn't raise an exception.
+RETURN = object()
@@ -65,11 +65,23 @@ class Expr(ABC):
     def accept(self, visitor: ExprVisitor):
         pass
 
+    # Nodes loaded by ScriptCache set their fields one by one, as __init__
+    # does, so they keep the compact attribute layout that makes field reads
+    # fast. Pickle's default of updating __dict__ in one go would not.
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
 
 class Assign(Expr):
     def __init__(self, name: TokenC, value: Expr):
         self.name = name
         self.value = value
+        self.depth = None
+        self.slot = None
+        self.cell = False
+        self.globalIndex = None
+        self.globalVersion = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitAssignExpr(self)
@@ -80,6 +92,7 @@ class Binary(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        self.handler = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitBinaryExpr(self)
@@ -99,6 +112,9 @@ class Get(Expr):
     def __init__(self, obj: Expr, name: TokenC):
         self.obj = obj
         self.name = name
+        self.cacheShape = None
+        self.cacheIndex = None
+        self.cacheMethod = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitGetExpr(self)
@@ -125,6 +141,7 @@ class Logical(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        self.handler = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitLogicalExpr(self)
@@ -135,6 +152,9 @@ class Set(Expr):
         self.obj = obj
         self.name = name
         self.value = value
+        self.cacheShape = None
+        self.cacheIndex = None
+        self.cacheTransition = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitSetExpr(self)
@@ -144,6 +164,11 @@ class Super(Expr):
     def __init__(self, keyword: TokenC, method: TokenC):
         self.keyword = keyword
         self.method = method
+        self.depth = None
+        self.slot = None
+        self.cell = False
+        self.thisSlot = None
+        self.thisCell = False
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitSuperExpr(self)
@@ -152,6 +177,9 @@ class Super(Expr):
 class This(Expr):
     def __init__(self, keyword: TokenC):
         self.keyword = keyword
+        self.depth = None
+        self.slot = None
+        self.cell = False
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitThisExpr(self)
@@ -161,6 +189,7 @@ class Unary(Expr):
     def __init__(self, operator: TokenC, right: Expr):
         self.operator = operator
         self.right = right
+        self.handler = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitUnaryExpr(self)
@@ -169,6 +198,11 @@ class Unary(Expr):
 class Variable(Expr):
     def __init__(self, name: TokenC):
         self.name = name
+        self.depth = None
+        self.slot = None
+        self.cell = False
+        self.globalIndex = None
+        self.globalVersion = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitVariableExpr(self)
@@ -178,6 +212,7 @@ class Logical(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        self.handler = None
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitLogicalExpr(self) 
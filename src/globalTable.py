@@ -0,0 +1,69 @@
+import itertools
+
+from parserC import ParserError
+
+# Versions are unique across tables, so a cache filled by one interpreter
+# never matches another interpreter's table.
+versions = itertools.count(1)
+
+# Global variables live in a list indexed by a name -> index map. Variable and
+# Assign nodes for globals keep an inline cache of (globalIndex, globalVersion);
+# while the version still matches the table's, the index is used directly.
+# Redefining a global reuses its slot, so a script that redefines one in a
+# loop doesn't grow the table, and gives the table a new version, which drops
+# every cache at once. Defining a new name leaves existing caches valid.
+class GlobalTable:
+  def __init__(self):
+    self.indexes = {}
+    self.values = []
+    self.version = next(versions)
+    self.hits = 0
+    self.misses = 0
+
+  def define(self, name, value):
+    index = self.indexes.get(name)
+    if (index != None):
+      self.values[index] = value
+      self.version = next(versions)
+      return
+
+    self.indexes[name] = len(self.values)
+    self.values.append(value)
+
+  def resolve(self, expr, name):
+    self.misses += 1
+
+    index = self.indexes.get(name.lexeme)
+    if (index == None):
+      raise ParserError(name, f"Undefined variable {name.lexeme}.")
+
+    expr.globalIndex = index
+    expr.globalVersion = self.version
+    return index
+
+  def lookup(self, expr, name):
+    if (expr.globalVersion == self.version):
+      self.hits += 1
+      return self.values[expr.globalIndex]
+
+    return self.values[self.resolve(expr, name)]
+
+  def store(self, expr, name, value):
+    if (expr.globalVersion == self.version):
+      self.hits += 1
+      self.values[expr.globalIndex] = value
+      return
+
+    self.values[self.resolve(expr, name)] = value
+
+  def get(self, name):
+    if (name.lexeme in self.indexes):
+      return self.values[self.indexes[name.lexeme]]
+
+    raise ParserError(name, f"Undefined variable {name.lexeme}.")
+
+  def valueOf(self, lexeme):
+    return self.values[self.indexes[lexeme]]
+
+  def stats(self):
+    return {"hits": self.hits, "misses": self.misses}
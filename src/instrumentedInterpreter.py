@@ -0,0 +1,75 @@
+from interpreter import Interpreter
+from loxCallable import LoxCallable
+from loxClass import LoxClass
+from loxFunction import LoxFunction
+import statements
+
+# The tree-walker with the InterpreterListener events reported. Interpreter
+# becomes one while it has listeners (see addListener) and goes back once the
+# last is removed, so the plain interpreter never checks for them. The
+# listener list is replaced rather than changed, so a listener can add or
+# remove listeners from inside an event.
+class InstrumentedInterpreter(Interpreter):
+  __slots__ = ()
+
+  def executeFunction(self, function, frame):
+    for listener in self.listeners:
+      listener.callEntered(self, function)
+
+    try:
+      return Interpreter.executeFunction(self, function, frame)
+    finally:
+      for listener in self.listeners:
+        listener.callExited(self, function)
+
+  def callValue(self, function, arguments):
+    value = Interpreter.callValue(self, function, arguments)
+
+    if (type(function) is LoxClass):
+      for listener in self.listeners:
+        listener.instanceCreated(self, value)
+    elif (type(function) is not LoxFunction and isinstance(function, LoxCallable)):
+      for listener in self.listeners:
+        listener.nativeCalled(self, function, arguments, value)
+
+    return value
+
+  def statementStarted(self, stmt):
+    for listener in self.listeners:
+      listener.statementStarted(self, stmt)
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    self.statementStarted(stmt)
+    return Interpreter.visitExpressionStmt(self, stmt)
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    self.statementStarted(stmt)
+    return Interpreter.visitPrintStmt(self, stmt)
+
+  def visitVarStmt(self, stmt: statements.Var):
+    self.statementStarted(stmt)
+    return Interpreter.visitVarStmt(self, stmt)
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    self.statementStarted(stmt)
+    return Interpreter.visitBlockStmt(self, stmt)
+
+  def visitIfStmt(self, stmt: statements.If):
+    self.statementStarted(stmt)
+    return Interpreter.visitIfStmt(self, stmt)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    self.statementStarted(stmt)
+    return Interpreter.visitWhileStmt(self, stmt)
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.statementStarted(stmt)
+    return Interpreter.visitFunctionStmt(self, stmt)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    self.statementStarted(stmt)
+    return Interpreter.visitReturnStmt(self, stmt)
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.statementStarted(stmt)
+    return Interpreter.visitClassStmt(self, stmt)
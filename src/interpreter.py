@@ -1,26 +1,44 @@
-from os import environ, stat
+from cell import Cell
 from clock import Clock
-from environment import Environment
+from completion import RETURN
+from globalTable import GlobalTable
 import expressions
 from loxCallable import LoxCallable
 from loxClass import LoxClass
 from loxFunction import LoxFunction
 from loxInstance import LoxInstance
-from returnException import ReturnException
+from tailCall import TailCall
 import statements
-from tokenType import TokenType
 from parserC import ParserError
 
 class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
-  def __init__(self):
-    self.globals = Environment()
-    self.environment = self.globals
-    self.locals = {}
+  # Swapping an instance's class, as addListener does, turns the compact
+  # attribute storage of a plain object into a dict that is slower to read.
+  # Fields in slots keep their speed whatever the class has been.
+  __slots__ = ("globals", "frame", "stringNumbers", "returnValue", "memoizer", "listeners")
+
+  def __init__(self, stringNumbers=False, memoizer=None):
+    self.globals = GlobalTable()
+    # The slot list of the running function call or top-level block; None
+    # while top-level code outside any block runs.
+    self.frame = None
+    # Compatibility mode: number literals evaluate to strings and arithmetic
+    # parses numeric strings back into floats.
+    self.stringNumbers = stringNumbers
+    self.returnValue = None
+    # Hands out result caches for pure (or opted-in) functions; None turns
+    # memoization off.
+    self.memoizer = memoizer
+    # Tooling attached with addListener.
+    self.listeners = []
 
     self.globals.define("clock", Clock())
 
   def visitLiteralExpr(self, expr: expressions.Literal):
-    return str(expr.value)
+    if (self.stringNumbers and isinstance(expr.value, float)):
+      return str(expr.value)
+
+    return expr.value
 
   def visitGroupingExpr(self, expr: expressions.Grouping):
       return self.evaluate(expr.expression)
@@ -29,15 +47,7 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
     return expr.accept(self)
   
   def visitUnaryExpr(self, expr: expressions.Unary):
-    right = self.evaluate(expr.right)
-
-    if (expr.operator.type == TokenType.MINUS):
-      self.checkNumberOperand(expr.operator, right)
-      return -float(right)
-    elif (expr.operator.type == TokenType.BANG):
-      return not self.isTruthy(right)
-    
-    return None
+    return expr.handler(self, expr.operator, expr.right.accept(self))
 
   def isTruthy(self, object):
     if (object == None):
@@ -48,64 +58,38 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
     return True
 
   def visitBinaryExpr(self, expr: expressions.Binary):
-    left = self.evaluate(expr.left)
-    right = self.evaluate(expr.right)
-    
-    if (expr.operator.type == TokenType.GREATER):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) > float(right)
-    elif (expr.operator.type == TokenType.GREATER_EQUAL):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) >= float(right)
-    elif (expr.operator.type == TokenType.LESS):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) < float(right)
-    elif (expr.operator.type == TokenType.LESS_EQUAL):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) <= float(right)
-    elif (expr.operator.type == TokenType.BANG_EQUAL):
-      return not self.isEqual(left, right)
-    elif (expr.operator.type == TokenType.EQUAL_EQUAL):
-      return self.isEqual(left, right)
-
-    elif (expr.operator.type == TokenType.MINUS):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) - float(right)
-    elif (expr.operator.type == TokenType.PLUS):
-      if (isinstance(left, float) and isinstance(right, float)):
-        return float(left) + float(right)
+    return expr.handler(self, expr.operator, expr.left.accept(self), expr.right.accept(self))
 
+  def plus(self, operator, left, right):
+    if (type(left) is float and type(right) is float):
+      return left + right
+
+    if (not self.stringNumbers):
       if (isinstance(left, str) and isinstance(right, str)):
-        try:
-          leftFloat = float(left)
-          rightFloat = float(right)
-          return leftFloat + rightFloat
-        except:
-          return str(left) + str(right)
-
-      if (isinstance(left, str) and isinstance(right, float)):
-        return float(left) + float(right)
-
-      if (isinstance(left, float) and isinstance(right, str)):
-        return float(left) + float(right)
-
-      raise ParserError(expr.operator, "Operands must be two numbers or two strings.")
-    elif (expr.operator.type == TokenType.SLASH):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) / float(right)
-    elif (expr.operator.type == TokenType.STAR):
-      self.checkNumberOperands(expr.operator, left, right)
-      return float(left) * float(right)
+        return left + right
 
-    return None
+      raise ParserError(operator, "Operands must be two numbers or two strings.")
 
-  def isEqual(self, a, b):
-    if (a == None and b == None):
-      return True
-    if (a == None):
-      return False
+    if (isinstance(left, str) and isinstance(right, str)):
+      try:
+        leftFloat = float(left)
+        rightFloat = float(right)
+        return leftFloat + rightFloat
+      except:
+        return str(left) + str(right)
 
-    return a == b
+    if (isinstance(left, str) and isinstance(right, float)):
+      return float(left) + float(right)
+
+    if (isinstance(left, float) and isinstance(right, str)):
+      return float(left) + float(right)
+
+    raise ParserError(operator, "Operands must be two numbers or two strings.")
+
+  # Values of different types are never equal. Python's == alone would say
+  # 1 == true, since bool is a kind of int.
+  def isEqual(self, a, b):
+    return type(a) is type(b) and a == b
 
   def checkNumberOperand(self, operator, operand):
     if (isinstance(operand, float)):
@@ -113,6 +97,16 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
     
     raise ParserError(operator, "Operand must be a number")
   
+  def numberOperands(self, operator, left, right):
+    if (type(left) is float and type(right) is float):
+      return left, right
+
+    if (self.stringNumbers):
+      self.checkNumberOperands(operator, left, right)
+      return float(left), float(right)
+
+    raise ParserError(operator, "Operands must be numbers.")
+
   def checkNumberOperands(self, operator, left, right):
     if (isinstance(left, float) and isinstance(right, float)):
       return
@@ -138,6 +132,28 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
 
     raise ParserError(operator, "Operand must be numbers")
 
+  # Attaches an InterpreterListener to be told of calls, statements, new
+  # instances and native calls. The first listener turns this interpreter into
+  # an InstrumentedInterpreter, which reports them; until then no path checks
+  # for listeners, so having the hooks costs nothing. Subclasses such as
+  # StackInterpreter run code their own way and can't be instrumented.
+  def addListener(self, listener):
+    from instrumentedInterpreter import InstrumentedInterpreter
+
+    if (type(self) is Interpreter):
+      self.__class__ = InstrumentedInterpreter
+    elif (type(self) is not InstrumentedInterpreter):
+      raise RuntimeError(f"{type(self).__name__} doesn't support listeners.")
+
+    self.listeners = self.listeners + [listener]
+
+  def removeListener(self, listener):
+    from instrumentedInterpreter import InstrumentedInterpreter
+
+    self.listeners = [other for other in self.listeners if other is not listener]
+    if (not self.listeners and type(self) is InstrumentedInterpreter):
+      self.__class__ = Interpreter
+
   def interpret(self, statements):
     try:
       for statement in statements:
@@ -146,10 +162,7 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
       raise RuntimeError("error")
 
   def execute(self, stmt: statements.Stmt):
-    stmt.accept(self)
-
-  def resolve(self, expr, depth):
-    self.locals[expr] = depth
+    return stmt.accept(self)
 
   def stringify(self, object):
     if (object == None):
@@ -165,35 +178,78 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
 
     return str(object)     
 
-  def executeBlock(self, statements, environment):
-    previous = self.environment
+  def executeBlock(self, statements, frame):
+    previous = self.frame
 
     try:
-      self.environment = environment
+      self.frame = frame
       for statement in statements:
-        self.execute(statement)
+        if (statement.accept(self) is RETURN):
+          return RETURN
     finally:
-      self.environment = previous
+      self.frame = previous
+
+  # Runs the body of a Lox function in its call frame. LoxFunction.run calls
+  # this once per call, tail calls included, so subclasses can watch calls here.
+  def executeFunction(self, function, frame):
+    previous = self.frame
+
+    try:
+      self.frame = frame
+      for statement in function.declaration.body:
+        if (statement.accept(self) is RETURN):
+          return RETURN
+    finally:
+      self.frame = previous
 
   def visitAssignExpr(self, expr: expressions.Assign):
     value = self.evaluate(expr.value)
 
-    distance = self.locals.get(expr)
-
-    if (distance != None):
-      self.environment.assignAt(distance, expr.name, value)
+    if (expr.depth == None):
+      self.globals.store(expr, expr.name, value)
+    elif (expr.cell):
+      self.frame[expr.slot].value = value
     else:
-      self.globals.assign(expr.name, value)
+      self.frame[expr.slot] = value
 
     return value
   
   def visitGetExpr(self, expr: expressions.Get):
-    object = self.evaluate(expr.obj)
+    object = expr.obj.accept(self)
 
-    if (isinstance(object, LoxInstance)):
-      return object.get(expr.name)
-    
-    raise RuntimeError(expr.name, "Only instances have properties.")
+    if (type(object) is LoxInstance and object.shape is expr.cacheShape):
+      if (expr.cacheIndex != None):
+        return object.values[expr.cacheIndex]
+      return expr.cacheMethod.bind(object)
+
+    return self.getProperty(object, expr)
+
+  def getProperty(self, object, expr: expressions.Get):
+    if (not isinstance(object, LoxInstance)):
+      raise RuntimeError(expr.name, "Only instances have properties.")
+
+    if (object.shape is not expr.cacheShape):
+      self.cacheProperty(object, expr)
+
+    if (expr.cacheIndex != None):
+      return object.values[expr.cacheIndex]
+    return expr.cacheMethod.bind(object)
+
+  # Fills the Get node's cache for the instance's shape: the field offset, or
+  # the method when the shape has no field of that name.
+  def cacheProperty(self, object, expr: expressions.Get):
+    lexeme = expr.name.lexeme
+    index = object.shape.indexes.get(lexeme)
+    method = None
+
+    if (index == None):
+      method = object.klass.methodTable.get(lexeme)
+      if (method == None):
+        raise RuntimeError(expr.name, f"Undefined property {lexeme}.")
+
+    expr.cacheShape = object.shape
+    expr.cacheIndex = index
+    expr.cacheMethod = method
 
   def visitLogicalExpr(self, expr: 'expressions.Expr'):
     pass
@@ -204,16 +260,40 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
     if (not isinstance(object, LoxInstance)):
       raise RuntimeError(expr.name, "Only instances have fields.")
     
-    value = self.evaluate(expr.value)
-    object.set(expr.name, value)
-    
+    value = expr.value.accept(self)
+
+    if (object.shape is expr.cacheShape):
+      if (expr.cacheTransition == None):
+        object.values[expr.cacheIndex] = value
+      else:
+        object.values.append(value)
+        object.shape = expr.cacheTransition
+      return value
+
+    self.setProperty(object, expr, value)
     return value
 
+  # Sets the field and caches either its offset or, for a new field, the
+  # shape transition, keyed by the shape the instance had before.
+  def setProperty(self, object, expr: expressions.Set, value):
+    shape = object.shape
+    index = shape.indexes.get(expr.name.lexeme)
+    expr.cacheShape = shape
+    expr.cacheIndex = index
+
+    if (index != None):
+      object.values[index] = value
+      expr.cacheTransition = None
+    else:
+      object.shape = shape.withField(expr.name.lexeme)
+      object.values.append(value)
+      expr.cacheTransition = object.shape
+
   def visitSuperExpr(self, expr: expressions.Super):
-    distance = self.locals[expr]
-    superclass = self.environment.getAt(distance, "super")
-    obj = self.environment.getAt(distance - 1, "this")
-    print(expr)
+    superclass = self.frame[expr.slot].value
+    obj = self.frame[expr.thisSlot]
+    if (expr.thisCell):
+      obj = obj.value
     method = superclass.findMethod(expr.method.lexeme)
 
     if (method == None):
@@ -228,20 +308,55 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
     return self.lookUpVariable(expr.name, expr)
 
   def lookUpVariable(self, name, expr):
-    distance = self.locals.get(expr)
+    if (expr.depth == None):
+      globals = self.globals
+      if (expr.globalVersion == globals.version):
+        globals.hits += 1
+        return globals.values[expr.globalIndex]
+      return globals.lookup(expr, name)
+
+    if (expr.cell):
+      return self.frame[expr.slot].value
+    return self.frame[expr.slot]
+
+  # A captured local gets a new cell each time its declaration runs, so each
+  # loop iteration's closures see their own variable.
+  def declare(self, stmt, value):
+    if (stmt.slot == None):
+      self.globals.define(stmt.name.lexeme, value)
+    elif (stmt.cell):
+      self.frame[stmt.slot] = Cell(value)
+    else:
+      self.frame[stmt.slot] = value
 
-    if (distance != None):
-      return self.environment.getAt(distance, name.lexeme)
+  # Sets a local declared earlier, without replacing its cell.
+  def initialize(self, stmt, value):
+    if (stmt.slot != None and stmt.cell):
+      self.frame[stmt.slot].value = value
     else:
-      return self.globals.get(name)
+      self.declare(stmt, value)
+
+  # The cells a new closure of declaration keeps from the running frame.
+  def capture(self, declaration: statements.Function):
+    frame = self.frame
+    return [frame[slot] for slot in declaration.upvalueSources]
+
+  def makeFunction(self, stmt: statements.Function):
+    memo = None
+    if (self.memoizer != None):
+      memo = self.memoizer.cacheFor(stmt)
+
+    return LoxFunction(stmt, self.capture(stmt), False, None, memo)
 
   def visitVarStmt(self, stmt: statements.Var):
     value = None
 
     if (stmt.initializer != None):
+      if (stmt.readsItself):
+        self.declare(stmt, None)
       value = self.evaluate(stmt.initializer)
     
-    self.environment.define(stmt.name.lexeme, value)
+    self.declare(stmt, value)
     return None
 
   def visitExpressionStmt(self, stmt: statements.Expression):
@@ -254,66 +369,128 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
     return None
 
   def visitBlockStmt(self, stmt: statements.Block):
-    self.executeBlock(stmt.statements, Environment(self.environment))
+    if (stmt.slotCount != 0):
+      return self.executeBlock(stmt.statements, [None] * stmt.slotCount)
+
+    for statement in stmt.statements:
+      if (statement.accept(self) is RETURN):
+        return RETURN
 
   def visitIfStmt(self, stmt: statements.If):
 
     if (self.isTruthy(self.evaluate(stmt.condition))):
-      self.execute(stmt.thenBranch)
+      return self.execute(stmt.thenBranch)
     elif (stmt.elseBranch != None) :
-      self.execute(stmt.elseBranch)
+      return self.execute(stmt.elseBranch)
 
     return None
 
   def visitLogicalExpr(self, expr: expressions.Logical):
-    left = self.evaluate(expr.left)
-
-    if (expr.operator.type == TokenType.OR):
-      if (self.isTruthy(left)):
-        return left
-      else:
-        if (not self.isTruthy(left)):
-          return left
-        
-    return self.evaluate(expr.right)
+    return expr.handler(self, expr.left.accept(self), expr.right)
 
   def visitWhileStmt(self, stmt: statements.While):
     while (self.isTruthy(self.evaluate(stmt.condition))):
-      self.execute(stmt.body)
+      if (self.execute(stmt.body) is RETURN):
+        return RETURN
     
     return None
 
   def visitCallExpr(self, expr: expressions.Call):
+    if (type(expr.callee) is expressions.Get):
+      return self.invokeMethod(expr, expr.callee)
+
     function = self.evaluate(expr.callee)
+    return self.callFunction(function, expr.arguments)
+
+  # obj.method(args): calls the method with the instance as its receiver, so
+  # no bound method is created for it.
+  def invokeMethod(self, expr, callee):
+    object = callee.obj.accept(self)
+
+    if (type(object) is LoxInstance):
+      if (object.shape is not callee.cacheShape):
+        self.cacheProperty(object, callee)
+
+      method = callee.cacheMethod
+      if (callee.cacheIndex == None and type(method) is LoxFunction):
+        arguments = [argument.accept(self) for argument in expr.arguments]
+        if (len(arguments) != len(method.declaration.params)):
+          raise RuntimeError(f"Expected {method.arity()} arguments but got {len(arguments)}.")
+        return method.invoke(self, object, arguments)
+
+    return self.callFunction(self.getProperty(object, callee), expr.arguments)
 
+  def callFunction(self, function, argumentExpressions):
     arguments = []
 
-    for argument in expr.arguments:
+    for argument in argumentExpressions:
       arguments.append(self.evaluate(argument)) 
 
+    return self.callValue(function, arguments)
+
+  def callValue(self, function, arguments):
     if (not isinstance(function, LoxCallable)):
       raise RuntimeError("Can only call functions and classes.")
 
     # function: LoxCallable = callee
 
     if (len(arguments) != function.arity()):
-      raise RuntimeError(f"Expected {function.arity()} arguments but got {arguments.size}.")
+      raise RuntimeError(f"Expected {function.arity()} arguments but got {len(arguments)}.")
 
     return function.call(self, arguments)
 
   def visitFunctionStmt(self, stmt: statements.Function):
-    function = LoxFunction(stmt, self.environment, False)
-
-    self.environment.define(stmt.name.lexeme, function)
+    # A function that calls itself captures its own name, so its cell has to
+    # exist before the closure is made.
+    if (stmt.cell):
+      self.declare(stmt, None)
+      self.initialize(stmt, self.makeFunction(stmt))
+    else:
+      self.declare(stmt, self.makeFunction(stmt))
     return None
 
   def visitReturnStmt(self, stmt: statements.Return):
     value = None
 
-    if (stmt.value != None):
+    if (stmt.tailCall):
+      value = self.tailCall(stmt.value)
+    elif (stmt.value != None):
       value = self.evaluate(stmt.value)
 
-    raise ReturnException(value)
+    self.returnValue = value
+    return RETURN
+
+  # Evaluates the callee and arguments of a call in tail position. Calls to Lox
+  # functions are handed back as a TailCall for LoxFunction.run; anything else
+  # is called here.
+  def tailCall(self, expr: expressions.Call):
+    callee = expr.callee
+
+    if (type(callee) is expressions.Get):
+      object = callee.obj.accept(self)
+
+      if (type(object) is LoxInstance):
+        if (object.shape is not callee.cacheShape):
+          self.cacheProperty(object, callee)
+        if (callee.cacheIndex == None and type(callee.cacheMethod) is LoxFunction):
+          return self.tailCallTo(callee.cacheMethod, object, expr.arguments)
+
+      function = self.getProperty(object, callee)
+    else:
+      function = callee.accept(self)
+
+    if (type(function) is LoxFunction):
+      return self.tailCallTo(function, function.receiver, expr.arguments)
+
+    return self.callFunction(function, expr.arguments)
+
+  def tailCallTo(self, function, receiver, argumentExpressions):
+    arguments = [argument.accept(self) for argument in argumentExpressions]
+
+    if (len(arguments) != len(function.declaration.params)):
+      raise RuntimeError(f"Expected {function.arity()} arguments but got {len(arguments)}.")
+
+    return TailCall(function, receiver, arguments)
 
   def visitClassStmt(self, stmt: statements.Class):
     superclass = None
@@ -323,23 +500,23 @@ class Interpreter(expressions.ExprVisitor, statements.StmtVisitor):
       if (not isinstance(superclass, LoxClass)):
         raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
     
-    self.environment.define(stmt.name.lexeme, None)
+    self.declare(stmt, None)
+    frame = self.frame
 
     if (stmt.superclass != None):
-      environment = Environment(self.environment)
-      environment.define("super", superclass)
+      if (stmt.slotCount != 0):
+        self.frame = [None] * stmt.slotCount
+      self.frame[stmt.superSlot] = Cell(superclass)
 
     methods = {}
 
     for method in stmt.methods:
-      function = LoxFunction(method, self.environment, method.name.lexeme == "init")
+      function = LoxFunction(method, self.capture(method), method.name.lexeme == "init")
       methods[method.name.lexeme] = function
 
     klass = LoxClass(stmt.name.lexeme, superclass, methods)
+    self.frame = frame
 
-    if (superclass != None):
-      environment = environment.enclosing
-
-    self.environment.assign(stmt.name, klass)
+    self.initialize(stmt, klass)
 
     return None
\ No newline at end of file
@@ -0,0 +1,27 @@
+# Receives the events of an Interpreter it was added to with addListener.
+# Subclass it and override the events you need; the rest do nothing. Every
+# event gets the interpreter first, so a listener can look at its frame and
+# globals. Events fire on the thread running the script, in program order.
+class InterpreterListener:
+  # A Lox function or method starts running its body. Tail calls enter the
+  # function they jump to; a call answered from a memo cache doesn't enter.
+  def callEntered(self, interpreter, function):
+    pass
+
+  # The body started by the matching callEntered has finished, by returning
+  # or by raising.
+  def callExited(self, interpreter, function):
+    pass
+
+  # The statement is about to run. Blocks are reported, then each statement
+  # in them.
+  def statementStarted(self, interpreter, stmt):
+    pass
+
+  # A class was called and returned a new instance, after its init ran.
+  def instanceCreated(self, interpreter, instance):
+    pass
+
+  # A native function such as clock was called and returned result.
+  def nativeCalled(self, interpreter, native, arguments, result):
+    pass
@@ -1,30 +1,127 @@
 from os import stat
+import argparse
 import sys
+from closureInterpreter import ClosureInterpreter
 from interpreter import Interpreter
+from memoizer import Memoizer, DEFAULT_MEMO_SIZE
+from pythonInterpreter import PythonInterpreter
+from stackInterpreter import StackInterpreter, DEFAULT_MAX_DEPTH
+from stackOverflowError import StackOverflowError
+from vm import VM
+from optimizer import Optimizer
+from profiler import Profiler
+from profilingInterpreter import ProfilingInterpreter
+from purityAnalysis import PurityAnalysis
 from resolver import Resolver
-from scanner import *
-from parserC import ParserC
+from scriptCache import ScriptCache
+from regexScanner import RegexScanner
+from prattParser import PrattParser
+from streamingParser import StreamingParser
+from streamingScanner import StreamingScanner
 from ast_printer import AstPrinter
 
 class Lox: 
   def __init__(self):
     self.hadError = False
+    self.hadRuntimeError = False
+    self.engine = "tree"
+    self.emitPython = False
+    self.stringNumbers = False
+    self.optimize = True
+    self.cacheStats = False
+    self.maxDepth = DEFAULT_MAX_DEPTH
+    self.stream = False
+    self.cache = True
+    self.memoize = True
+    self.memoNames = []
+    self.memoSize = DEFAULT_MEMO_SIZE
+    self.memoEviction = "lru"
+    self.profile = False
+    self.profileJson = None
+    self.profiler = None
 
   def main(self, args: list[str]):
-    if (len(args) > 2):
-      print("Usage: pylox [script]")
-      sys.exit()
-    elif (len(args) == 2):
-      self.runFile(args[1])
+    argParser = argparse.ArgumentParser(prog="pylox", usage="pylox [options] [script]")
+    argParser.add_argument("script", nargs="?")
+    argParser.add_argument("--vm", dest="engine", action="store_const", const="vm", default="tree",
+      help="compile to bytecode and run it on the stack virtual machine")
+    argParser.add_argument("--closures", dest="engine", action="store_const", const="closures",
+      help="compile the syntax tree into nested Python closures before running it")
+    argParser.add_argument("--python", dest="engine", action="store_const", const="python",
+      help="transpile the script to Python and run it through compile()")
+    argParser.add_argument("--stack", dest="engine", action="store_const", const="stack",
+      help="walk the syntax tree with explicit work and value stacks instead of Python recursion")
+    argParser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH,
+      help="deepest Lox call nesting allowed with --stack before reporting a stack overflow")
+    argParser.add_argument("--emit-python", action="store_true",
+      help="print the Python code generated for the script instead of running it")
+    argParser.add_argument("--string-numbers", action="store_true",
+      help="keep number literals as strings and coerce them in arithmetic (pre-native-number behaviour)")
+    argParser.add_argument("--no-optimize", dest="optimize", action="store_false",
+      help="skip constant folding and propagation between parsing and resolving")
+    argParser.add_argument("--cache-stats", action="store_true",
+      help="print global variable inline cache hits and misses to stderr after the run")
+    argParser.add_argument("--stream", action="store_true",
+      help="scan, parse and run the script one top-level statement at a time, in constant memory (skips the optimizer)")
+    argParser.add_argument("--no-cache", dest="cache", action="store_false",
+      help="don't load or write compiled scripts in __loxcache__ directories")
+    argParser.add_argument("--no-memoize", dest="memoize", action="store_false",
+      help="don't cache the results of functions found to be pure (functions named with --memoize still are)")
+    argParser.add_argument("--memoize", dest="memo_names", action="append", default=[], metavar="NAME",
+      help="cache the results of the functions called NAME even if they can't be proved pure; repeatable")
+    argParser.add_argument("--memo-size", type=int, default=DEFAULT_MEMO_SIZE, metavar="N",
+      help="results kept per memoized function; 0 turns memoization off")
+    argParser.add_argument("--memo-eviction", choices=["lru", "fifo"], default="lru",
+      help="which result a full memo cache drops: the least recently used or the oldest")
+    argParser.add_argument("--profile", action="store_true",
+      help="count and time every call and count statements run per line, then print a report to stderr")
+    argParser.add_argument("--profile-json", metavar="FILE",
+      help="with --profile, also write the whole profile to FILE as JSON")
+    argParser.add_argument("--prune-cache", nargs="?", const=".", metavar="DIR",
+      help="remove stale __loxcache__ entries under DIR (default: current directory) and exit")
+    options = argParser.parse_args(args[1:])
+
+    if (options.stream and (options.engine == "python" or options.emit_python)):
+      argParser.error("--stream can't be combined with --python or --emit-python, which need the whole script")
+    if ((options.profile or options.profile_json != None) and (options.engine != "tree" or options.emit_python)):
+      argParser.error("--profile only works with the tree-walking interpreter")
+
+    self.engine = options.engine
+    self.emitPython = options.emit_python
+    self.stringNumbers = options.string_numbers
+    self.optimize = options.optimize
+    self.cacheStats = options.cache_stats
+    self.maxDepth = options.max_depth
+    self.stream = options.stream
+    self.cache = options.cache
+    self.memoize = options.memoize
+    self.memoNames = options.memo_names
+    self.memoSize = options.memo_size
+    self.memoEviction = options.memo_eviction
+    self.profile = options.profile or options.profile_json != None
+    self.profileJson = options.profile_json
+
+    if (options.prune_cache != None):
+      removed = ScriptCache(self.optimize, self.stringNumbers).prune(options.prune_cache)
+      print(f"removed {removed} stale cache entries")
+      return
+
+    if (options.script != None):
+      self.runFile(options.script)
     else:
       self.runPrompt()
     
   def runFile(self, path):
     file = open(path, mode='r')
-    allText = file.read()
-    self.run(allText)
+    if (self.stream):
+      self.runStream(file)
+    else:
+      allText = file.read()
+      self.run(allText, path)
     if (self.hadError):
       sys.exit()
+    if (self.hadRuntimeError):
+      sys.exit(70)
 
   def runPrompt(self):
     while True:
@@ -33,24 +130,109 @@ class Lox:
         break
       self.run(line)
       self.hadError = False
+      self.hadRuntimeError = False
+
+  # path is the script's file, if any; only scripts from files are cached.
+  def run(self, source: str, path=None):
+    interpreter = self.createInterpreter()
+    cache = None
+    statements = None
+
+    if (self.cache and path != None):
+      cache = ScriptCache(self.optimize, self.stringNumbers)
+      statements = cache.load(path, source)
+
+    if (statements == None):
+      statements = self.compile(source)
+      if (statements == None):
+        return
+      if (cache != None):
+        cache.store(path, source, statements)
+
+    if (self.emitPython):
+      print(interpreter.transpile(statements), end="")
+      return
+
+    self.execute(interpreter, lambda: interpreter.interpret(statements))
 
-  def run(self, source: str):
-    scanner = Scanner(source)
+  # Scans, parses, optimizes and resolves the source. Returns None on errors.
+  def compile(self, source: str):
+    scanner = RegexScanner(source)
     tokens = scanner.scanTokens()
-    parser = ParserC(tokens)
+    parser = PrattParser(tokens)
     statements = parser.parse()
-    interpreter = Interpreter()
 
     if (self.hadError):
-      return
+      return None
+
+    if (self.optimize):
+      statements = Optimizer(self.stringNumbers).optimize(statements)
 
-    resolver = Resolver(interpreter)
+    resolver = Resolver()
     resolver.resolve(statements)
+    PurityAnalysis().analyze(statements)
 
     if (self.hadError):
-      return
+      return None
+
+    return statements
+
+  # Each top-level statement is resolved and run as soon as it's parsed, and
+  # dropped afterwards. Globals live on across statements in the interpreter.
+  # Purity needs the whole script, so only --memoize functions are memoized.
+  def runStream(self, file):
+    parser = StreamingParser(StreamingScanner(file).scanTokens())
+    resolver = Resolver()
+    interpreter = self.createInterpreter()
+
+    def interpretAll():
+      for statement in parser.declarations():
+        resolver.resolve([statement])
+        interpreter.interpret([statement])
+
+    self.execute(interpreter, interpretAll)
+
+  def execute(self, interpreter, interpret):
+    try:
+      interpret()
+    except StackOverflowError as error:
+      self.runtimeError(error)
+    finally:
+      if (self.cacheStats and self.engine in ("tree", "closures", "stack")):
+        self.reportCacheStats(interpreter)
+      if (self.profiler != None):
+        self.profiler.report(sys.stderr)
+        if (self.profileJson != None):
+          self.profiler.writeJson(self.profileJson)
+
+  def reportCacheStats(self, interpreter):
+    stats = interpreter.globals.stats()
+    print(f"global cache: {stats['hits']} hits, {stats['misses']} misses", file=sys.stderr)
+
+    if (interpreter.memoizer != None):
+      for memo in interpreter.memoizer.caches.values():
+        print(f"memo {memo.name}: {memo.hits} hits, {memo.misses} misses, {memo.evictions} evictions, {memo.skipped} uncached calls", file=sys.stderr)
+
+  def createInterpreter(self):
+    if (self.engine == "vm"):
+      return VM(self.stringNumbers)
+    if (self.engine == "python" or self.emitPython):
+      return PythonInterpreter(self.stringNumbers)
+
+    memoizer = Memoizer(self.memoSize, self.memoEviction, self.memoNames, self.memoize)
+    if (self.engine == "closures"):
+      return ClosureInterpreter(self.stringNumbers, memoizer)
+    if (self.engine == "stack"):
+      return StackInterpreter(self.stringNumbers, self.maxDepth, memoizer)
+    if (self.profile):
+      self.profiler = Profiler()
+      return ProfilingInterpreter(self.profiler, self.stringNumbers, memoizer)
+
+    return Interpreter(self.stringNumbers, memoizer)
 
-    interpreter.interpret(statements)
+  def runtimeError(self, error):
+    print(f"{error.message}\n[line {error.token.line}]", file=sys.stderr)
+    self.hadRuntimeError = True
 
   def error(self, line: int, message: str):
     self.report(line, "", message)
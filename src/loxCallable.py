@@ -4,6 +4,9 @@ from abc import abstractmethod
 from abc import ABC, abstractmethod
 
 class LoxCallable:
+  # Empty so that subclasses declaring __slots__ get no per-object __dict__.
+  __slots__ = ()
+
   @abstractmethod
   def arity(self, interpreter, arguments):
     pass
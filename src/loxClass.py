@@ -1,38 +1,57 @@
-
-
 from loxCallable import LoxCallable
 from loxInstance import LoxInstance
+from shape import Shape
 
 
 class LoxClass(LoxCallable):
+  __slots__ = ("name", "methods", "superclass", "methodTable", "initializer", "arityCount", "shape")
+
   def __init__(self, name, superclass, methods):
     self.name = name
     self.methods = methods
     self.superclass = superclass
+    self.shape = Shape({})
+    self.flatten()
+
+  # Copies the inherited methods and then this class's own into one table,
+  # so a lookup is a single dict access however deep the hierarchy is.
+  def flatten(self):
+    self.methodTable = {}
+    if (self.superclass != None):
+      self.methodTable.update(self.superclass.methodTable)
+    self.methodTable.update(self.methods)
+    self.cacheInitializer()
+
+  def cacheInitializer(self):
+    self.initializer = self.methodTable.get("init")
+    self.arityCount = 0
+    if (self.initializer != None):
+      self.arityCount = self.initializer.arity()
+
+  def inherit(self, superclass):
+    self.superclass = superclass
+    self.shape = Shape({})
+    self.flatten()
+
+  def defineMethod(self, name, method):
+    self.methods[name] = method
+    self.methodTable[name] = method
+    if (name == "init"):
+      self.cacheInitializer()
 
   def toString(self):
     return self.name
 
   def call(self, interpreter, arguments):
     instance = LoxInstance(self)
-    initializer = self.findMethod("init")
-    if (initializer != None):
-      initializer.bind(instance).call(interpreter, arguments)
+    if (self.initializer != None):
+      self.initializer.invoke(interpreter, instance, arguments)
 
     return instance
 
 
   def findMethod(self, name):
-    if (name in self.methods):
-      return self.methods.get(name)
-
-    if (self.superclass != None):
-      return self.superclass.findMethod(name)
-
-    return None
+    return self.methodTable.get(name)
 
   def arity(self):
-    initializer = self.findMethod("init")
-    if (initializer != None):
-      return initializer.arity()
-    return 0
\ No newline at end of file
+    return self.arityCount
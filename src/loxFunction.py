@@ -1,30 +1,85 @@
 from loxCallable import LoxCallable
-from environment import Environment
-from returnException import ReturnException
+from memoCache import MISSING
+from cell import Cell
+from completion import RETURN
+from tailCall import TailCall
+
+# 'this' in slot 0 of a method's frame, boxed when a closure captured it.
+def receiverOf(frame):
+  receiver = frame[0]
+  if (type(receiver) is Cell):
+    return receiver.value
+  return receiver
 
 class LoxFunction(LoxCallable):
-  def __init__(self, declaration, closure, isInitializer):
+  __slots__ = ("declaration", "upvalues", "isInitializer", "receiver", "memo")
+
+  # upvalues are the cells of the enclosing locals the function uses; nothing
+  # else of the frames around it is kept alive. receiver is set on bound
+  # methods; unbound methods are only run through invoke. memo is the
+  # MemoCache of a memoized function.
+  def __init__(self, declaration, upvalues, isInitializer, receiver=None, memo=None):
     self.declaration = declaration
-    self.closure = closure
+    self.upvalues = upvalues
     self.isInitializer = isInitializer 
+    self.receiver = receiver
+    self.memo = memo
 
   def call(self, interpreter, arguments):
-    environment = Environment(self.closure)
+    memo = self.memo
+
+    if (memo != None):
+      key = memo.key(arguments)
+      if (key != None):
+        value = memo.get(key)
+        if (value is MISSING):
+          value = self.run(interpreter, self.frame(self.receiver, arguments))
+          memo.put(key, value)
+        return value
+
+    return self.run(interpreter, self.frame(self.receiver, arguments))
+
+  # Runs a method with 'this' in slot 0 of the call frame, without binding it first.
+  def invoke(self, interpreter, receiver, arguments):
+    return self.run(interpreter, self.frame(receiver, arguments))
+
+  def frame(self, receiver, arguments):
+    declaration = self.declaration
+    values = [None] * declaration.slotCount
 
-    for i in range(0, len(self.declaration.params)):
-      environment.define(self.declaration.params[i].lexeme, arguments[i])
+    if (receiver == None):
+      values[0:len(arguments)] = arguments
+    else:
+      values[0] = receiver
+      values[1:len(arguments) + 1] = arguments
 
-    try:
-      interpreter.executeBlock(self.declaration.body, environment)
-    except ReturnException as returnC:
-      if (self.isInitializer):
-        return self.closure.getAt(0, "this")
-      return returnC.value
+    for slot in declaration.cellSlots:
+      values[slot] = Cell(values[slot])
+    if (self.upvalues):
+      for slot, cell in zip(declaration.upvalueSlots, self.upvalues):
+        values[slot] = cell
 
-    if (self.isInitializer):
-      return self.closure.getAt(0, "this")
+    return values
 
-    return None
+  # Tail calls come back as TailCall values and run here, one after another,
+  # so a chain of them uses constant Python stack.
+  def run(self, interpreter, frame):
+    function = self
+
+    while True:
+      value = None
+
+      if (interpreter.executeFunction(function, frame) is RETURN):
+        value = interpreter.returnValue
+
+      if (function.isInitializer):
+        return receiverOf(frame)
+
+      if (type(value) is not TailCall):
+        return value
+
+      function = value.function
+      frame = function.frame(value.receiver, value.arguments)
 
   def arity(self):
     return len(self.declaration.params)
@@ -33,7 +88,4 @@ class LoxFunction(LoxCallable):
     return f"<fn {self.declaration.name.lexeme} >"
   
   def bind(self, instance):
-    environment = Environment(self.closure)
-    environment.define("this", instance)
-
-    return LoxFunction(self.declaration, environment, self.isInitializer)
\ No newline at end of file
+    return LoxFunction(self.declaration, self.upvalues, self.isInitializer, instance)
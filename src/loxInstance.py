@@ -1,22 +1,34 @@
 
-
 class LoxInstance():
+  __slots__ = ("klass", "shape", "values")
+
   def __init__(self, klass):
     self.klass = klass
-    self.fields = {}
+    self.shape = klass.shape
+    self.values = []
 
   def toString(self):
     return f"{self.klass.name} instance" 
 
   def get(self, name):
-    if (name.lexeme in self.fields):
-      return self.fields.get(name.lexeme)
+    index = self.shape.indexes.get(name.lexeme)
+    if (index != None):
+      return self.values[index]
 
-    method = self.klass.findMethod(name.lexeme)
+    method = self.klass.methodTable.get(name.lexeme)
     if (method != None):
       return method.bind(self)
     
     raise RuntimeError(name, f"Undefined property {name.lexeme}.")
 
   def set(self, name, value):
-    self.fields[name.lexeme] = value
+    self.setField(name.lexeme, value)
+
+  def setField(self, name, value):
+    index = self.shape.indexes.get(name)
+
+    if (index != None):
+      self.values[index] = value
+    else:
+      self.shape = self.shape.withField(name)
+      self.values.append(value)
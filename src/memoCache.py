@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+# Returned by get for arguments that aren't cached.
+MISSING = object()
+
+# The results of one memoized function, by argument tuple, holding at most
+# size of them. With "lru" eviction a hit makes an entry the most recent one,
+# so the least recently used goes first; with "fifo" the oldest entry goes.
+class MemoCache:
+  def __init__(self, name, size, eviction):
+    self.name = name
+    self.size = size
+    self.lru = eviction == "lru"
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.skipped = 0
+
+  # Only calls whose arguments are all strings or non-zero numbers are cached.
+  # Those compare equal exactly when Lox treats them as the same value, unlike
+  # 0 and -0 (which print differently) or true and 1, and can't be changed by
+  # the function. Returns None for any other call.
+  def key(self, arguments):
+    for argument in arguments:
+      kind = type(argument)
+      if (kind is not str and (kind is not float or argument == 0.0)):
+        self.skipped += 1
+        return None
+
+    return tuple(arguments)
+
+  def get(self, key):
+    value = self.entries.get(key, MISSING)
+
+    if (value is MISSING):
+      self.misses += 1
+    else:
+      self.hits += 1
+      if (self.lru):
+        self.entries.move_to_end(key)
+
+    return value
+
+  def put(self, key, value):
+    entries = self.entries
+    entries[key] = value
+
+    if (len(entries) > self.size):
+      entries.popitem(last=False)
+      self.evictions += 1
@@ -0,0 +1,31 @@
+from memoCache import MemoCache
+
+DEFAULT_MEMO_SIZE = 1024
+
+# Decides which functions have their results cached, and keeps the caches.
+# Functions PurityAnalysis proved pure are memoized when automatic is set;
+# functions named in names are memoized whatever the analysis says, on the
+# caller's word that their result depends only on their arguments. A cache
+# belongs to the declaration, so every closure made from it shares one.
+class Memoizer:
+  def __init__(self, size=DEFAULT_MEMO_SIZE, eviction="lru", names=(), automatic=True):
+    self.size = size
+    self.eviction = eviction
+    self.names = set(names)
+    self.automatic = automatic
+    self.caches = {}
+
+  # The cache for calls to functions declared by declaration, or None.
+  def cacheFor(self, declaration):
+    if (self.size <= 0):
+      return None
+
+    if (not (self.automatic and declaration.pure) and declaration.name.lexeme not in self.names):
+      return None
+
+    cache = self.caches.get(declaration)
+    if (cache == None):
+      cache = MemoCache(declaration.name.lexeme, self.size, self.eviction)
+      self.caches[declaration] = cache
+
+    return cache
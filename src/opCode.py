@@ -0,0 +1,48 @@
+from enum import IntEnum
+
+class OpCode(IntEnum):
+  CONSTANT = 1
+  NIL = 2
+  TRUE = 3
+  FALSE = 4
+  POP = 5
+
+  GET_LOCAL = 6
+  SET_LOCAL = 7
+  GET_GLOBAL = 8
+  DEFINE_GLOBAL = 9
+  SET_GLOBAL = 10
+  GET_UPVALUE = 11
+  SET_UPVALUE = 12
+  GET_PROPERTY = 13
+  SET_PROPERTY = 14
+  GET_SUPER = 15
+
+  EQUAL = 16
+  NOT_EQUAL = 17
+  GREATER = 18
+  GREATER_EQUAL = 19
+  LESS = 20
+  LESS_EQUAL = 21
+  ADD = 22
+  SUBTRACT = 23
+  MULTIPLY = 24
+  DIVIDE = 25
+  NOT = 26
+  NEGATE = 27
+
+  PRINT = 28
+  JUMP = 29
+  JUMP_IF_FALSE = 30
+  LOOP = 31
+  CALL = 32
+  INVOKE = 33
+  SUPER_INVOKE = 34
+  CLOSURE = 35
+  CLOSE_UPVALUE = 36
+  RETURN = 37
+  CLASS = 38
+  INHERIT = 39
+  METHOD = 40
+  TAIL_CALL = 41
+  TAIL_INVOKE = 42
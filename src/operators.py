@@ -0,0 +1,99 @@
+from tokenType import TokenType
+
+# Operator handlers, looked up once per node by the Resolver and stored on it
+# as expr.handler. Binary handlers get both evaluated operands, unary handlers
+# the evaluated operand, and logical handlers the evaluated left operand and
+# the unevaluated right expression.
+
+def greater(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left > right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left > right
+
+def greaterEqual(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left >= right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left >= right
+
+def less(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left < right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left < right
+
+def lessEqual(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left <= right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left <= right
+
+def notEqual(interpreter, operator, left, right):
+  return not interpreter.isEqual(left, right)
+
+def equal(interpreter, operator, left, right):
+  return interpreter.isEqual(left, right)
+
+def subtract(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left - right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left - right
+
+def add(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left + right
+  return interpreter.plus(operator, left, right)
+
+def divide(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left / right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left / right
+
+def multiply(interpreter, operator, left, right):
+  if (type(left) is float and type(right) is float):
+    return left * right
+  left, right = interpreter.numberOperands(operator, left, right)
+  return left * right
+
+def negate(interpreter, operator, right):
+  interpreter.checkNumberOperand(operator, right)
+  return -right
+
+def bang(interpreter, operator, right):
+  return right == None or right is False
+
+def logicalOr(interpreter, left, right):
+  if (left != None and left is not False):
+    return left
+  return interpreter.evaluate(right)
+
+def logicalAnd(interpreter, left, right):
+  if (left == None or left is False):
+    return left
+  return interpreter.evaluate(right)
+
+BINARY = {
+  TokenType.GREATER: greater,
+  TokenType.GREATER_EQUAL: greaterEqual,
+  TokenType.LESS: less,
+  TokenType.LESS_EQUAL: lessEqual,
+  TokenType.BANG_EQUAL: notEqual,
+  TokenType.EQUAL_EQUAL: equal,
+  TokenType.MINUS: subtract,
+  TokenType.PLUS: add,
+  TokenType.SLASH: divide,
+  TokenType.STAR: multiply,
+}
+
+UNARY = {
+  TokenType.MINUS: negate,
+  TokenType.BANG: bang,
+}
+
+LOGICAL = {
+  TokenType.OR: logicalOr,
+  TokenType.AND: logicalAnd,
+}
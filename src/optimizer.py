@@ -0,0 +1,361 @@
+import expressions
+from interpreter import Interpreter
+import operators
+import statements
+from tokenType import TokenType
+
+# Marks a binding in the Optimizer's scopes whose value isn't a known constant.
+UNKNOWN = object()
+
+# First pass: binds every assignment to the declaration it writes, the same
+# way the Resolver will, and collects the declarations that are ever written
+# after their initializer. Top-level names are tracked by lexeme.
+class AssignmentAnalysis(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self):
+    self.scopes = []
+    self.assigned = set()
+    self.assignedGlobals = set()
+    self.globalDeclarations = {}
+
+  def analyze(self, statements):
+    self.analyzeStatements(statements)
+
+  def analyzeStatements(self, statements):
+    for statement in statements:
+      statement.accept(self)
+
+  def declare(self, key, lexeme):
+    if (len(self.scopes) == 0):
+      self.globalDeclarations[lexeme] = self.globalDeclarations.get(lexeme, 0) + 1
+      return
+
+    scope = self.scopes[-1]
+    if (lexeme in scope):
+      # A redeclaration shares the slot of the first one, so both change.
+      self.assigned.add(scope[lexeme])
+      self.assigned.add(key)
+    scope[lexeme] = key
+
+  def function(self, stmt):
+    self.scopes.append({})
+    for param in stmt.params:
+      self.declare(param, param.lexeme)
+    self.analyzeStatements(stmt.body)
+    self.scopes.pop()
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    self.scopes.append({})
+    self.analyzeStatements(stmt.statements)
+    self.scopes.pop()
+
+  def visitVarStmt(self, stmt: statements.Var):
+    if (len(self.scopes) == 0):
+      if (stmt.initializer != None):
+        stmt.initializer.accept(self)
+      self.declare(stmt, stmt.name.lexeme)
+      return
+
+    # Locals are in scope inside their own initializer, as in the Resolver.
+    self.declare(stmt, stmt.name.lexeme)
+    if (stmt.initializer != None):
+      stmt.initializer.accept(self)
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.declare(stmt, stmt.name.lexeme)
+    self.function(stmt)
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.declare(stmt, stmt.name.lexeme)
+    if (stmt.superclass != None):
+      stmt.superclass.accept(self)
+    for method in stmt.methods:
+      self.function(method)
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    stmt.expression.accept(self)
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    stmt.expression.accept(self)
+
+  def visitIfStmt(self, stmt: statements.If):
+    stmt.condition.accept(self)
+    stmt.thenBranch.accept(self)
+    if (stmt.elseBranch != None):
+      stmt.elseBranch.accept(self)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    stmt.condition.accept(self)
+    stmt.body.accept(self)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    if (stmt.value != None):
+      stmt.value.accept(self)
+
+  def visitAssignExpr(self, expr: expressions.Assign):
+    expr.value.accept(self)
+
+    for scope in reversed(self.scopes):
+      if (expr.name.lexeme in scope):
+        self.assigned.add(scope[expr.name.lexeme])
+        return
+
+    self.assignedGlobals.add(expr.name.lexeme)
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    expr.left.accept(self)
+    expr.right.accept(self)
+
+  def visitCallExpr(self, expr: expressions.Call):
+    expr.callee.accept(self)
+    for argument in expr.arguments:
+      argument.accept(self)
+
+  def visitGetExpr(self, expr: expressions.Get):
+    expr.obj.accept(self)
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    expr.expression.accept(self)
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    pass
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    expr.left.accept(self)
+    expr.right.accept(self)
+
+  def visitSetExpr(self, expr: expressions.Set):
+    expr.value.accept(self)
+    expr.obj.accept(self)
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    pass
+
+  def visitThisExpr(self, expr: expressions.This):
+    pass
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    expr.right.accept(self)
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    pass
+
+# Runs between parsing and resolving. Folds operators whose operands are
+# literals, drops groupings, prunes branches and loops with literal
+# conditions, and replaces reads of never-reassigned variables that hold a
+# literal with the literal itself. Expression visitors return the new
+# expression; statement visitors return the new statement, or None when the
+# statement is removed.
+class Optimizer(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self, stringNumbers=False):
+    # With --string-numbers, arithmetic on literals depends on the runtime
+    # coercions, so only logical and '!' operators are folded.
+    self.stringNumbers = stringNumbers
+    self.evaluator = Interpreter(stringNumbers)
+    self.analysis = AssignmentAnalysis()
+    self.scopes = []
+    self.globalConstants = {}
+
+  def optimize(self, statements):
+    self.analysis.analyze(statements)
+    return self.optimizeStatements(statements)
+
+  def optimizeStatements(self, statements):
+    optimized = []
+
+    for statement in statements:
+      statement = statement.accept(self)
+      if (statement != None):
+        optimized.append(statement)
+
+    return optimized
+
+  def optimizeBranch(self, stmt):
+    optimized = stmt.accept(self)
+    if (optimized == None):
+      return statements.Block([])
+
+    return optimized
+
+  def isConstant(self, expr):
+    return isinstance(expr, expressions.Literal)
+
+  def isTruthy(self, value):
+    return value != None and value is not False
+
+  def declare(self, lexeme, value):
+    if (len(self.scopes) != 0):
+      self.scopes[-1][lexeme] = value
+
+  def function(self, stmt):
+    self.scopes.append({})
+    for param in stmt.params:
+      self.declare(param.lexeme, UNKNOWN)
+    stmt.body = self.optimizeStatements(stmt.body)
+    self.scopes.pop()
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    self.scopes.append({})
+    stmt.statements = self.optimizeStatements(stmt.statements)
+    self.scopes.pop()
+    return stmt
+
+  def visitVarStmt(self, stmt: statements.Var):
+    lexeme = stmt.name.lexeme
+
+    if (len(self.scopes) == 0):
+      if (stmt.initializer != None):
+        stmt.initializer = stmt.initializer.accept(self)
+
+      if (self.analysis.globalDeclarations[lexeme] == 1 and lexeme not in self.analysis.assignedGlobals):
+        if (stmt.initializer == None):
+          self.globalConstants[lexeme] = None
+        elif (self.isConstant(stmt.initializer)):
+          self.globalConstants[lexeme] = stmt.initializer.value
+      return stmt
+
+    self.declare(lexeme, UNKNOWN)
+
+    if (stmt.initializer != None):
+      stmt.initializer = stmt.initializer.accept(self)
+
+    if (stmt not in self.analysis.assigned):
+      if (stmt.initializer == None):
+        self.declare(lexeme, None)
+      elif (self.isConstant(stmt.initializer)):
+        self.declare(lexeme, stmt.initializer.value)
+
+    return stmt
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.declare(stmt.name.lexeme, UNKNOWN)
+    self.function(stmt)
+    return stmt
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.declare(stmt.name.lexeme, UNKNOWN)
+    for method in stmt.methods:
+      self.function(method)
+    return stmt
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    stmt.expression = stmt.expression.accept(self)
+    return stmt
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    stmt.expression = stmt.expression.accept(self)
+    return stmt
+
+  def visitIfStmt(self, stmt: statements.If):
+    stmt.condition = stmt.condition.accept(self)
+
+    if (self.isConstant(stmt.condition)):
+      # Branches are statements, never bare declarations, so hoisting one
+      # into the enclosing scope can't change what any name refers to.
+      if (self.isTruthy(stmt.condition.value)):
+        return stmt.thenBranch.accept(self)
+      if (stmt.elseBranch != None):
+        return stmt.elseBranch.accept(self)
+      return None
+
+    stmt.thenBranch = self.optimizeBranch(stmt.thenBranch)
+    if (stmt.elseBranch != None):
+      stmt.elseBranch = self.optimizeBranch(stmt.elseBranch)
+    return stmt
+
+  def visitWhileStmt(self, stmt: statements.While):
+    stmt.condition = stmt.condition.accept(self)
+
+    if (self.isConstant(stmt.condition) and not self.isTruthy(stmt.condition.value)):
+      return None
+
+    stmt.body = self.optimizeBranch(stmt.body)
+    return stmt
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    if (stmt.value != None):
+      stmt.value = stmt.value.accept(self)
+    return stmt
+
+  def visitAssignExpr(self, expr: expressions.Assign):
+    expr.value = expr.value.accept(self)
+    return expr
+
+  def fold(self, handler, *operands):
+    try:
+      return expressions.Literal(handler(self.evaluator, None, *operands))
+    except Exception:
+      # Leave the error to be reported when the expression actually runs.
+      return None
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    expr.left = expr.left.accept(self)
+    expr.right = expr.right.accept(self)
+
+    if (not self.stringNumbers and self.isConstant(expr.left) and self.isConstant(expr.right)):
+      folded = self.fold(operators.BINARY[expr.operator.type], expr.left.value, expr.right.value)
+      if (folded != None):
+        return folded
+
+    return expr
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    expr.right = expr.right.accept(self)
+
+    if (self.isConstant(expr.right) and (not self.stringNumbers or expr.operator.type != TokenType.MINUS)):
+      folded = self.fold(operators.UNARY[expr.operator.type], expr.right.value)
+      if (folded != None):
+        return folded
+
+    return expr
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    expr.left = expr.left.accept(self)
+    expr.right = expr.right.accept(self)
+
+    if (self.isConstant(expr.left)):
+      isOr = expr.operator.type == TokenType.OR
+      if (self.isTruthy(expr.left.value) == isOr):
+        return expr.left
+      return expr.right
+
+    return expr
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    return expr.expression.accept(self)
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    return expr
+
+  def visitCallExpr(self, expr: expressions.Call):
+    expr.callee = expr.callee.accept(self)
+    expr.arguments = [argument.accept(self) for argument in expr.arguments]
+    return expr
+
+  def visitGetExpr(self, expr: expressions.Get):
+    expr.obj = expr.obj.accept(self)
+    return expr
+
+  def visitSetExpr(self, expr: expressions.Set):
+    expr.value = expr.value.accept(self)
+    expr.obj = expr.obj.accept(self)
+    return expr
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    return expr
+
+  def visitThisExpr(self, expr: expressions.This):
+    return expr
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    lexeme = expr.name.lexeme
+
+    for scope in reversed(self.scopes):
+      if (lexeme in scope):
+        if (scope[lexeme] is UNKNOWN):
+          return expr
+        return expressions.Literal(scope[lexeme])
+
+    if (lexeme in self.globalConstants):
+      return expressions.Literal(self.globalConstants[lexeme])
+
+    return expr
@@ -240,11 +240,13 @@ class ParserC:
       return self.whileStatement()
     
     if (self.match([TokenType.LEFT_BRACE])):
-      return statements.Block(self.block())
+      line = self.previous().line
+      return statements.Block(self.block(), line)
 
     return self.expressionStatement()
 
   def forStatement(self):
+    line = self.previous().line
     self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
 
     initializer = None
@@ -262,6 +264,7 @@ class ParserC:
     self.consume(TokenType.SEMICOLON, "Expect ';' after loop condition.")
 
     increment = None
+    incrementLine = self.peek().line
     if (not self.check(TokenType.RIGHT_PAREN)):    
       increment = self.expression()
 
@@ -269,19 +272,20 @@ class ParserC:
     body = self.statement()
 
     if (increment != None):
-      body = statements.Block([body, statements.Expression(increment)])
+      body = statements.Block([body, statements.Expression(increment, incrementLine)], line)
 
     if (condition == None):
       condition = expressions.Literal(True)
 
-    body = statements.While(condition, body)
+    body = statements.While(condition, body, line)
 
     if (initializer != None):
-      body = statements.Block([initializer, body])
+      body = statements.Block([initializer, body], line)
 
     return body
 
   def ifStatement(self):
+    line = self.previous().line
     self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
     condition = self.expression()
     self.consume(TokenType.RIGHT_PAREN, "Expect ')' after if condition.")
@@ -292,13 +296,14 @@ class ParserC:
     if (self.match([TokenType.ELSE])):
       elseBranch = self.statement()
 
-    return statements.If(condition, thenBranch, elseBranch)
+    return statements.If(condition, thenBranch, elseBranch, line)
 
   def printStatement(self):
+    line = self.previous().line
     value = self.expression()
     self.consume(TokenType.SEMICOLON, "Expect ';' after value.")
 
-    return statements.Print(value)
+    return statements.Print(value, line)
 
   def returnStatement(self):
     keyword = self.previous()
@@ -312,12 +317,13 @@ class ParserC:
     return statements.Return(keyword, value)
 
   def whileStatement(self):
+    line = self.previous().line
     self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
     condition = self.expression()
     self.consume(TokenType.RIGHT_PAREN, "Expect ')' after condition.")
     body = self.statement()
 
-    return statements.While(condition, body)
+    return statements.While(condition, body, line)
 
   def block(self):
     statements = []
@@ -340,11 +346,12 @@ class ParserC:
     return statements.Var(name, initializer)
 
   def expressionStatement(self):
+    line = self.peek().line
     expr = self.expression()
 
     self.consume(TokenType.SEMICOLON, "Expect ';' after expression.")
 
-    return statements.Expression(expr)
+    return statements.Expression(expr, line)
 
   def function(self, kind):
     name = self.consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
@@ -0,0 +1,155 @@
+import expressions
+from parserC import ParserC
+from tokenType import TokenType
+
+# Binding powers, lowest first, matching ParserC's assignment -> orOp -> andOp
+# -> equality -> comparison -> term -> factor -> unary -> call chain.
+ASSIGNMENT = 1
+OR = 2
+AND = 3
+EQUALITY = 4
+COMPARISON = 5
+TERM = 6
+FACTOR = 7
+UNARY = 8
+CALL = 9
+
+def literal(parser, token):
+  return expressions.Literal(token.literal)
+
+def falseLiteral(parser, token):
+  return expressions.Literal(False)
+
+def trueLiteral(parser, token):
+  return expressions.Literal(True)
+
+def nilLiteral(parser, token):
+  return expressions.Literal(None)
+
+def variable(parser, token):
+  return expressions.Variable(token)
+
+def this(parser, token):
+  return expressions.This(token)
+
+def superAccess(parser, token):
+  parser.consume(TokenType.DOT, "Expect '.' after 'super'.")
+  method = parser.consume(TokenType.IDENTIFIER, "Expect superclass method name.")
+  return expressions.Super(token, method)
+
+def grouping(parser, token):
+  expr = parser.expression()
+  parser.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression")
+  return expressions.Grouping(expr)
+
+def unary(parser, token):
+  return expressions.Unary(token, parser.parsePrecedence(UNARY))
+
+def binary(parser, left, token, precedence):
+  return expressions.Binary(left, token, parser.parsePrecedence(precedence + 1))
+
+def logical(parser, left, token, precedence):
+  return expressions.Logical(left, token, parser.parsePrecedence(precedence + 1))
+
+def assignment(parser, left, token, precedence):
+  value = parser.parsePrecedence(ASSIGNMENT)
+
+  if (isinstance(left, expressions.Variable)):
+    return expressions.Assign(left.name, value)
+  elif (isinstance(left, expressions.Get)):
+    return expressions.Set(left.obj, left.name, value)
+
+  parser.error(token, "Invalid assignment target.")
+
+def call(parser, left, token, precedence):
+  return parser.finishCall(left)
+
+def get(parser, left, token, precedence):
+  name = parser.consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
+  return expressions.Get(left, name)
+
+# Parselets for tokens that can start an expression.
+PREFIX = {
+  TokenType.NUMBER: literal,
+  TokenType.STRING: literal,
+  TokenType.FALSE: falseLiteral,
+  TokenType.TRUE: trueLiteral,
+  TokenType.NIL: nilLiteral,
+  TokenType.IDENTIFIER: variable,
+  TokenType.THIS: this,
+  TokenType.SUPER: superAccess,
+  TokenType.LEFT_PAREN: grouping,
+  TokenType.BANG: unary,
+  TokenType.MINUS: unary,
+}
+
+# Binding power and parselet for tokens that continue an expression.
+INFIX = {
+  TokenType.EQUAL: (ASSIGNMENT, assignment),
+  TokenType.OR: (OR, logical),
+  TokenType.AND: (AND, logical),
+  TokenType.BANG_EQUAL: (EQUALITY, binary),
+  TokenType.EQUAL_EQUAL: (EQUALITY, binary),
+  TokenType.GREATER: (COMPARISON, binary),
+  TokenType.GREATER_EQUAL: (COMPARISON, binary),
+  TokenType.LESS: (COMPARISON, binary),
+  TokenType.LESS_EQUAL: (COMPARISON, binary),
+  TokenType.MINUS: (TERM, binary),
+  TokenType.PLUS: (TERM, binary),
+  TokenType.SLASH: (FACTOR, binary),
+  TokenType.STAR: (FACTOR, binary),
+  TokenType.LEFT_PAREN: (CALL, call),
+  TokenType.DOT: (CALL, get),
+}
+
+# Parses expressions by precedence climbing over the PREFIX and INFIX tables,
+# one loop per operand instead of a call per precedence level, and builds the
+# same tree as ParserC. Statements are still parsed by ParserC. Reads the
+# token list directly, so it needs a list rather than a StreamingParser's
+# token iterator.
+class PrattParser(ParserC):
+  def expression(self):
+    return self.parsePrecedence(ASSIGNMENT)
+
+  # Parses an expression whose infix operators all bind at least as tightly
+  # as precedence.
+  def parsePrecedence(self, precedence):
+    tokens = self.tokens
+    token = tokens[self.current]
+    prefix = PREFIX.get(token.type)
+
+    if (prefix == None):
+      raise self.error(token, "Expected expression.")
+
+    self.current += 1
+    left = prefix(self, token)
+
+    while True:
+      token = tokens[self.current]
+      rule = INFIX.get(token.type)
+
+      if (rule == None or rule[0] < precedence):
+        return left
+
+      self.current += 1
+      if (rule[1] is binary):
+        left = expressions.Binary(left, token, self.parsePrecedence(rule[0] + 1))
+      else:
+        left = rule[1](self, left, token, rule[0])
+
+  def finishCall(self, callee):
+    tokens = self.tokens
+    arguments = []
+
+    if (tokens[self.current].type != TokenType.RIGHT_PAREN):
+      arguments.append(self.parsePrecedence(ASSIGNMENT))
+      while (tokens[self.current].type == TokenType.COMMA):
+        self.current += 1
+        if (len(arguments) >= 255):
+          self.error(self.peek(), "Can't have more than 255 arguments.")
+
+        arguments.append(self.parsePrecedence(ASSIGNMENT))
+
+    paren = self.consume(TokenType.RIGHT_PAREN, "Expect ')' after arguments.")
+
+    return expressions.Call(callee, paren, arguments)
@@ -0,0 +1,98 @@
+from collections import defaultdict
+import json
+import time
+
+import statements
+
+# How many of the most executed lines the report prints; the JSON file has all.
+REPORT_LINES = 20
+
+# Records where a run spends its time, deterministically: every call of a Lox
+# function, class or native is counted and timed, and every statement executed
+# counts as a hit on its source line. Lox functions are keyed by declaration,
+# so all closures made from one are added up; classes and natives by name.
+# Inclusive time counts only the outermost of a function's recursive calls,
+# self time leaves out the calls it made.
+class Profiler:
+  def __init__(self, clock=time.perf_counter):
+    self.clock = clock
+    self.start = clock()
+    # key -> [calls, inclusive time, self time, calls running]
+    self.functions = {}
+    # line -> statements run
+    self.lines = defaultdict(int)
+    self.owners = {}
+    # [record, start, time spent in callees] for each call running.
+    self.stack = []
+
+  def enter(self, key):
+    record = self.functions.get(key)
+    if (record == None):
+      record = self.functions[key] = [0, 0.0, 0.0, 0]
+
+    record[3] += 1
+    self.stack.append([record, self.clock(), 0.0])
+
+  def exit(self):
+    end = self.clock()
+    stack = self.stack
+    record, start, callees = stack.pop()
+    elapsed = end - start
+
+    record[0] += 1
+    record[2] += elapsed - callees
+    record[3] -= 1
+    if (record[3] == 0):
+      record[1] += elapsed
+
+    if (stack):
+      stack[-1][2] += elapsed
+
+  # Methods are reported as Class.method.
+  def setOwner(self, method, className):
+    self.owners[method] = className
+
+  def functionRows(self):
+    rows = []
+
+    for key, (calls, inclusive, own, running) in self.functions.items():
+      if (isinstance(key, statements.Function)):
+        name = key.name.lexeme
+        if (key in self.owners):
+          name = f"{self.owners[key]}.{name}"
+        rows.append({"name": name, "line": key.name.line, "calls": calls, "inclusive": inclusive, "self": own})
+      else:
+        rows.append({"name": key, "line": None, "calls": calls, "inclusive": inclusive, "self": own})
+
+    rows.sort(key=lambda row: row["self"], reverse=True)
+    return rows
+
+  def lineRows(self):
+    rows = [{"line": line, "hits": hits} for line, hits in self.lines.items() if line != None]
+    rows.sort(key=lambda row: (-row["hits"], row["line"]))
+    return rows
+
+  def report(self, file):
+    total = self.clock() - self.start
+
+    print(f"profile: {total:.3f} s", file=file)
+    print(f"{'calls':>10} {'inclusive s':>12} {'self s':>10}  function", file=file)
+    for row in self.functionRows():
+      name = row["name"]
+      if (row["line"] != None):
+        name += f" (line {row['line']})"
+      print(f"{row['calls']:>10} {row['inclusive']:>12.4f} {row['self']:>10.4f}  {name}", file=file)
+
+    print(f"{'line':>10} {'hits':>12}", file=file)
+    for row in self.lineRows()[:REPORT_LINES]:
+      print(f"{row['line']:>10} {row['hits']:>12}", file=file)
+
+  def writeJson(self, path):
+    profile = {
+      "total": self.clock() - self.start,
+      "functions": self.functionRows(),
+      "lines": self.lineRows(),
+    }
+
+    with open(path, "w") as file:
+      json.dump(profile, file, indent=2)
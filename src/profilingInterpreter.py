@@ -0,0 +1,83 @@
+from completion import RETURN
+from interpreter import Interpreter
+from loxCallable import LoxCallable
+from loxClass import LoxClass
+from loxFunction import LoxFunction
+import statements
+
+# The tree-walking interpreter with a Profiler attached: Lox function bodies
+# are timed in executeFunction, classes and natives in callValue, and each
+# statement but a block counts a hit on its line. Interpreter itself is left
+# untouched, so runs without --profile pay nothing for it.
+class ProfilingInterpreter(Interpreter):
+  def __init__(self, profiler, stringNumbers=False, memoizer=None):
+    super().__init__(stringNumbers, memoizer)
+    self.profiler = profiler
+    self.lines = profiler.lines
+
+  # Interpreter.executeFunction with the timing folded in, which saves a call
+  # per Lox call over wrapping it.
+  def executeFunction(self, function, frame):
+    profiler = self.profiler
+    profiler.enter(function.declaration)
+    previous = self.frame
+
+    try:
+      self.frame = frame
+      for statement in function.declaration.body:
+        if (statement.accept(self) is RETURN):
+          return RETURN
+    finally:
+      self.frame = previous
+      profiler.exit()
+
+  # Lox functions called here are timed once they run their body; a call
+  # answered from a memo cache doesn't run it and isn't counted.
+  def callValue(self, function, arguments):
+    if (type(function) is LoxFunction or not isinstance(function, LoxCallable)):
+      return Interpreter.callValue(self, function, arguments)
+
+    profiler = self.profiler
+    if (type(function) is LoxClass):
+      profiler.enter(f"{function.name} (class)")
+    else:
+      profiler.enter(f"{type(function).__name__} (native)")
+
+    try:
+      return Interpreter.callValue(self, function, arguments)
+    finally:
+      profiler.exit()
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitExpressionStmt(self, stmt)
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitPrintStmt(self, stmt)
+
+  def visitVarStmt(self, stmt: statements.Var):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitVarStmt(self, stmt)
+
+  def visitIfStmt(self, stmt: statements.If):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitIfStmt(self, stmt)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitWhileStmt(self, stmt)
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitFunctionStmt(self, stmt)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    self.lines[stmt.line] += 1
+    return Interpreter.visitReturnStmt(self, stmt)
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.lines[stmt.line] += 1
+    for method in stmt.methods:
+      self.profiler.setOwner(method, stmt.name.lexeme)
+    return Interpreter.visitClassStmt(self, stmt)
@@ -0,0 +1,165 @@
+import expressions
+import statements
+
+# What PurityAnalysis found in one function body: whether it does anything
+# but compute from its own parameters and locals, and which global functions
+# it calls.
+class FunctionSummary:
+  def __init__(self, impure):
+    self.impure = impure
+    self.calls = set()
+
+# Runs after the Resolver over a whole script and sets pure on every function
+# whose result depends only on its arguments: it reads and writes only its own
+# locals (no globals, captured variables, fields, 'this' or 'super'), doesn't
+# print, declare functions or classes, and only calls global functions that
+# are pure too. Those globals must be declared once, by a top-level 'fun',
+# and never assigned, so a call by name always reaches the same function.
+# Natives such as clock aren't declared in Lox and so are never pure.
+class PurityAnalysis(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self):
+    self.summaries = {}
+    self.current = None
+    self.globalFunctions = {}
+    self.unstableGlobals = set()
+
+  def analyze(self, program):
+    for statement in program:
+      if (isinstance(statement, statements.Function)):
+        if (statement.name.lexeme in self.globalFunctions):
+          self.unstableGlobals.add(statement.name.lexeme)
+        self.globalFunctions[statement.name.lexeme] = statement
+      elif (isinstance(statement, (statements.Var, statements.Class))):
+        self.unstableGlobals.add(statement.name.lexeme)
+
+    for statement in program:
+      statement.accept(self)
+
+    pure = set(declaration for declaration, summary in self.summaries.items() if not summary.impure)
+    changed = True
+
+    while changed:
+      changed = False
+      for declaration in list(pure):
+        if (not all(self.isPureGlobal(name, pure) for name in self.summaries[declaration].calls)):
+          pure.remove(declaration)
+          changed = True
+
+    for declaration in pure:
+      declaration.pure = True
+
+  def isPureGlobal(self, name, pure):
+    return name not in self.unstableGlobals and self.globalFunctions.get(name) in pure
+
+  def impure(self):
+    if (self.current != None):
+      self.current.impure = True
+
+  def function(self, stmt: statements.Function, isMethod):
+    enclosing = self.current
+    self.current = FunctionSummary(isMethod)
+    self.summaries[stmt] = self.current
+
+    for statement in stmt.body:
+      statement.accept(self)
+
+    self.current = enclosing
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.impure()
+    self.function(stmt, False)
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.impure()
+    if (stmt.superclass != None):
+      stmt.superclass.accept(self)
+    for method in stmt.methods:
+      self.function(method, True)
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    for statement in stmt.statements:
+      statement.accept(self)
+
+  def visitVarStmt(self, stmt: statements.Var):
+    if (stmt.initializer != None):
+      stmt.initializer.accept(self)
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    stmt.expression.accept(self)
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    self.impure()
+    stmt.expression.accept(self)
+
+  def visitIfStmt(self, stmt: statements.If):
+    stmt.condition.accept(self)
+    stmt.thenBranch.accept(self)
+    if (stmt.elseBranch != None):
+      stmt.elseBranch.accept(self)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    stmt.condition.accept(self)
+    stmt.body.accept(self)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    if (stmt.value != None):
+      stmt.value.accept(self)
+
+  # Globals and captured variables can change between calls. A function's own
+  # locals are never in cells unless it declares a function, which is impure.
+  def visitAssignExpr(self, expr: expressions.Assign):
+    if (expr.depth == None):
+      self.unstableGlobals.add(expr.name.lexeme)
+    if (expr.depth == None or expr.cell):
+      self.impure()
+    expr.value.accept(self)
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    if (expr.depth == None or expr.cell):
+      self.impure()
+
+  def visitCallExpr(self, expr: expressions.Call):
+    callee = expr.callee
+
+    if (type(callee) is expressions.Variable and callee.depth == None):
+      if (self.current != None):
+        self.current.calls.add(callee.name.lexeme)
+    else:
+      # Calls through locals, parameters and properties can reach anything.
+      self.impure()
+      callee.accept(self)
+
+    for argument in expr.arguments:
+      argument.accept(self)
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    expr.left.accept(self)
+    expr.right.accept(self)
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    expr.left.accept(self)
+    expr.right.accept(self)
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    expr.right.accept(self)
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    expr.expression.accept(self)
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    pass
+
+  def visitGetExpr(self, expr: expressions.Get):
+    self.impure()
+    expr.obj.accept(self)
+
+  def visitSetExpr(self, expr: expressions.Set):
+    self.impure()
+    expr.obj.accept(self)
+    expr.value.accept(self)
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    self.impure()
+
+  def visitThisExpr(self, expr: expressions.This):
+    self.impure()
@@ -0,0 +1,167 @@
+from interpreter import Interpreter
+from loxCallable import LoxCallable
+from loxClass import LoxClass
+from loxInstance import LoxInstance
+from tailCall import TailCall
+from transpiledFunction import TranspiledFunction, finish
+from transpiler import Transpiler
+
+class PythonInterpreter(Interpreter):
+  def transpile(self, statements):
+    return Transpiler(self.stringNumbers).transpile(statements)
+
+  def interpret(self, statements):
+    source = self.transpile(statements)
+    namespace = self.runtime()
+    exec(compile(source, "<lox>", "exec"), namespace)
+
+    try:
+      namespace["lox_main"]()
+    except:
+      raise RuntimeError("error")
+
+  def runtime(self):
+    interpreter = self
+
+    def call(callee, *arguments):
+      if (callee.__class__ is TranspiledFunction):
+        if (len(arguments) != callee.arityCount):
+          raise RuntimeError(f"Expected {callee.arityCount} arguments but got {len(arguments)}.")
+        result = callee.function(*arguments)
+        if (result.__class__ is TailCall):
+          return finish(result)
+        return result
+
+      if (isinstance(callee, LoxClass)):
+        instance = LoxInstance(callee)
+        initializer = callee.initializer
+        if (initializer != None):
+          if (len(arguments) != initializer.arityCount):
+            raise RuntimeError(f"Expected {initializer.arityCount} arguments but got {len(arguments)}.")
+          initializer.method(instance, *arguments)
+        elif (len(arguments) != 0):
+          raise RuntimeError(f"Expected 0 arguments but got {len(arguments)}.")
+        return instance
+
+      if (not isinstance(callee, LoxCallable)):
+        raise RuntimeError("Can only call functions and classes.")
+
+      if (len(arguments) != callee.arity()):
+        raise RuntimeError(f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+
+      return callee.call(interpreter, list(arguments))
+
+    def invoke(receiver, name, *arguments):
+      if (receiver.__class__ is LoxInstance and name not in receiver.shape.indexes):
+        method = receiver.klass.methodTable.get(name)
+        if (method != None):
+          if (len(arguments) != method.arityCount):
+            raise RuntimeError(f"Expected {method.arityCount} arguments but got {len(arguments)}.")
+          result = method.method(receiver, *arguments)
+          if (result.__class__ is TailCall):
+            return finish(result)
+          return result
+
+      return call(get(receiver, name), *arguments)
+
+    def tail(callee, *arguments):
+      if (callee.__class__ is TranspiledFunction):
+        if (len(arguments) != callee.arityCount):
+          raise RuntimeError(f"Expected {callee.arityCount} arguments but got {len(arguments)}.")
+        return TailCall(callee.function, None, arguments)
+
+      return call(callee, *arguments)
+
+    def tailInvoke(receiver, name, *arguments):
+      if (receiver.__class__ is LoxInstance and name not in receiver.shape.indexes):
+        method = receiver.klass.methodTable.get(name)
+        if (method != None):
+          if (len(arguments) != method.arityCount):
+            raise RuntimeError(f"Expected {method.arityCount} arguments but got {len(arguments)}.")
+          return TailCall(method.method, None, (receiver,) + arguments)
+
+      return tail(get(receiver, name), *arguments)
+
+    def get(instance, name):
+      if (isinstance(instance, LoxInstance)):
+        index = instance.shape.indexes.get(name)
+        if (index != None):
+          return instance.values[index]
+
+        method = instance.klass.methodTable.get(name)
+        if (method != None):
+          return method.bind(instance)
+
+        raise RuntimeError(f"Undefined property {name}.")
+
+      raise RuntimeError("Only instances have properties.")
+
+    def set(instance, name, value):
+      if (not isinstance(instance, LoxInstance)):
+        raise RuntimeError("Only instances have fields.")
+
+      instance.setField(name, value)
+      return value
+
+    def superMethod(superclass, instance, name):
+      method = superclass.findMethod(name)
+      if (method == None):
+        raise RuntimeError(f"Undefined property {name}.")
+
+      return method.bind(instance)
+
+    def superclass(value):
+      if (not isinstance(value, LoxClass)):
+        raise RuntimeError("Superclass must be a class.")
+
+      return value
+
+    def method(name, function, arity, isInitializer):
+      return TranspiledFunction(name, None, arity, isInitializer, function)
+
+    def assignGlobal(namespace, name, value):
+      if (name not in namespace):
+        raise RuntimeError(f"Undefined variable {name[len('g_'):]}.")
+      namespace[name] = value
+      return value
+
+    def store(box, value):
+      box[0] = value
+      return value
+
+    def negate(value):
+      interpreter.checkNumberOperand(None, value)
+      return -value
+
+    def numberOperation(apply):
+      def operation(left, right):
+        left, right = interpreter.numberOperands(None, left, right)
+        return apply(left, right)
+      return operation
+
+    return {
+      "_call": call,
+      "_invoke": invoke,
+      "_tail": tail,
+      "_tail_invoke": tailInvoke,
+      "_get": get,
+      "_set": set,
+      "_super": superMethod,
+      "_superclass": superclass,
+      "_method": method,
+      "_store": store,
+      "_assign_global": assignGlobal,
+      "_negate": negate,
+      "_add": lambda left, right: interpreter.plus(None, left, right),
+      "_sub": numberOperation(lambda left, right: left - right),
+      "_mul": numberOperation(lambda left, right: left * right),
+      "_div": numberOperation(lambda left, right: left / right),
+      "_gt": numberOperation(lambda left, right: left > right),
+      "_ge": numberOperation(lambda left, right: left >= right),
+      "_lt": numberOperation(lambda left, right: left < right),
+      "_le": numberOperation(lambda left, right: left <= right),
+      "_print": lambda value: print(interpreter.stringify(value)),
+      "_LoxClass": LoxClass,
+      "_TranspiledFunction": TranspiledFunction,
+      "g_clock": self.globals.valueOf("clock"),
+    }
@@ -0,0 +1,116 @@
+import gc
+import re
+
+from scanner import KEYWORDS, Scanner
+from tokenC import TokenC
+from tokenType import TokenType
+
+# One lexeme per match, with blanks and comments folded into the match before
+# it. '.' takes any other single character, which is either an error or
+# something Scanner handles differently (Unicode letters and digits), so the
+# whole source is then handed to Scanner. The empty match at the end stops the
+# regex from backtracking into a trailing comment or blank to find a lexeme.
+LEXEME = re.compile(r"""
+  (?:[ \t\r]+|//[^\n]*)*
+  (
+    [A-Za-z][A-Za-z0-9]*
+    |[0-9]+(?:\.[0-9]+)?
+    |"[^"]*"
+    |[!=<>]=?
+    |.
+    |\Z
+  )
+""", re.VERBOSE | re.DOTALL)
+
+FIXED = {
+  "(": TokenType.LEFT_PAREN,
+  ")": TokenType.RIGHT_PAREN,
+  "{": TokenType.LEFT_BRACE,
+  "}": TokenType.RIGHT_BRACE,
+  ",": TokenType.COMMA,
+  ".": TokenType.DOT,
+  "-": TokenType.MINUS,
+  "+": TokenType.PLUS,
+  ";": TokenType.SEMICOLON,
+  "*": TokenType.STAR,
+  "/": TokenType.SLASH,
+  "!": TokenType.BANG,
+  "!=": TokenType.BANG_EQUAL,
+  "=": TokenType.EQUAL,
+  "==": TokenType.EQUAL_EQUAL,
+  "<": TokenType.LESS,
+  "<=": TokenType.LESS_EQUAL,
+  ">": TokenType.GREATER,
+  ">=": TokenType.GREATER_EQUAL,
+  **KEYWORDS,
+}
+
+# Lexemes not in FIXED are classified by their first character.
+NEWLINE = 1
+IDENTIFIER = 2
+NUMBER = 3
+STRING = 4
+
+CHARACTER_CLASSES = {"\n": NEWLINE, '"': STRING}
+for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz":
+  CHARACTER_CLASSES[c] = IDENTIFIER
+for c in "0123456789":
+  CHARACTER_CLASSES[c] = NUMBER
+
+# Produces the same tokens as Scanner. The regex splits the whole source into
+# lexemes in one call and the loop only builds tokens, instead of a method
+# call and a substring per character.
+class RegexScanner:
+  def __init__(self, source: str):
+    self.source = source
+    self.tokens = []
+    self.line = 1
+
+  # Tokens never form reference cycles, so the cyclic collector is paused
+  # while millions of them are allocated instead of rescanning them each pass.
+  def scanTokens(self):
+    collecting = gc.isenabled()
+    gc.disable()
+
+    try:
+      return self.scanLexemes()
+    finally:
+      if (collecting):
+        gc.enable()
+
+  def scanLexemes(self):
+    tokens = self.tokens
+    append = tokens.append
+    fixed = FIXED.get
+    classify = CHARACTER_CLASSES.get
+    line = 1
+    lexemes = LEXEME.findall(self.source)
+
+    while (lexemes and lexemes[-1] == ""):
+      lexemes.pop()
+
+    for text in lexemes:
+      type = fixed(text)
+      if (type != None):
+        append(TokenC(type, text, "", line))
+        continue
+
+      kind = classify(text[0])
+      if (kind == NEWLINE):
+        line += 1
+      elif (kind == IDENTIFIER):
+        append(TokenC(TokenType.IDENTIFIER, text, "", line))
+      elif (kind == NUMBER):
+        append(TokenC(TokenType.NUMBER, text, float(text), line))
+      elif (kind == STRING and len(text) > 1):
+        line += text.count("\n")
+        append(TokenC(TokenType.STRING, text, text[1:-1], line))
+      else:
+        # An unterminated string, an unexpected character or non-ASCII code:
+        # Scanner gives the same tokens or raises the same error.
+        self.tokens = Scanner(self.source).scanTokens()
+        return self.tokens
+
+    self.line = line
+    append(TokenC(TokenType.EOF, "", "", line))
+    return tokens
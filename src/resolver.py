@@ -3,6 +3,7 @@ from enum import Enum
 from os import stat
 
 import expressions
+import operators
 import statements
 
 class FunctionType(Enum):
@@ -16,10 +17,40 @@ class ClassType(Enum):
   CLASS = 2
   SUBCLASS = 3
 
+# A local variable: its slot in the frame of the function (or top-level block)
+# declaring it, and whether an inner function captures it. Nodes using the
+# local are only told whether it lives in a cell once its scope ends.
+class Local:
+  def __init__(self, frame, slot):
+    self.frame = frame
+    self.slot = slot
+    self.defined = False
+    self.captured = False
+    self.readUndefined = False
+    self.uses = []
+
+# The slots of one call frame. A function body and every block nested in it
+# share its frame, each local with a slot of its own. Captured variables of
+# enclosing frames get a slot too, filled with their cell on each call.
+class Frame:
+  def __init__(self, enclosing):
+    self.enclosing = enclosing
+    self.slotCount = 0
+    self.upvalues = {}
+    self.upvalueSources = []
+    self.upvalueSlots = []
+
+  def newSlot(self):
+    self.slotCount += 1
+    return self.slotCount - 1
+
+# Every local gets a slot in its frame, stored on the AST nodes that use it,
+# and a cell flag when an inner function captures it; depth still counts the
+# scopes between a use and its declaration, and is None for globals.
 class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
-  def __init__(self, interpreter):
-    self.interpreter = interpreter
+  def __init__(self):
     self.scopes = deque()
+    self.frame = None
     self.currentFunction = FunctionType.NONE
     self.currentClass = ClassType.NONE
 
@@ -36,57 +67,119 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
   def resolveExpression(self, expressions):
     expressions.accept(self)
 
+  # A block at the top level gets a frame of its own; nested blocks use the
+  # frame of the function or block around them.
   def visitBlockStmt(self, stmt: statements.Block):
+    if (self.frame != None):
+      self.beginScope()
+      self.resolve(stmt.statements)
+      self.endScope()
+      return None
+
+    self.frame = Frame(None)
     self.beginScope()
     self.resolve(stmt.statements)
     self.endScope()
+    stmt.slotCount = self.frame.slotCount
+    self.frame = None
     return None
 
   def beginScope(self):
     self.scopes.append({})
 
   def endScope(self):
-    self.scopes.pop()
+    for local in self.scopes.pop().values():
+      for node, attribute in local.uses:
+        setattr(node, attribute, local.captured)
 
-  def declare(self, name):
+  def declare(self, name, node):
     if (len(self.scopes) == 0):
-      return
+      return None
     
     scope = self.scopes[-1]
 
     if (name.lexeme in scope):
       RuntimeError(f"{name} Already variable with this name in this scope.")
+    else:
+      scope[name.lexeme] = Local(self.frame, self.frame.newSlot())
 
-    scope[name.lexeme] = False
+    local = scope[name.lexeme]
+    local.defined = False
+    if (node != None):
+      local.uses.append((node, "cell"))
+    return local.slot
 
   def define(self, name):
     if (len(self.scopes) == 0):
       return
 
     scope = self.scopes[-1]
-    scope[name.lexeme] = True
+    scope[name.lexeme].defined = True
 
+  # A new local read in its own initializer is still nil there, so engines
+  # keeping locals in frame slots clear its slot first; one redeclared in the
+  # same scope shares the old slot and reads the old value.
   def visitVarStmt(self, stmt: statements.Var):
-    self.declare(stmt.name)
+    fresh = len(self.scopes) != 0 and stmt.name.lexeme not in self.scopes[-1]
+    stmt.slot = self.declare(stmt.name, stmt)
 
     if (stmt.initializer != None):
       self.resolveExpression(stmt.initializer)
+      stmt.readsItself = fresh and self.scopes[-1][stmt.name.lexeme].readUndefined
 
     self.define(stmt.name)
     return None
 
   def visitVariableExpr(self, expr: expressions.Variable):
-    if (len(self.scopes) != 0 and self.scopes[-1].get(expr.name.lexeme) == False):
+    local = None
+    if (len(self.scopes) != 0):
+      local = self.scopes[-1].get(expr.name.lexeme)
+    if (local != None and not local.defined):
       RuntimeError(f"{expr.name} Can't read local variable in its own initializer.")
+      local.readUndefined = True
 
     self.resolveLocal(expr, expr.name)
     return None
 
   def resolveLocal(self, expr, name):
-    for i, s in enumerate(reversed(self.scopes)):
-      if (name.lexeme in s):
-        self.interpreter.resolve(expr, i)
-        return 
+    self.resolveUse(expr, name.lexeme, "slot", "cell")
+
+  # Points expr at the local named lexeme, setting its depth and its slot and
+  # cell attributes; globals are left with depth None.
+  def resolveUse(self, expr, lexeme, slotAttribute, cellAttribute):
+    for i, scope in enumerate(reversed(self.scopes)):
+      local = scope.get(lexeme)
+      if (local == None):
+        continue
+
+      expr.depth = i
+      if (local.frame is self.frame):
+        setattr(expr, slotAttribute, local.slot)
+        local.uses.append((expr, cellAttribute))
+      else:
+        local.captured = True
+        setattr(expr, slotAttribute, self.upvalue(self.frame, local))
+        setattr(expr, cellAttribute, True)
+      return
+
+  # The slot of frame that holds the cell of a local from an enclosing frame.
+  # Frames in between get a slot for it too, so each closure is created from
+  # the cells in the frame around it.
+  def upvalue(self, frame, local):
+    slot = frame.upvalues.get(local)
+    if (slot != None):
+      return slot
+
+    if (frame.enclosing is local.frame):
+      source = local.slot
+    else:
+      source = self.upvalue(frame.enclosing, local)
+
+    slot = frame.newSlot()
+    frame.upvalues[local] = slot
+    frame.upvalueSources.append(source)
+    frame.upvalueSlots.append(slot)
+    return slot
 
   def visitAssignExpr(self, expr: expressions.Assign):
     self.resolveExpression(expr.value)
@@ -94,7 +187,7 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
     return None
 
   def visitFunctionStmt(self, stmt: statements.Function):
-    self.declare(stmt.name)
+    stmt.slot = self.declare(stmt.name, stmt)
     self.define(stmt.name)
 
     self.resolveFunction(stmt, FunctionType.FUNCTION)
@@ -103,15 +196,35 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
   def resolveFunction(self, function: statements.Function, type):
     enclosingFunction = self.currentFunction
     self.currentFunction = type
+    enclosingFrame = self.frame
+    self.frame = Frame(enclosingFrame)
     self.beginScope()
+    scope = self.scopes[-1]
+
+    parameters = []
+
+    # Methods keep 'this' in slot 0 of their own frame, ahead of the parameters.
+    if (type == FunctionType.METHOD or type == FunctionType.INITIALIZER):
+      scope["this"] = Local(self.frame, self.frame.newSlot())
+      scope["this"].defined = True
+      parameters.append(scope["this"])
 
     for param in function.params:
-      self.declare(param)
+      if (param.lexeme not in scope):
+        self.declare(param, None)
+        parameters.append(scope[param.lexeme])
       self.define(param)
 
     self.resolveStatements(function.body)
+
+    # Captured parameters (and 'this') are moved into cells on each call.
+    function.cellSlots = [local.slot for local in parameters if local.captured]
     self.endScope()
+    function.slotCount = self.frame.slotCount
+    function.upvalueSources = self.frame.upvalueSources
+    function.upvalueSlots = self.frame.upvalueSlots
 
+    self.frame = enclosingFrame
     self.currentFunction = enclosingFunction 
 
   def visitExpressionStmt(self, stmt: statements.Expression):
@@ -141,6 +254,11 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
     if (stmt.value != None):
       self.resolveExpression(stmt.value)
 
+    # 'return f(...)' from a function or method can reuse the caller's frame.
+    # Initializers always return 'this', so their calls are never in tail position.
+    if (isinstance(stmt.value, expressions.Call)):
+      stmt.tailCall = self.currentFunction == FunctionType.FUNCTION or self.currentFunction == FunctionType.METHOD
+
     return None
 
   def visitWhileStmt(self, stmt: statements.While):
@@ -152,6 +270,7 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
   def visitBinaryExpr(self, expr: expressions.Binary):
     self.resolveExpression(expr.left)
     self.resolveExpression(expr.right)
+    expr.handler = operators.BINARY[expr.operator.type]
 
     return None
 
@@ -174,11 +293,13 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
   def visitLogicalExpr(self, expr: expressions.Logical):
     self.resolveExpression(expr.left)
     self.resolveExpression(expr.right)
+    expr.handler = operators.LOGICAL[expr.operator.type]
     
     return None
 
   def visitUnaryExpr(self, expr: expressions.Unary):
     self.resolveExpression(expr.right)
+    expr.handler = operators.UNARY[expr.operator.type]
 
     return None
 
@@ -197,7 +318,8 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
     elif (self.currentClass != ClassType.SUBCLASS):
       raise RuntimeError(expr.keyword, "Can't use 'super' in a class with no superclass.")
     
-    self.resolveLocal(expr, expr.keyword)
+    self.resolveUse(expr, "super", "slot", "cell")
+    self.resolveUse(expr, "this", "thisSlot", "thisCell")
 
   def visitThisExpr(self, expr: expressions.This):
     if (self.currentClass == ClassType.NONE):
@@ -210,7 +332,7 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
     enclosingClass = self.currentClass
     self.currentClass = ClassType.CLASS
 
-    self.declare(stmt.name)
+    stmt.slot = self.declare(stmt.name, stmt)
     self.define(stmt.name)
 
     if (stmt.superclass != None and stmt.name.lexeme == stmt.superclass.name.lexeme):
@@ -220,12 +342,16 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
       self.currentClass = ClassType.SUBCLASS
       self.resolveExpression(stmt.superclass)
 
+    # 'super' is only used from the methods, so it always lives in a cell. A
+    # class at the top level gets a frame of its own for it.
+    enclosingFrame = self.frame
     if (stmt.superclass != None):
+      if (self.frame == None):
+        self.frame = Frame(None)
       self.beginScope()
-      self.scopes[-1]["super"] = True
-
-    self.beginScope()
-    self.scopes[-1]["this"] = True
+      stmt.superSlot = self.frame.newSlot()
+      self.scopes[-1]["super"] = Local(self.frame, stmt.superSlot)
+      self.scopes[-1]["super"].defined = True
 
     for method in stmt.methods:
       declaration = FunctionType.METHOD
@@ -233,10 +359,11 @@ class Resolver(expressions.ExprVisitor, statements.StmtVisitor):
         declaration = FunctionType.INITIALIZER
       self.resolveFunction(method, declaration)
 
-    self.endScope()
-
     if (stmt.superclass != None):
       self.endScope()
+      if (enclosingFrame == None):
+        stmt.slotCount = self.frame.slotCount
+      self.frame = enclosingFrame
 
     self.currentClass = enclosingClass
     return None
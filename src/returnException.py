@@ -1,9 +0,0 @@
-
-
-from runtimeError import RuntimeErrorC
-
-
-class ReturnException(RuntimeErrorC):
-  def __init__(self, value):
-    super().__init__(None, None)
-    self.value = value
\ No newline at end of file
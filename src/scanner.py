@@ -1,6 +1,25 @@
 from tokenC import *
 from tokenType import TokenType
 
+KEYWORDS = {
+  "and": TokenType.AND,
+  "class": TokenType.CLASS,
+  "else": TokenType.ELSE,
+  "false": TokenType.FALSE,
+  "for": TokenType.FOR,
+  "fun": TokenType.FUN,
+  "if": TokenType.IF,
+  "nil": TokenType.NIL,
+  "or": TokenType.OR,
+  "print": TokenType.PRINT,
+  "return": TokenType.RETURN,
+  "super": TokenType.SUPER,
+  "this": TokenType.THIS,
+  "true": TokenType.TRUE,
+  "var": TokenType.VAR,
+  "while": TokenType.WHILE
+}
+
 class Scanner:
   def __init__(self, source: str):
     self.source = source
@@ -8,24 +27,7 @@ class Scanner:
     self.start = 0
     self.current = 0
     self.line = 1
-    self.keywords = {
-      "and": TokenType.AND,
-      "class": TokenType.CLASS,
-      "else": TokenType.ELSE,
-      "false": TokenType.FALSE,
-      "for": TokenType.FOR,
-      "fun": TokenType.FUN,
-      "if": TokenType.IF,
-      "nil": TokenType.NIL,
-      "or": TokenType.OR,
-      "print": TokenType.PRINT,
-      "return": TokenType.RETURN,
-      "super": TokenType.SUPER,
-      "this": TokenType.THIS,
-      "true": TokenType.TRUE,
-      "var": TokenType.VAR,
-      "while": TokenType.WHILE
-    }
+    self.keywords = KEYWORDS
 
   def scanTokens(self):
     while (not self.isAtEnd()):
@@ -0,0 +1,121 @@
+import glob
+import hashlib
+import os
+import pickle
+import sys
+
+CACHE_DIRECTORY = "__loxcache__"
+SUFFIX = ".ast"
+
+SOURCE = os.path.dirname(os.path.abspath(__file__))
+
+# Identifies the interpreter that wrote an entry: the Python version plus a
+# hash of every module in src, so any change to the scanner, parser, optimizer
+# or resolver (or to the node classes) makes older entries stale.
+def interpreterVersion():
+  digest = hashlib.sha256(sys.version.encode())
+
+  for path in sorted(glob.glob(os.path.join(SOURCE, "*.py"))):
+    with open(path, "rb") as file:
+      digest.update(file.read())
+
+  return digest.hexdigest()[:12]
+
+def sourceHash(source):
+  return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+# Keeps the optimized, resolved statements of each script in a __loxcache__
+# directory next to it, like __pycache__. An entry is named
+# <script>.<options>.<source hash>.<interpreter version>.ast, so edited
+# scripts, other front-end options and other interpreter versions never load
+# it. Entries are written before the script runs, so the inline caches on the
+# nodes (global indexes, shapes, methods) are still empty when loaded. Writing
+# an entry removes the ones it replaces; --prune-cache clears the rest, such
+# as entries of deleted scripts.
+class ScriptCache:
+  def __init__(self, optimize, stringNumbers):
+    # The options that change what the front end produces.
+    self.options = ("o" if optimize else "n") + ("s" if stringNumbers else "f")
+    self.version = None
+
+  def entryPath(self, scriptPath, source):
+    if (self.version == None):
+      self.version = interpreterVersion()
+
+    directory, name = os.path.split(os.path.abspath(scriptPath))
+    entry = f"{name}.{self.options}.{sourceHash(source)}.{self.version}{SUFFIX}"
+    return os.path.join(directory, CACHE_DIRECTORY, entry)
+
+  def load(self, scriptPath, source):
+    try:
+      with open(self.entryPath(scriptPath, source), "rb") as file:
+        return pickle.load(file)
+    except Exception:
+      # Missing, unreadable or truncated entries are rebuilt.
+      return None
+
+  def store(self, scriptPath, source, statements):
+    path = self.entryPath(scriptPath, source)
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    try:
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      with open(temporary, "wb") as file:
+        pickle.dump(statements, file, pickle.HIGHEST_PROTOCOL)
+      os.replace(temporary, path)
+    except (OSError, pickle.PicklingError, RecursionError):
+      # Caching is best effort: a read-only directory or a tree too deep to
+      # pickle just means the script is compiled again next time.
+      if (os.path.exists(temporary)):
+        os.remove(temporary)
+      return
+
+    self.removeOlder(path)
+
+  # A new entry replaces the script's entries for the same options from older
+  # sources or interpreter versions, so editing and rerunning a script doesn't
+  # grow the cache. Entries for the other options are still valid and stay.
+  def removeOlder(self, path):
+    directory, entry = os.path.split(path)
+    name, options, _, _ = entry[:-len(SUFFIX)].rsplit(".", 3)
+    pattern = os.path.join(glob.escape(directory), glob.escape(f"{name}.{options}.") + "*" + SUFFIX)
+
+    for other in glob.glob(pattern):
+      parts = os.path.basename(other)[:-len(SUFFIX)].rsplit(".", 3)
+      if (other != path and parts[:2] == [name, options]):
+        try:
+          os.remove(other)
+        except OSError:
+          pass
+
+  # Removes entries under root whose script is gone or has changed, or that
+  # were written by another interpreter version. Returns how many were removed.
+  def prune(self, root):
+    if (self.version == None):
+      self.version = interpreterVersion()
+
+    removed = 0
+    pattern = os.path.join(root, "**", CACHE_DIRECTORY, "*" + SUFFIX)
+
+    for path in glob.glob(pattern, recursive=True):
+      if (self.isStale(path)):
+        os.remove(path)
+        removed += 1
+
+    return removed
+
+  def isStale(self, path):
+    parts = os.path.basename(path)[:-len(SUFFIX)].rsplit(".", 3)
+    if (len(parts) != 4):
+      return True
+
+    name, options, hash, version = parts
+    if (version != self.version):
+      return True
+
+    scriptPath = os.path.join(os.path.dirname(os.path.dirname(path)), name)
+    try:
+      with open(scriptPath) as file:
+        return sourceHash(file.read()) != hash
+    except OSError:
+      return True
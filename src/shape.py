@@ -0,0 +1,22 @@
+# A hidden class: maps field names to offsets in LoxInstance.values. Every
+# LoxClass has a root shape with no fields, and adding a field moves an
+# instance to the child shape for that name. Instances that gain the same
+# fields in the same order therefore share one Shape, so an (instance.shape is
+# cachedShape) check is enough to reuse a cached offset.
+class Shape:
+  __slots__ = ("indexes", "transitions")
+
+  def __init__(self, indexes):
+    self.indexes = indexes
+    self.transitions = {}
+
+  def withField(self, name):
+    shape = self.transitions.get(name)
+
+    if (shape == None):
+      indexes = dict(self.indexes)
+      indexes[name] = len(indexes)
+      shape = Shape(indexes)
+      self.transitions[name] = shape
+
+    return shape
@@ -0,0 +1,353 @@
+import expressions
+from interpreter import Interpreter
+from loxCallable import LoxCallable
+from loxClass import LoxClass
+from loxFunction import LoxFunction, receiverOf
+from memoCache import MISSING
+from loxInstance import LoxInstance
+from stackOverflowError import StackOverflowError
+import statements
+from tokenType import TokenType
+
+DEFAULT_MAX_DEPTH = 100000
+
+# Walks the same resolved tree as Interpreter, but without recursing in Python.
+# Pending work lives on self.work as (task, argument) pairs run last-in
+# first-out, intermediate values on self.values, and Lox calls on self.frames
+# as (workBase, valueBase, callerFrame, function, frame, memo). A task
+# for a node pushes the tasks for its children and a task that combines their
+# values, so Lox call depth is bounded by maxDepth and memory only.
+class StackInterpreter(Interpreter):
+  def __init__(self, stringNumbers=False, maxDepth=DEFAULT_MAX_DEPTH, memoizer=None):
+    super().__init__(stringNumbers, memoizer)
+    self.maxDepth = maxDepth
+    self.work = []
+    self.values = []
+    self.frames = []
+
+  def interpret(self, statements):
+    try:
+      self.run(statements)
+    except StackOverflowError:
+      raise
+    except:
+      raise RuntimeError("error")
+
+  def run(self, statements):
+    work = self.work
+
+    for statement in reversed(statements):
+      self.pushStatement(statement)
+
+    while work:
+      task, argument = work.pop()
+      task(self, argument)
+
+  def pushStatement(self, stmt):
+    self.work.append((STATEMENT_TASKS[type(stmt)], stmt))
+
+  def pushExpression(self, expr):
+    self.work.append((EXPRESSION_TASKS[type(expr)], expr))
+
+  def pushStatements(self, statements):
+    work = self.work
+    for statement in reversed(statements):
+      work.append((STATEMENT_TASKS[type(statement)], statement))
+
+  # Statements
+
+  def expressionStatement(self, stmt: statements.Expression):
+    self.work.append((StackInterpreter.discard, None))
+    self.pushExpression(stmt.expression)
+
+  def discard(self, argument):
+    self.values.pop()
+
+  def printStatement(self, stmt: statements.Print):
+    self.work.append((StackInterpreter.printValue, None))
+    self.pushExpression(stmt.expression)
+
+  def printValue(self, argument):
+    print(self.stringify(self.values.pop()))
+
+  def varStatement(self, stmt: statements.Var):
+    if (stmt.initializer == None):
+      self.declare(stmt, None)
+      return
+
+    if (stmt.readsItself):
+      self.declare(stmt, None)
+    self.work.append((StackInterpreter.declareValue, stmt))
+    self.pushExpression(stmt.initializer)
+
+  def declareValue(self, stmt):
+    self.declare(stmt, self.values.pop())
+
+  def blockStatement(self, stmt: statements.Block):
+    if (stmt.slotCount != 0):
+      self.work.append((StackInterpreter.restoreFrame, self.frame))
+      self.frame = [None] * stmt.slotCount
+    self.pushStatements(stmt.statements)
+
+  def restoreFrame(self, frame):
+    self.frame = frame
+
+  def ifStatement(self, stmt: statements.If):
+    self.work.append((StackInterpreter.branch, stmt))
+    self.pushExpression(stmt.condition)
+
+  def branch(self, stmt):
+    if (self.isTruthy(self.values.pop())):
+      self.pushStatement(stmt.thenBranch)
+    elif (stmt.elseBranch != None):
+      self.pushStatement(stmt.elseBranch)
+
+  def whileStatement(self, stmt: statements.While):
+    self.work.append((StackInterpreter.loop, stmt))
+    self.pushExpression(stmt.condition)
+
+  def loop(self, stmt):
+    if (self.isTruthy(self.values.pop())):
+      self.work.append((StackInterpreter.whileStatement, stmt))
+      self.pushStatement(stmt.body)
+
+  def functionStatement(self, stmt: statements.Function):
+    self.visitFunctionStmt(stmt)
+
+  def classStatement(self, stmt: statements.Class):
+    self.visitClassStmt(stmt)
+
+  def returnStatement(self, stmt: statements.Return):
+    if (stmt.value == None):
+      self.values.append(None)
+      self.returnFromFrame(None)
+    elif (stmt.tailCall):
+      self.work.append((StackInterpreter.tailCallValue, stmt.value))
+      self.pushCallOperands(stmt.value)
+    else:
+      self.work.append((StackInterpreter.returnFromFrame, None))
+      self.pushExpression(stmt.value)
+
+  # Drops the rest of the current function's work and hands its value back.
+  def returnFromFrame(self, argument):
+    value = self.values.pop()
+    workBase, valueBase, callerFrame, function, frame, memo = self.frames.pop()
+
+    if (function.isInitializer):
+      value = receiverOf(frame)
+    elif (memo != None):
+      memo[0].put(memo[1], value)
+
+    del self.work[workBase:]
+    del self.values[valueBase:]
+    self.frame = callerFrame
+    self.values.append(value)
+
+  # Reached when a function body runs off its end.
+  def endFunction(self, argument):
+    self.values.append(None)
+    self.returnFromFrame(None)
+
+  # Expressions
+
+  def literal(self, expr: expressions.Literal):
+    self.values.append(self.visitLiteralExpr(expr))
+
+  def grouping(self, expr: expressions.Grouping):
+    self.pushExpression(expr.expression)
+
+  def variable(self, expr: expressions.Variable):
+    self.values.append(self.lookUpVariable(expr.name, expr))
+
+  def this(self, expr: expressions.This):
+    self.values.append(self.lookUpVariable(expr.keyword, expr))
+
+  def super(self, expr: expressions.Super):
+    self.values.append(self.visitSuperExpr(expr))
+
+  def assign(self, expr: expressions.Assign):
+    self.work.append((StackInterpreter.assignValue, expr))
+    self.pushExpression(expr.value)
+
+  def assignValue(self, expr):
+    value = self.values[-1]
+
+    if (expr.depth == None):
+      self.globals.store(expr, expr.name, value)
+    elif (expr.cell):
+      self.frame[expr.slot].value = value
+    else:
+      self.frame[expr.slot] = value
+
+  def unary(self, expr: expressions.Unary):
+    self.work.append((StackInterpreter.applyUnary, expr))
+    self.pushExpression(expr.right)
+
+  def applyUnary(self, expr):
+    values = self.values
+    values[-1] = expr.handler(self, expr.operator, values[-1])
+
+  def binary(self, expr: expressions.Binary):
+    work = self.work
+    work.append((StackInterpreter.applyBinary, expr))
+    work.append((EXPRESSION_TASKS[type(expr.right)], expr.right))
+    work.append((EXPRESSION_TASKS[type(expr.left)], expr.left))
+
+  def applyBinary(self, expr):
+    values = self.values
+    right = values.pop()
+    values[-1] = expr.handler(self, expr.operator, values[-1], right)
+
+  def logical(self, expr: expressions.Logical):
+    self.work.append((StackInterpreter.logicalRight, expr))
+    self.pushExpression(expr.left)
+
+  def logicalRight(self, expr):
+    truthy = self.isTruthy(self.values[-1])
+    isOr = expr.operator.type == TokenType.OR
+
+    if (truthy != isOr):
+      self.values.pop()
+      self.pushExpression(expr.right)
+
+  def get(self, expr: expressions.Get):
+    self.work.append((StackInterpreter.getValue, expr))
+    self.pushExpression(expr.obj)
+
+  def getValue(self, expr):
+    values = self.values
+    values[-1] = self.getProperty(values[-1], expr)
+
+  def set(self, expr: expressions.Set):
+    work = self.work
+    work.append((StackInterpreter.setValue, expr))
+    work.append((EXPRESSION_TASKS[type(expr.value)], expr.value))
+    work.append((StackInterpreter.checkInstance, expr))
+    work.append((EXPRESSION_TASKS[type(expr.obj)], expr.obj))
+
+  def checkInstance(self, expr):
+    if (not isinstance(self.values[-1], LoxInstance)):
+      raise RuntimeError(expr.name, "Only instances have fields.")
+
+  def setValue(self, expr):
+    values = self.values
+    value = values.pop()
+    self.setProperty(values[-1], expr, value)
+    values[-1] = value
+
+  # Calls
+
+  def call(self, expr: expressions.Call):
+    self.work.append((StackInterpreter.callValues, expr))
+    self.pushCallOperands(expr)
+
+  def pushCallOperands(self, expr):
+    work = self.work
+    for argument in reversed(expr.arguments):
+      work.append((EXPRESSION_TASKS[type(argument)], argument))
+    work.append((EXPRESSION_TASKS[type(expr.callee)], expr.callee))
+
+  def popCall(self, expr):
+    values = self.values
+    count = len(expr.arguments)
+    arguments = values[len(values) - count:]
+    del values[len(values) - count:]
+    return values.pop(), arguments
+
+  def callValues(self, expr):
+    callee, arguments = self.popCall(expr)
+    self.enter(callee, arguments, expr)
+
+  # 'return f(...)': leaves the current frame before entering the callee, so
+  # tail calls don't count against maxDepth.
+  def tailCallValue(self, expr):
+    callee, arguments = self.popCall(expr)
+
+    if (type(callee) is LoxFunction):
+      workBase, valueBase, callerFrame, function, frame, memo = self.frames.pop()
+      del self.work[workBase:]
+      del self.values[valueBase:]
+      self.frame = callerFrame
+      # As in LoxFunction.run, the callee's cache isn't checked, and its
+      # result is cached as the result of the call it replaces.
+      self.checkArity(callee.arity(), arguments)
+      self.pushFrame(callee, callee.frame(callee.receiver, arguments), expr, memo)
+      return
+
+    # Classes and natives return into this frame like any other call.
+    self.work.append((StackInterpreter.returnFromFrame, None))
+    self.enter(callee, arguments, expr)
+
+  def enter(self, callee, arguments, expr):
+    if (type(callee) is LoxFunction):
+      self.checkArity(callee.arity(), arguments)
+      memo = None
+      if (callee.memo != None):
+        key = callee.memo.key(arguments)
+        if (key != None):
+          value = callee.memo.get(key)
+          if (value is not MISSING):
+            self.values.append(value)
+            return
+          memo = (callee.memo, key)
+      self.pushFrame(callee, callee.frame(callee.receiver, arguments), expr, memo)
+      return
+
+    if (isinstance(callee, LoxClass)):
+      instance = LoxInstance(callee)
+      initializer = callee.initializer
+      self.checkArity(callee.arity(), arguments)
+      if (initializer == None):
+        self.values.append(instance)
+      else:
+        self.pushFrame(initializer, initializer.frame(instance, arguments), expr)
+      return
+
+    if (not isinstance(callee, LoxCallable)):
+      raise RuntimeError("Can only call functions and classes.")
+
+    self.checkArity(callee.arity(), arguments)
+    self.values.append(callee.call(self, arguments))
+
+  def checkArity(self, arity, arguments):
+    if (len(arguments) != arity):
+      raise RuntimeError(f"Expected {arity} arguments but got {len(arguments)}.")
+
+  # memo is a (MemoCache, key) pair the call's result is stored under when
+  # the frame returns, or None.
+  def pushFrame(self, function, frame, expr, memo=None):
+    if (len(self.frames) >= self.maxDepth):
+      raise StackOverflowError(expr.paren, "Stack overflow.")
+
+    work = self.work
+    self.frames.append((len(work), len(self.values), self.frame, function, frame, memo))
+    work.append((StackInterpreter.endFunction, None))
+    self.frame = frame
+    self.pushStatements(function.declaration.body)
+
+STATEMENT_TASKS = {
+  statements.Expression: StackInterpreter.expressionStatement,
+  statements.Print: StackInterpreter.printStatement,
+  statements.Var: StackInterpreter.varStatement,
+  statements.Block: StackInterpreter.blockStatement,
+  statements.If: StackInterpreter.ifStatement,
+  statements.While: StackInterpreter.whileStatement,
+  statements.Function: StackInterpreter.functionStatement,
+  statements.Return: StackInterpreter.returnStatement,
+  statements.Class: StackInterpreter.classStatement,
+}
+
+EXPRESSION_TASKS = {
+  expressions.Assign: StackInterpreter.assign,
+  expressions.Binary: StackInterpreter.binary,
+  expressions.Call: StackInterpreter.call,
+  expressions.Get: StackInterpreter.get,
+  expressions.Grouping: StackInterpreter.grouping,
+  expressions.Literal: StackInterpreter.literal,
+  expressions.Logical: StackInterpreter.logical,
+  expressions.Set: StackInterpreter.set,
+  expressions.Super: StackInterpreter.super,
+  expressions.This: StackInterpreter.this,
+  expressions.Unary: StackInterpreter.unary,
+  expressions.Variable: StackInterpreter.variable,
+}
@@ -0,0 +1,6 @@
+from runtimeError import RuntimeErrorC
+
+# Raised by StackInterpreter when a call would go past its maxDepth.
+class StackOverflowError(RuntimeErrorC):
+  def __init__(self, token, message):
+    super().__init__(token, message)
@@ -41,22 +41,35 @@ class StmtVisitor(ABC):
         pass
 
 class Stmt(ABC):
+    # The source line the statement starts on, set by the parser; None for
+    # statements the front end made up.
+    line = None
+
     @abstractmethod
     def accept(self, visitor: StmtVisitor):
         pass
 
+    # Nodes loaded by ScriptCache set their fields one by one, as __init__
+    # does, so they keep the compact attribute layout that makes field reads
+    # fast. Pickle's default of updating __dict__ in one go would not.
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
 
 class Expression(Stmt):
-    def __init__(self, expression: Expr):
+    def __init__(self, expression: Expr, line=None):
         self.expression = expression
+        self.line = line
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visitExpressionStmt(self)
 
 
 class Print(Stmt):
-    def __init__(self, expression: Expr):
+    def __init__(self, expression: Expr, line=None):
         self.expression = expression
+        self.line = line
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visitPrintStmt(self)
@@ -65,30 +78,38 @@ class Var(Stmt):
     def __init__(self, name: TokenC, initializer):
         self.name = name
         self.initializer = initializer
+        self.line = name.line
+        self.slot = None
+        self.cell = False
+        self.readsItself = False
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visitVarStmt(self)
 
 class Block(Stmt):
-    def __init__(self, statements):
+    def __init__(self, statements, line=None):
         self.statements = statements
+        self.line = line
+        self.slotCount = 0
     
     def accept(self, visitor: StmtVisitor):
         return visitor.visitBlockStmt(self)
 
 class If(Stmt):
-    def __init__(self, condition, thenBranch, elseBranch):
+    def __init__(self, condition, thenBranch, elseBranch, line=None):
         self.condition = condition
         self.thenBranch = thenBranch
         self.elseBranch = elseBranch
+        self.line = line
     
     def accept(self, visitor: StmtVisitor):
         return visitor.visitIfStmt(self)
 
 class While(Stmt):
-    def __init__(self, condition, body):
+    def __init__(self, condition, body, line=None):
         self.condition = condition
         self.body = body
+        self.line = line
     
     def accept(self, visitor: StmtVisitor):
         return visitor.visitWhileStmt(self)
@@ -98,6 +119,14 @@ class Function(Stmt):
         self.name = name
         self.params = params
         self.body = body
+        self.line = name.line
+        self.slot = None
+        self.cell = False
+        self.slotCount = 0
+        self.cellSlots = []
+        self.upvalueSources = []
+        self.upvalueSlots = []
+        self.pure = False
     
     def accept(self, visitor: StmtVisitor):
         return visitor.visitFunctionStmt(self)
@@ -106,6 +135,8 @@ class Return(Stmt):
     def __init__(self, keyword, value):
         self.keyword = keyword
         self.value = value
+        self.line = keyword.line
+        self.tailCall = False
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visitReturnStmt(self)
@@ -115,6 +146,11 @@ class Class(Stmt):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        self.line = name.line
+        self.slot = None
+        self.cell = False
+        self.superSlot = None
+        self.slotCount = 0
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visitClassStmt(self)
@@ -0,0 +1,28 @@
+from parserC import ParserC
+
+# Pulls tokens from an iterator one at a time instead of indexing a list;
+# the parser only ever looks at the current and the previous token.
+class StreamingParser(ParserC):
+  def __init__(self, tokens):
+    super().__init__(None)
+    self.stream = iter(tokens)
+    self.previousToken = None
+    self.currentToken = next(self.stream)
+
+  def advance(self):
+    if (not self.isAtEnd()):
+      self.previousToken = self.currentToken
+      self.currentToken = next(self.stream)
+
+    return self.previousToken
+
+  def peek(self):
+    return self.currentToken
+
+  def previous(self):
+    return self.previousToken
+
+  # Yields each top-level declaration as soon as it has been parsed.
+  def declarations(self):
+    while (not self.isAtEnd()):
+      yield self.declaration()
@@ -0,0 +1,86 @@
+from regexScanner import CHARACTER_CLASSES, FIXED, IDENTIFIER, LEXEME, NEWLINE, NUMBER, STRING
+from scanner import Scanner
+from tokenC import TokenC
+from tokenType import TokenType
+
+CHUNK_SIZE = 16384
+
+# Scans a file as a generator, a chunk of whole lines at a time, so only the
+# current chunk and the tokens the parser hasn't taken yet are in memory.
+# Tokens never span lines except strings: a string still open at the end of
+# a chunk is carried over and scanned again with the next one. Chunks the
+# regex can't handle go through Scanner, as in RegexScanner.
+class StreamingScanner:
+  def __init__(self, file):
+    self.file = file
+    self.line = 1
+
+  def scanTokens(self):
+    pending = ""
+
+    while True:
+      lines = self.file.readlines(CHUNK_SIZE)
+      if (not lines):
+        break
+
+      tokens, pending = self.scanChunk(pending + "".join(lines))
+      yield from tokens
+
+    if (pending != ""):
+      # Raises the same unterminated string error as Scanner.
+      self.scanSlow(pending)
+
+    yield TokenC(TokenType.EOF, "", "", self.line)
+
+  # Returns the chunk's tokens and the text of a string left open at its end.
+  def scanChunk(self, chunk):
+    tokens = []
+    append = tokens.append
+    fixed = FIXED.get
+    classify = CHARACTER_CLASSES.get
+    start = self.line
+    line = start
+    slow = False
+    openString = len(chunk)
+
+    for text in LEXEME.findall(chunk):
+      type = fixed(text)
+      if (type != None):
+        append(TokenC(type, text, "", line))
+        continue
+
+      if (text == ""):
+        continue
+
+      kind = classify(text[0])
+      if (kind == NEWLINE):
+        line += 1
+      elif (kind == IDENTIFIER):
+        append(TokenC(TokenType.IDENTIFIER, text, "", line))
+      elif (kind == NUMBER):
+        append(TokenC(TokenType.NUMBER, text, float(text), line))
+      elif (kind == STRING and len(text) > 1):
+        line += text.count("\n")
+        append(TokenC(TokenType.STRING, text, text[1:-1], line))
+      elif (kind == STRING):
+        # No closing quote in this chunk, so it's the last quote in it.
+        openString = chunk.rindex('"')
+        break
+      else:
+        slow = True
+
+    if (slow):
+      self.line = start
+      tokens = self.scanSlow(chunk[:openString])
+    else:
+      self.line = line
+
+    return tokens, chunk[openString:]
+
+  def scanSlow(self, text):
+    scanner = Scanner(text)
+    scanner.line = self.line
+    tokens = scanner.scanTokens()
+    tokens.pop()
+    self.line = scanner.line
+    return tokens
@@ -0,0 +1,10 @@
+# Returned in place of a value by a 'return f(...)' in tail position. The
+# function that is returning runs the call itself, in a loop, instead of
+# nesting another Python frame for it.
+class TailCall:
+  __slots__ = ("function", "receiver", "arguments")
+
+  def __init__(self, function, receiver, arguments):
+    self.function = function
+    self.receiver = receiver
+    self.arguments = arguments
@@ -0,0 +1,164 @@
+import argparse
+import concurrent.futures
+import difflib
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, "..", "main.py")
+
+ENGINES = {
+  "tree": [],
+  "stack": ["--stack"],
+  "closures": ["--closures"],
+  "vm": ["--vm"],
+  "python": ["--python"],
+}
+
+# An expected line that is just this matches any one line of output, for
+# output that changes from run to run such as timings.
+ANY_LINE = "<any>"
+
+# Objects without a Lox string form print with their memory address.
+ADDRESS = re.compile(r"0x[0-9a-f]+")
+
+def expectedPath(script):
+  return os.path.splitext(script)[0] + ".expected"
+
+# Scripts expected to exit with something other than 0, such as those that
+# end in a runtime error, have the status in a .status file next to the
+# .expected one. A script without one must exit with 0.
+def statusPath(script):
+  return os.path.splitext(script)[0] + ".status"
+
+def expectedStatus(script):
+  path = statusPath(script)
+  if (not os.path.exists(path)):
+    return 0
+
+  with open(path) as file:
+    return int(file.read())
+
+def findScripts(paths):
+  scripts = []
+
+  for path in paths:
+    if (os.path.isdir(path)):
+      for directory, _, names in os.walk(path):
+        scripts += [os.path.join(directory, name) for name in names if name.endswith(".lox")]
+    else:
+      scripts.append(path)
+
+  return sorted(scripts)
+
+def normalize(output):
+  return [ADDRESS.sub("0x?", line) for line in output.splitlines()]
+
+def matches(expected, actual):
+  if (len(expected) != len(actual)):
+    return False
+  return all(want == ANY_LINE or want == line for want, line in zip(expected, actual))
+
+# Runs in its own interpreter process, so one script can't leave state behind
+# for the next, and a hung one can be stopped. Threads are enough to keep a
+# pool of those busy. Stdout and the exit status are compared; stderr is
+# shown when a script fails.
+def runScript(command, script, timeout):
+  start = time.perf_counter()
+
+  try:
+    result = subprocess.run(command + [script], capture_output=True, text=True, timeout=timeout)
+    output, errors, status = result.stdout, result.stderr, result.returncode
+  except subprocess.TimeoutExpired:
+    output, errors, status = None, f"timed out after {timeout} s", None
+
+  return script, output, errors, status, time.perf_counter() - start
+
+# Keeps the ANY_LINE markers of the old expected file where the new output
+# still has a line, so re-recording doesn't lose them.
+def record(script, actual, status):
+  lines = list(actual)
+  path = expectedPath(script)
+
+  if (os.path.exists(path)):
+    with open(path) as file:
+      old = file.read().splitlines()
+    for index, line in enumerate(old[:len(lines)]):
+      if (line == ANY_LINE):
+        lines[index] = ANY_LINE
+
+  with open(path, "w") as file:
+    file.write("".join(line + "\n" for line in lines))
+
+  if (status != 0):
+    with open(statusPath(script), "w") as file:
+      file.write(f"{status}\n")
+  elif (os.path.exists(statusPath(script))):
+    os.remove(statusPath(script))
+
+def check(script, output, errors, status, options):
+  if (output == None):
+    return "timeout", []
+
+  actual = normalize(output)
+  if (options.record):
+    record(script, actual, status)
+    return "recorded", []
+
+  path = expectedPath(script)
+  if (not os.path.exists(path)):
+    return "missing", []
+
+  with open(path) as file:
+    expected = file.read().splitlines()
+  wanted = expectedStatus(script)
+  if (matches(expected, actual) and status == wanted):
+    return "pass", []
+
+  details = list(difflib.unified_diff(expected, actual, path, "output", lineterm=""))
+  if (status != wanted):
+    details.append(f"exit status {status}, expected {wanted}")
+  return "fail", details + errors.splitlines()[-5:]
+
+def main(args):
+  argParser = argparse.ArgumentParser(description="Run .lox scripts in parallel and compare their output with the .expected file next to each.")
+  argParser.add_argument("paths", nargs="*", default=[HERE], help="scripts or directories to search (default: this directory)")
+  argParser.add_argument("--engine", choices=list(ENGINES), default="tree")
+  argParser.add_argument("--flags", default="--no-cache", help="more options for main.py (default: --no-cache)")
+  argParser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="scripts run at once (default: one per CPU)")
+  argParser.add_argument("--timeout", type=float, default=120, help="seconds a script may run before it counts as failed")
+  argParser.add_argument("--record", action="store_true", help="write each script's output and exit status as the expected ones instead of comparing")
+  argParser.add_argument("--quiet", "-q", action="store_true", help="only list scripts that didn't pass")
+  options = argParser.parse_args(args)
+
+  command = [sys.executable, MAIN] + ENGINES[options.engine] + shlex.split(options.flags)
+  scripts = findScripts(options.paths)
+  counts = {}
+  start = time.perf_counter()
+
+  with concurrent.futures.ThreadPoolExecutor(max_workers=options.jobs) as pool:
+    results = pool.map(lambda script: runScript(command, script, options.timeout), scripts)
+
+    for script, output, errors, status, elapsed in results:
+      outcome, details = check(script, output, errors, status, options)
+      counts[outcome] = counts.get(outcome, 0) + 1
+
+      if (outcome in ("pass", "recorded") and options.quiet):
+        continue
+      print(f"{outcome:<9} {elapsed:>7.2f} s  {os.path.relpath(script)}")
+      for line in details:
+        print(f"    {line}")
+
+  elapsed = time.perf_counter() - start
+  summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+  print(f"{len(scripts)} scripts on {options.engine} in {elapsed:.2f} s: {summary}")
+
+  failed = sum(count for outcome, count in counts.items() if outcome not in ("pass", "recorded"))
+  return 1 if failed != 0 else 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -1,6 +1,8 @@
 
 
 class TokenC:
+  __slots__ = ("type", "lexeme", "literal", "line")
+
   def __init__(self, type, lexeme, literal, line):
     self.type = type
     self.lexeme = lexeme
@@ -1,6 +1,11 @@
 from enum import Enum
 
 class TokenType(Enum):
+  # Members are singletons, so identity hashing is enough. It spares every
+  # dict keyed by TokenType (parser and operator tables) Enum's Python-level
+  # __hash__.
+  __hash__ = object.__hash__
+
   # Single-character tokens.
   LEFT_PAREN = 1
   RIGHT_PAREN = 2
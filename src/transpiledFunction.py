@@ -0,0 +1,32 @@
+from functools import partial
+
+from loxCallable import LoxCallable
+from tailCall import TailCall
+
+# Runs the tail calls a transpiled function returned until one gives a value.
+def finish(result):
+  while (result.__class__ is TailCall):
+    result = result.function(*result.arguments)
+  return result
+
+class TranspiledFunction(LoxCallable):
+  def __init__(self, name, function, arityCount, isInitializer, method=None):
+    # function takes the Lox arguments; method, set for class methods, also
+    # takes the receiver as its first argument.
+    self.name = name
+    self.function = function
+    self.arityCount = arityCount
+    self.isInitializer = isInitializer
+    self.method = method
+
+  def call(self, interpreter, arguments):
+    return finish(self.function(*arguments))
+
+  def arity(self):
+    return self.arityCount
+
+  def toString(self):
+    return f"<fn {self.name} >"
+
+  def bind(self, instance):
+    return TranspiledFunction(self.name, partial(self.method, instance), self.arityCount, self.isInitializer, self.method)
@@ -0,0 +1,601 @@
+import expressions
+import statements
+from tokenType import TokenType
+
+COMPARISON_OPERATORS = {
+  TokenType.GREATER: (">", "_gt"),
+  TokenType.GREATER_EQUAL: (">=", "_ge"),
+  TokenType.LESS: ("<", "_lt"),
+  TokenType.LESS_EQUAL: ("<=", "_le"),
+  TokenType.MINUS: ("-", "_sub"),
+  TokenType.PLUS: ("+", "_add"),
+  TokenType.SLASH: ("/", "_div"),
+  TokenType.STAR: ("*", "_mul"),
+}
+
+BOOLEAN_OPERATORS = [
+  TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
+  TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL,
+]
+
+class Declaration:
+  def __init__(self, pyName, owner):
+    self.pyName = pyName
+    self.owner = owner
+    self.captured = False
+
+class Scope:
+  def __init__(self, owner):
+    self.owner = owner
+    self.names = {}
+
+class FunctionInfo:
+  def __init__(self, enclosing):
+    self.enclosing = enclosing
+    # Captured declarations from enclosing functions, passed in through a factory.
+    self.free = []
+
+  def addFree(self, declaration):
+    if (declaration not in self.free):
+      self.free.append(declaration)
+
+# First pass: binds every local reference to its declaration and finds the
+# locals that inner functions capture. Those are stored in one-element lists
+# so each closure keeps the binding that was live when it was created.
+class CaptureAnalysis(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self):
+    self.scopes = []
+    self.current = FunctionInfo(None)
+    self.declarations = {}
+    self.references = {}
+    self.functions = {}
+    self.counter = 0
+
+  def analyze(self, statements):
+    self.functions[None] = self.current
+    self.analyzeStatements(statements)
+
+  def analyzeStatements(self, statements):
+    for statement in statements:
+      statement.accept(self)
+
+  def newName(self, lexeme):
+    self.counter += 1
+    return f"{lexeme}_{self.counter}"
+
+  # Redeclaring a name in the same scope reuses its declaration, as the
+  # Resolver reuses the slot.
+  def declare(self, key, lexeme):
+    if (len(self.scopes) == 0):
+      return
+
+    declaration = self.scopes[-1].names.get(lexeme)
+    if (declaration == None):
+      declaration = Declaration(self.newName(lexeme), self.scopes[-1].owner)
+      self.scopes[-1].names[lexeme] = declaration
+    self.declarations[key] = declaration
+
+  def reference(self, key, lexeme):
+    for scope in reversed(self.scopes):
+      if (lexeme in scope.names):
+        declaration = scope.names[lexeme]
+        self.references[key] = declaration
+
+        if (declaration.owner != self.current and lexeme != "super"):
+          declaration.captured = True
+          function = self.current
+          while (function != declaration.owner):
+            function.addFree(declaration)
+            function = function.enclosing
+        return
+
+  def function(self, stmt, isMethod):
+    enclosing = self.current
+    self.current = FunctionInfo(enclosing)
+    self.functions[stmt] = self.current
+    self.scopes.append(Scope(self.current))
+
+    if (isMethod):
+      self.declare(("this", stmt), "this")
+    for param in stmt.params:
+      self.declare(param, param.lexeme)
+
+    self.analyzeStatements(stmt.body)
+
+    self.scopes.pop()
+    self.current = enclosing
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    self.scopes.append(Scope(self.current))
+    self.analyzeStatements(stmt.statements)
+    self.scopes.pop()
+
+  # Declared before its initializer is analyzed, as the Resolver does, so a
+  # name in the initializer binds to the same declaration in both.
+  def visitVarStmt(self, stmt: statements.Var):
+    self.declare(stmt, stmt.name.lexeme)
+    if (stmt.initializer != None):
+      stmt.initializer.accept(self)
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    self.declare(stmt, stmt.name.lexeme)
+    self.function(stmt, False)
+
+  def visitClassStmt(self, stmt: statements.Class):
+    self.declare(stmt, stmt.name.lexeme)
+
+    if (stmt.superclass != None):
+      stmt.superclass.accept(self)
+
+    enclosing = self.current
+    self.current = FunctionInfo(enclosing)
+    self.functions[stmt] = self.current
+    self.scopes.append(Scope(self.current))
+
+    if (stmt.superclass != None):
+      self.declare(("super", stmt), "super")
+
+    for method in stmt.methods:
+      self.function(method, True)
+
+    self.scopes.pop()
+    self.current = enclosing
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    stmt.expression.accept(self)
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    stmt.expression.accept(self)
+
+  def visitIfStmt(self, stmt: statements.If):
+    stmt.condition.accept(self)
+    stmt.thenBranch.accept(self)
+    if (stmt.elseBranch != None):
+      stmt.elseBranch.accept(self)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    stmt.condition.accept(self)
+    stmt.body.accept(self)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    if (stmt.value != None):
+      stmt.value.accept(self)
+
+  def visitAssignExpr(self, expr: expressions.Assign):
+    expr.value.accept(self)
+    if (expr.depth != None):
+      self.reference(expr, expr.name.lexeme)
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    expr.left.accept(self)
+    expr.right.accept(self)
+
+  def visitCallExpr(self, expr: expressions.Call):
+    expr.callee.accept(self)
+    for argument in expr.arguments:
+      argument.accept(self)
+
+  def visitGetExpr(self, expr: expressions.Get):
+    expr.obj.accept(self)
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    expr.expression.accept(self)
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    pass
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    expr.left.accept(self)
+    expr.right.accept(self)
+
+  def visitSetExpr(self, expr: expressions.Set):
+    expr.value.accept(self)
+    expr.obj.accept(self)
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    if (expr.depth != None):
+      self.reference(expr, "super")
+      self.reference(("this", expr), "this")
+
+  def visitThisExpr(self, expr: expressions.This):
+    if (expr.depth != None):
+      self.reference(expr, "this")
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    expr.right.accept(self)
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    if (expr.depth != None):
+      self.reference(expr, expr.name.lexeme)
+
+class FunctionContext:
+  def __init__(self, enclosing, isInitializer):
+    self.enclosing = enclosing
+    self.isInitializer = isInitializer
+    self.globals = set()
+    self.temporaries = 0
+    self.headerLine = 0
+    self.headerIndent = ""
+
+# Second pass: writes the Python source. Lox globals become module globals
+# prefixed with 'g_', locals become Python locals with a unique suffix.
+class Transpiler(expressions.ExprVisitor, statements.StmtVisitor):
+  def __init__(self, stringNumbers=False):
+    self.stringNumbers = stringNumbers
+    self.analysis = CaptureAnalysis()
+    self.lines = []
+    self.indent = ""
+    self.context = None
+    self.currentThis = None
+    # Globals already defined by an earlier top-level statement.
+    self.definedGlobals = set()
+
+  def transpile(self, program):
+    self.analysis.analyze(program)
+    self.beginFunction("def lox_main():", False)
+    start = len(self.lines)
+
+    # Top-level statements run in order, so once one has defined a global,
+    # top-level code after it can assign the global without checking.
+    for statement in program:
+      statement.accept(self)
+      if (isinstance(statement, (statements.Var, statements.Function, statements.Class))):
+        self.definedGlobals.add(self.globalName(statement.name.lexeme))
+
+    if (len(self.lines) == start):
+      self.emit("pass")
+    self.endFunction()
+    return "\n".join(self.lines) + "\n"
+
+  def emit(self, line):
+    self.lines.append(self.indent + line)
+
+  def emitStatements(self, statements):
+    start = len(self.lines)
+    for statement in statements:
+      statement.accept(self)
+
+    if (len(self.lines) == start):
+      self.emit("pass")
+
+  def emitBody(self, statement):
+    self.indent += "    "
+    self.emitStatements([statement])
+    self.indent = self.indent[:-4]
+
+  def beginFunction(self, header, isInitializer):
+    self.emit(header)
+    self.indent += "    "
+    self.context = FunctionContext(self.context, isInitializer)
+    self.context.headerLine = len(self.lines)
+    self.context.headerIndent = self.indent
+
+  def endFunction(self):
+    context = self.context
+    if (len(context.globals) > 0):
+      names = ", ".join(sorted(context.globals))
+      self.lines.insert(context.headerLine, f"{context.headerIndent}global {names}")
+
+    self.indent = self.indent[:-4]
+    self.context = context.enclosing
+
+  def temporary(self):
+    self.context.temporaries += 1
+    return f"_t{self.context.temporaries}"
+
+  def globalName(self, lexeme):
+    return f"g_{lexeme}"
+
+  def declarationTarget(self, key, lexeme):
+    declaration = self.analysis.declarations.get(key)
+
+    if (declaration == None):
+      name = self.globalName(lexeme)
+      self.context.globals.add(name)
+      return name
+
+    if (declaration.captured):
+      return f"{declaration.pyName}[0]"
+
+    return declaration.pyName
+
+  def declarationInit(self, key):
+    # Captured locals get their box before the value is computed.
+    declaration = self.analysis.declarations.get(key)
+    if (declaration != None and declaration.captured):
+      self.emit(f"{declaration.pyName} = [None]")
+
+  def variable(self, expr, lexeme):
+    declaration = self.analysis.references.get(expr)
+
+    if (declaration == None):
+      return self.globalName(lexeme)
+
+    if (declaration.captured and lexeme != "super"):
+      return f"{declaration.pyName}[0]"
+
+    return declaration.pyName
+
+  def truthy(self, expr):
+    code = expr.accept(self)
+
+    if (isinstance(expr, expressions.Binary) and expr.operator.type in BOOLEAN_OPERATORS):
+      return code
+    if (isinstance(expr, expressions.Unary) and expr.operator.type == TokenType.BANG):
+      return code
+
+    temporary = self.temporary()
+    return f"(({temporary} := {code}) is not None and {temporary} is not False)"
+
+  def factoryArguments(self, key):
+    return ", ".join(declaration.pyName for declaration in self.analysis.functions[key].free)
+
+  def visitLiteralExpr(self, expr: expressions.Literal):
+    if (self.stringNumbers and isinstance(expr.value, float)):
+      return repr(str(expr.value))
+
+    return repr(expr.value)
+
+  def visitGroupingExpr(self, expr: expressions.Grouping):
+    return expr.expression.accept(self)
+
+  def visitUnaryExpr(self, expr: expressions.Unary):
+    right = expr.right.accept(self)
+
+    if (expr.operator.type == TokenType.MINUS):
+      return f"_negate({right})"
+
+    temporary = self.temporary()
+    return f"(({temporary} := {right}) is None or {temporary} is False)"
+
+  def visitBinaryExpr(self, expr: expressions.Binary):
+    left = expr.left.accept(self)
+    right = expr.right.accept(self)
+
+    if (expr.operator.type in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL)):
+      a = self.temporary()
+      b = self.temporary()
+      # Values of different types are never equal, so 1 == true is false.
+      equal = f"((({a} := {left}).__class__ is ({b} := {right}).__class__) and {a} == {b})"
+      if (expr.operator.type == TokenType.BANG_EQUAL):
+        return f"(not {equal})"
+      return equal
+
+    symbol, helper = COMPARISON_OPERATORS[expr.operator.type]
+    a = self.temporary()
+    b = self.temporary()
+    return f"(({a} {symbol} {b}) if (({a} := {left}).__class__ is float) & (({b} := {right}).__class__ is float) else {helper}({a}, {b}))"
+
+  def visitLogicalExpr(self, expr: expressions.Logical):
+    left = expr.left.accept(self)
+    right = expr.right.accept(self)
+    temporary = self.temporary()
+    condition = f"(({temporary} := {left}) is not None and {temporary} is not False)"
+
+    if (expr.operator.type == TokenType.OR):
+      return f"({temporary} if {condition} else {right})"
+
+    return f"({right} if {condition} else {temporary})"
+
+  def visitVariableExpr(self, expr: expressions.Variable):
+    return self.variable(expr, expr.name.lexeme)
+
+  def visitThisExpr(self, expr: expressions.This):
+    return self.variable(expr, "this")
+
+  def visitSuperExpr(self, expr: expressions.Super):
+    superclass = self.variable(expr, "super")
+    this = self.variable(("this", expr), "this")
+    return f"_super({superclass}, {this}, {expr.method.lexeme!r})"
+
+  def visitAssignExpr(self, expr: expressions.Assign):
+    value = expr.value.accept(self)
+    target = self.variable(expr, expr.name.lexeme)
+
+    if (expr not in self.analysis.references):
+      if (not self.isDefinedGlobal(target)):
+        return self.assignGlobal(target, value)
+      self.context.globals.add(target)
+    elif (target.endswith("[0]")):
+      return f"_store({target[:-3]}, {value})"
+
+    return f"({target} := {value})"
+
+  # Assigning a global that was never defined is an error, as on the other
+  # engines, so it goes through the runtime rather than a Python assignment,
+  # which would quietly create the variable.
+  def assignGlobal(self, target, value):
+    return f"_assign_global(globals(), {target!r}, {value})"
+
+  # Functions can run before the top-level code that defines a global, so
+  # only top-level code can rely on definedGlobals.
+  def isDefinedGlobal(self, target):
+    return self.context.enclosing == None and target in self.definedGlobals
+
+  def visitCallExpr(self, expr: expressions.Call):
+    arguments = [argument.accept(self) for argument in expr.arguments]
+
+    if (isinstance(expr.callee, expressions.Get)):
+      receiver = expr.callee.obj.accept(self)
+      return f"_invoke({', '.join([receiver, repr(expr.callee.name.lexeme)] + arguments)})"
+
+    callee = expr.callee.accept(self)
+    return f"_call({', '.join([callee] + arguments)})"
+
+  def visitGetExpr(self, expr: expressions.Get):
+    return f"_get({expr.obj.accept(self)}, {expr.name.lexeme!r})"
+
+  def visitSetExpr(self, expr: expressions.Set):
+    obj = expr.obj.accept(self)
+    value = expr.value.accept(self)
+    return f"_set({obj}, {expr.name.lexeme!r}, {value})"
+
+  def visitExpressionStmt(self, stmt: statements.Expression):
+    expr = stmt.expression
+
+    if (isinstance(expr, expressions.Assign)):
+      value = expr.value.accept(self)
+      target = self.variable(expr, expr.name.lexeme)
+      if (expr not in self.analysis.references):
+        if (not self.isDefinedGlobal(target)):
+          self.emit(self.assignGlobal(target, value))
+          return
+        self.context.globals.add(target)
+      self.emit(f"{target} = {value}")
+      return
+
+    self.emit(expr.accept(self))
+
+  def visitPrintStmt(self, stmt: statements.Print):
+    self.emit(f"_print({stmt.expression.accept(self)})")
+
+  # A captured local gets a new box holding its value, so a redeclared one can
+  # still read the old box. A new local its own initializer reads, which the
+  # resolver flags, is nil until the value is computed.
+  def visitVarStmt(self, stmt: statements.Var):
+    declaration = self.analysis.declarations.get(stmt)
+    if (declaration != None and stmt.readsItself):
+      self.emit(f"{declaration.pyName} = {'[None]' if declaration.captured else 'None'}")
+
+    value = "None"
+    if (stmt.initializer != None):
+      value = stmt.initializer.accept(self)
+
+    if (declaration != None and declaration.captured):
+      self.emit(f"{declaration.pyName} = [{value}]")
+      return
+    self.emit(f"{self.declarationTarget(stmt, stmt.name.lexeme)} = {value}")
+
+  def visitBlockStmt(self, stmt: statements.Block):
+    for statement in stmt.statements:
+      statement.accept(self)
+
+  def visitIfStmt(self, stmt: statements.If):
+    self.emit(f"if {self.truthy(stmt.condition)}:")
+    self.emitBody(stmt.thenBranch)
+
+    if (stmt.elseBranch != None):
+      self.emit("else:")
+      self.emitBody(stmt.elseBranch)
+
+  def visitWhileStmt(self, stmt: statements.While):
+    self.emit(f"while {self.truthy(stmt.condition)}:")
+    self.emitBody(stmt.body)
+
+  def visitReturnStmt(self, stmt: statements.Return):
+    if (self.context.isInitializer):
+      self.emit(f"return {self.currentThis}")
+      return
+
+    if (stmt.value == None):
+      self.emit("return None")
+      return
+
+    if (stmt.tailCall):
+      self.emit(f"return {self.tailCall(stmt.value)}")
+      return
+
+    self.emit(f"return {stmt.value.accept(self)}")
+
+  # Tail calls to Lox functions come back as a TailCall that the runtime's
+  # call loop runs, so the Python stack doesn't grow with them.
+  def tailCall(self, expr: expressions.Call):
+    arguments = [argument.accept(self) for argument in expr.arguments]
+
+    if (isinstance(expr.callee, expressions.Get)):
+      receiver = expr.callee.obj.accept(self)
+      return f"_tail_invoke({', '.join([receiver, repr(expr.callee.name.lexeme)] + arguments)})"
+
+    callee = expr.callee.accept(self)
+    return f"_tail({', '.join([callee] + arguments)})"
+
+  def functionDefinition(self, stmt: statements.Function, pyName, isMethod, isInitializer):
+    params = []
+    prologue = []
+
+    if (isMethod):
+      declaration = self.analysis.declarations[("this", stmt)]
+      params.append(declaration.pyName)
+      if (declaration.captured):
+        prologue.append(f"{declaration.pyName} = [{declaration.pyName}]")
+
+    for param in stmt.params:
+      declaration = self.analysis.declarations[param]
+      params.append(declaration.pyName)
+      if (declaration.captured):
+        prologue.append(f"{declaration.pyName} = [{declaration.pyName}]")
+
+    enclosingThis = self.currentThis
+    if (isMethod):
+      self.currentThis = self.declarationTarget(("this", stmt), "this")
+
+    self.beginFunction(f"def {pyName}({', '.join(params)}):", isInitializer)
+    for line in prologue:
+      self.emit(line)
+    self.emitStatements(stmt.body)
+    if (isInitializer):
+      self.emit(f"return {self.currentThis}")
+    self.endFunction()
+
+    self.currentThis = enclosingThis
+
+  def visitFunctionStmt(self, stmt: statements.Function):
+    declaration = self.analysis.declarations.get(stmt)
+    if (declaration != None):
+      pyName = f"fn_{declaration.pyName}"
+    else:
+      pyName = f"fn_{stmt.name.lexeme}"
+
+    self.declarationInit(stmt)
+    free = self.factoryArguments(stmt)
+
+    if (free != ""):
+      self.emit(f"def make_{pyName}({free}):")
+      self.indent += "    "
+      self.functionDefinition(stmt, pyName, False, False)
+      self.emit(f"return {pyName}")
+      self.indent = self.indent[:-4]
+      function = f"make_{pyName}({free})"
+    else:
+      self.functionDefinition(stmt, pyName, False, False)
+      function = pyName
+
+    target = self.declarationTarget(stmt, stmt.name.lexeme)
+    self.emit(f"{target} = _TranspiledFunction({stmt.name.lexeme!r}, {function}, {len(stmt.params)}, False)")
+
+  def visitClassStmt(self, stmt: statements.Class):
+    declaration = self.analysis.declarations.get(stmt)
+    if (declaration != None):
+      pyName = declaration.pyName
+    else:
+      pyName = stmt.name.lexeme
+
+    self.declarationInit(stmt)
+    target = self.declarationTarget(stmt, stmt.name.lexeme)
+    self.emit(f"{target} = None")
+
+    superclass = "None"
+    factoryParams = [declaration.pyName for declaration in self.analysis.functions[stmt].free]
+    factoryArguments = list(factoryParams)
+
+    if (stmt.superclass != None):
+      superDeclaration = self.analysis.declarations[("super", stmt)]
+      superclass = superDeclaration.pyName
+      self.emit(f"{superclass} = _superclass({stmt.superclass.accept(self)})")
+      factoryParams.insert(0, superclass)
+      factoryArguments.insert(0, superclass)
+
+    self.emit(f"def make_{pyName}({', '.join(factoryParams)}):")
+    self.indent += "    "
+
+    methods = []
+    for method in stmt.methods:
+      isInitializer = method.name.lexeme == "init"
+      methodName = f"{pyName}_{method.name.lexeme}"
+      self.functionDefinition(method, methodName, True, isInitializer)
+      methods.append(f"{method.name.lexeme!r}: _method({method.name.lexeme!r}, {methodName}, {len(method.params)}, {isInitializer})")
+
+    self.emit(f"return {{{', '.join(methods)}}}")
+    self.indent = self.indent[:-4]
+
+    self.emit(f"{target} = _LoxClass({stmt.name.lexeme!r}, {superclass}, make_{pyName}({', '.join(factoryArguments)}))")
@@ -0,0 +1,533 @@
+from clock import Clock
+from compiler import Compiler
+from loxCallable import LoxCallable
+from loxClass import LoxClass
+from loxInstance import LoxInstance
+from opCode import OpCode
+from vmBoundMethod import VMBoundMethod
+from vmClosure import VMClosure
+from vmUpvalue import VMUpvalue
+
+FRAMES_MAX = 10000
+
+class VMRuntimeError(RuntimeError):
+  pass
+
+class VM:
+  def __init__(self, stringNumbers=False):
+    self.globals = {}
+    self.stringNumbers = stringNumbers
+    self.stack = []
+    self.frames = []
+    self.openUpvalues = {}
+
+    self.globals["clock"] = Clock()
+
+  def interpret(self, statements):
+    function = Compiler(self.stringNumbers).compile(statements)
+    closure = VMClosure(function)
+    self.stack.append(closure)
+    self.frames.append((closure, 0, 0))
+    self.run(0)
+
+  def callValue(self, callee, arguments):
+    # Re-enters the dispatch loop for calls made from native code.
+    depth = len(self.frames)
+    self.stack.append(callee)
+    self.stack.extend(arguments)
+    frame = self.prepareCall(callee, len(arguments))
+
+    if (frame == None):
+      return self.stack.pop()
+
+    self.frames.append(frame)
+    return self.run(depth)
+
+  def prepareCall(self, callee, argCount):
+    stack = self.stack
+
+    if (isinstance(callee, VMBoundMethod)):
+      stack[-1 - argCount] = callee.receiver
+      callee = callee.method
+    elif (isinstance(callee, LoxClass)):
+      instance = LoxInstance(callee)
+      stack[-1 - argCount] = instance
+      callee = callee.initializer
+      if (callee == None):
+        if (argCount != 0):
+          self.runtimeError(f"Expected 0 arguments but got {argCount}.")
+        del stack[len(stack) - argCount:]
+        return None
+
+    if (isinstance(callee, VMClosure)):
+      if (argCount != callee.function.arity):
+        self.runtimeError(f"Expected {callee.function.arity} arguments but got {argCount}.")
+      if (len(self.frames) >= FRAMES_MAX):
+        self.runtimeError("Stack overflow.")
+      return (callee, 0, len(stack) - argCount - 1)
+
+    if (isinstance(callee, LoxCallable)):
+      if (argCount != callee.arity()):
+        self.runtimeError(f"Expected {callee.arity()} arguments but got {argCount}.")
+      arguments = stack[len(stack) - argCount:]
+      del stack[len(stack) - argCount - 1:]
+      stack.append(callee.call(self, arguments))
+      return None
+
+    self.runtimeError("Can only call functions and classes.")
+
+  def captureUpvalue(self, index):
+    upvalue = self.openUpvalues.get(index)
+
+    if (upvalue == None):
+      upvalue = VMUpvalue(self.stack, index)
+      self.openUpvalues[index] = upvalue
+
+    return upvalue
+
+  def closeUpvalues(self, last):
+    for index in [index for index in self.openUpvalues if index >= last]:
+      self.openUpvalues.pop(index).close()
+
+  def run(self, stopDepth):
+    stack = self.stack
+    frames = self.frames
+    globals = self.globals
+
+    closure, ip, base = frames.pop()
+    code = closure.function.chunk.code
+    constants = closure.function.chunk.constants
+
+    CONSTANT = OpCode.CONSTANT.value
+    NIL = OpCode.NIL.value
+    TRUE = OpCode.TRUE.value
+    FALSE = OpCode.FALSE.value
+    POP = OpCode.POP.value
+    GET_LOCAL = OpCode.GET_LOCAL.value
+    SET_LOCAL = OpCode.SET_LOCAL.value
+    GET_GLOBAL = OpCode.GET_GLOBAL.value
+    DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+    SET_GLOBAL = OpCode.SET_GLOBAL.value
+    GET_UPVALUE = OpCode.GET_UPVALUE.value
+    SET_UPVALUE = OpCode.SET_UPVALUE.value
+    GET_PROPERTY = OpCode.GET_PROPERTY.value
+    SET_PROPERTY = OpCode.SET_PROPERTY.value
+    GET_SUPER = OpCode.GET_SUPER.value
+    EQUAL = OpCode.EQUAL.value
+    NOT_EQUAL = OpCode.NOT_EQUAL.value
+    GREATER = OpCode.GREATER.value
+    GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+    LESS = OpCode.LESS.value
+    LESS_EQUAL = OpCode.LESS_EQUAL.value
+    ADD = OpCode.ADD.value
+    SUBTRACT = OpCode.SUBTRACT.value
+    MULTIPLY = OpCode.MULTIPLY.value
+    DIVIDE = OpCode.DIVIDE.value
+    NOT = OpCode.NOT.value
+    NEGATE = OpCode.NEGATE.value
+    PRINT = OpCode.PRINT.value
+    JUMP = OpCode.JUMP.value
+    JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+    LOOP = OpCode.LOOP.value
+    CALL = OpCode.CALL.value
+    INVOKE = OpCode.INVOKE.value
+    SUPER_INVOKE = OpCode.SUPER_INVOKE.value
+    CLOSURE = OpCode.CLOSURE.value
+    CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE.value
+    RETURN = OpCode.RETURN.value
+    CLASS = OpCode.CLASS.value
+    INHERIT = OpCode.INHERIT.value
+    METHOD = OpCode.METHOD.value
+    TAIL_CALL = OpCode.TAIL_CALL.value
+    TAIL_INVOKE = OpCode.TAIL_INVOKE.value
+
+    while True:
+      op = code[ip]
+      ip += 1
+
+      if (op == GET_LOCAL):
+        stack.append(stack[base + code[ip]])
+        ip += 1
+      elif (op == CONSTANT):
+        stack.append(constants[code[ip]])
+        ip += 1
+      elif (op == GET_GLOBAL):
+        name = constants[code[ip]]
+        ip += 1
+        try:
+          stack.append(globals[name])
+        except KeyError:
+          self.frames.append((closure, ip, base))
+          self.runtimeError(f"Undefined variable {name}.")
+      elif (op == JUMP_IF_FALSE):
+        value = stack[-1]
+        if (value == None or value is False):
+          ip = code[ip]
+        else:
+          ip += 1
+      elif (op == POP):
+        stack.pop()
+      elif (op == SET_LOCAL):
+        stack[base + code[ip]] = stack[-1]
+        ip += 1
+      elif (op == GET_UPVALUE):
+        upvalue = closure.upvalues[code[ip]]
+        stack.append(upvalue.cells[upvalue.index])
+        ip += 1
+      elif (op == ADD):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left + right
+        else:
+          stack[-1] = self.add(left, right)
+      elif (op == SUBTRACT):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left - right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left - right
+      elif (op == LESS):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left < right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left < right
+      elif (op == LESS_EQUAL):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left <= right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left <= right
+      elif (op == GREATER):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left > right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left > right
+      elif (op == GREATER_EQUAL):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left >= right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left >= right
+      elif (op == MULTIPLY):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left * right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left * right
+      elif (op == DIVIDE):
+        right = stack.pop()
+        left = stack[-1]
+        if (type(left) is float and type(right) is float):
+          stack[-1] = left / right
+        else:
+          left, right = self.numberOperands(left, right)
+          stack[-1] = left / right
+      elif (op == EQUAL):
+        right = stack.pop()
+        left = stack[-1]
+        stack[-1] = type(left) is type(right) and left == right
+      elif (op == NOT_EQUAL):
+        right = stack.pop()
+        left = stack[-1]
+        stack[-1] = type(left) is not type(right) or left != right
+      elif (op == CALL):
+        argCount = code[ip]
+        ip += 1
+        callee = stack[-1 - argCount]
+        frames.append((closure, ip, base))
+        if (type(callee) is VMClosure):
+          if (argCount != callee.function.arity):
+            self.runtimeError(f"Expected {callee.function.arity} arguments but got {argCount}.")
+          if (len(frames) >= FRAMES_MAX):
+            self.runtimeError("Stack overflow.")
+          frame = (callee, 0, len(stack) - argCount - 1)
+        else:
+          frame = self.prepareCall(callee, argCount)
+        if (frame == None):
+          frames.pop()
+        else:
+          closure, ip, base = frame
+          code = closure.function.chunk.code
+          constants = closure.function.chunk.constants
+      elif (op == RETURN):
+        result = stack.pop()
+        if (self.openUpvalues):
+          self.closeUpvalues(base)
+        del stack[base:]
+        if (len(frames) == stopDepth):
+          return result
+        stack.append(result)
+        closure, ip, base = frames.pop()
+        code = closure.function.chunk.code
+        constants = closure.function.chunk.constants
+      elif (op == TAIL_CALL):
+        argCount = code[ip]
+        ip += 1
+        callee = stack[-1 - argCount]
+        if (type(callee) is VMClosure and argCount == callee.function.arity):
+          # Slide the callee and its arguments down over the current frame.
+          if (self.openUpvalues):
+            self.closeUpvalues(base)
+          stack[base:] = stack[len(stack) - argCount - 1:]
+          closure = callee
+          ip = 0
+          code = closure.function.chunk.code
+          constants = closure.function.chunk.constants
+        else:
+          frames.append((closure, ip, base))
+          frame = self.prepareCall(callee, argCount)
+          if (frame == None):
+            frames.pop()
+          else:
+            closure, ip, base = frame
+            code = closure.function.chunk.code
+            constants = closure.function.chunk.constants
+      elif (op == TAIL_INVOKE):
+        name = constants[code[ip]]
+        argCount = code[ip + 1]
+        ip += 2
+        receiver = stack[-1 - argCount]
+        method = None
+        if (type(receiver) is LoxInstance and name not in receiver.shape.indexes):
+          method = receiver.klass.methodTable.get(name)
+        if (type(method) is VMClosure and argCount == method.function.arity):
+          if (self.openUpvalues):
+            self.closeUpvalues(base)
+          stack[base:] = stack[len(stack) - argCount - 1:]
+          closure = method
+          ip = 0
+          code = closure.function.chunk.code
+          constants = closure.function.chunk.constants
+        else:
+          frames.append((closure, ip, base))
+          if (not isinstance(receiver, LoxInstance)):
+            self.runtimeError("Only instances have methods.")
+          index = receiver.shape.indexes.get(name)
+          if (index != None):
+            stack[-1 - argCount] = receiver.values[index]
+            frame = self.prepareCall(receiver.values[index], argCount)
+          elif (method == None):
+            self.runtimeError(f"Undefined property {name}.")
+          else:
+            frame = self.prepareCall(method, argCount)
+          if (frame == None):
+            frames.pop()
+          else:
+            closure, ip, base = frame
+            code = closure.function.chunk.code
+            constants = closure.function.chunk.constants
+      elif (op == JUMP):
+        ip = code[ip]
+      elif (op == LOOP):
+        ip = code[ip]
+      elif (op == INVOKE):
+        name = constants[code[ip]]
+        argCount = code[ip + 1]
+        ip += 2
+        receiver = stack[-1 - argCount]
+        frames.append((closure, ip, base))
+        if (not isinstance(receiver, LoxInstance)):
+          self.runtimeError("Only instances have methods.")
+        index = receiver.shape.indexes.get(name)
+        if (index != None):
+          stack[-1 - argCount] = receiver.values[index]
+          frame = self.prepareCall(receiver.values[index], argCount)
+        else:
+          method = receiver.klass.methodTable.get(name)
+          if (type(method) is VMClosure and argCount == method.function.arity and len(frames) < FRAMES_MAX):
+            frame = (method, 0, len(stack) - argCount - 1)
+          elif (method == None):
+            self.runtimeError(f"Undefined property {name}.")
+          else:
+            frame = self.prepareCall(method, argCount)
+        if (frame == None):
+          frames.pop()
+        else:
+          closure, ip, base = frame
+          code = closure.function.chunk.code
+          constants = closure.function.chunk.constants
+      elif (op == GET_PROPERTY):
+        name = constants[code[ip]]
+        ip += 1
+        instance = stack[-1]
+        if (not isinstance(instance, LoxInstance)):
+          frames.append((closure, ip, base))
+          self.runtimeError("Only instances have properties.")
+        index = instance.shape.indexes.get(name)
+        if (index != None):
+          stack[-1] = instance.values[index]
+        else:
+          method = instance.klass.methodTable.get(name)
+          if (method == None):
+            frames.append((closure, ip, base))
+            self.runtimeError(f"Undefined property {name}.")
+          stack[-1] = method.bind(instance)
+      elif (op == SET_PROPERTY):
+        name = constants[code[ip]]
+        ip += 1
+        value = stack.pop()
+        instance = stack[-1]
+        if (not isinstance(instance, LoxInstance)):
+          frames.append((closure, ip, base))
+          self.runtimeError("Only instances have fields.")
+        instance.setField(name, value)
+        stack[-1] = value
+      elif (op == SET_GLOBAL):
+        name = constants[code[ip]]
+        ip += 1
+        if (name not in globals):
+          frames.append((closure, ip, base))
+          self.runtimeError(f"Undefined variable {name}.")
+        globals[name] = stack[-1]
+      elif (op == SET_UPVALUE):
+        upvalue = closure.upvalues[code[ip]]
+        upvalue.cells[upvalue.index] = stack[-1]
+        ip += 1
+      elif (op == DEFINE_GLOBAL):
+        globals[constants[code[ip]]] = stack.pop()
+        ip += 1
+      elif (op == NIL):
+        stack.append(None)
+      elif (op == TRUE):
+        stack.append(True)
+      elif (op == FALSE):
+        stack.append(False)
+      elif (op == NOT):
+        value = stack[-1]
+        stack[-1] = value == None or value is False
+      elif (op == NEGATE):
+        value = stack[-1]
+        if (type(value) is not float):
+          frames.append((closure, ip, base))
+          self.runtimeError("Operand must be a number")
+        stack[-1] = -value
+      elif (op == PRINT):
+        print(self.stringify(stack.pop()))
+      elif (op == CLOSURE):
+        function = constants[code[ip]]
+        ip += 1
+        newClosure = VMClosure(function)
+        for i in range(function.upvalueCount):
+          isLocal = code[ip]
+          index = code[ip + 1]
+          ip += 2
+          if (isLocal):
+            newClosure.upvalues.append(self.captureUpvalue(base + index))
+          else:
+            newClosure.upvalues.append(closure.upvalues[index])
+        stack.append(newClosure)
+      elif (op == CLOSE_UPVALUE):
+        self.closeUpvalues(len(stack) - 1)
+        stack.pop()
+      elif (op == CLASS):
+        stack.append(LoxClass(constants[code[ip]], None, {}))
+        ip += 1
+      elif (op == INHERIT):
+        superclass = stack[-2]
+        if (not isinstance(superclass, LoxClass)):
+          frames.append((closure, ip, base))
+          self.runtimeError("Superclass must be a class.")
+        stack[-1].inherit(superclass)
+        stack.pop()
+      elif (op == METHOD):
+        method = stack.pop()
+        stack[-1].defineMethod(constants[code[ip]], method)
+        ip += 1
+      elif (op == GET_SUPER):
+        name = constants[code[ip]]
+        ip += 1
+        superclass = stack.pop()
+        method = superclass.findMethod(name)
+        if (method == None):
+          frames.append((closure, ip, base))
+          self.runtimeError(f"Undefined property {name}.")
+        stack[-1] = method.bind(stack[-1])
+      elif (op == SUPER_INVOKE):
+        name = constants[code[ip]]
+        argCount = code[ip + 1]
+        ip += 2
+        superclass = stack.pop()
+        frames.append((closure, ip, base))
+        method = superclass.findMethod(name)
+        if (method == None):
+          self.runtimeError(f"Undefined property {name}.")
+        frame = self.prepareCall(method, argCount)
+        if (frame == None):
+          frames.pop()
+        else:
+          closure, ip, base = frame
+          code = closure.function.chunk.code
+          constants = closure.function.chunk.constants
+      else:
+        frames.append((closure, ip, base))
+        self.runtimeError(f"Unknown opcode {op}.")
+
+  def add(self, left, right):
+    if (isinstance(left, str) and isinstance(right, str)):
+      if (not self.stringNumbers):
+        return left + right
+
+      try:
+        return float(left) + float(right)
+      except:
+        return left + right
+
+    # Same coercions as Interpreter.plus in string-number mode.
+    if (self.stringNumbers and isinstance(left, (str, float)) and isinstance(right, (str, float))):
+      return float(left) + float(right)
+
+    self.runtimeError("Operands must be two numbers or two strings.")
+
+  def numberOperands(self, left, right):
+    # Same coercions as Interpreter.numberOperands in string-number mode.
+    if (self.stringNumbers and isinstance(left, (str, float)) and isinstance(right, (str, float))):
+      try:
+        return float(left), float(right)
+      except:
+        pass
+
+      self.runtimeError("Operand must be numbers")
+
+    self.runtimeError("Operands must be numbers.")
+
+  def stringify(self, object):
+    if (object == None):
+      return "nil"
+
+    if (isinstance(object, float)):
+      text = str(object)
+
+      if (text.endswith(".0")):
+        text = text[0:len(text) - 2]
+
+      return text
+
+    return str(object)
+
+  def runtimeError(self, message):
+    lines = [message]
+
+    for closure, ip, base in reversed(self.frames):
+      function = closure.function
+      line = function.chunk.lines[ip - 1] if ip > 0 else 0
+      lines.append(f"[line {line}] in {function.toString()}")
+
+    self.stack.clear()
+    self.frames.clear()
+    self.openUpvalues = {}
+    raise VMRuntimeError("\n".join(lines))
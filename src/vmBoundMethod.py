@@ -0,0 +1,15 @@
+from loxCallable import LoxCallable
+
+class VMBoundMethod(LoxCallable):
+  def __init__(self, receiver, method):
+    self.receiver = receiver
+    self.method = method
+
+  def arity(self):
+    return self.method.arity()
+
+  def call(self, interpreter, arguments):
+    return interpreter.callValue(self, arguments)
+
+  def toString(self):
+    return self.method.toString()
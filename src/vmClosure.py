@@ -0,0 +1,19 @@
+from loxCallable import LoxCallable
+from vmBoundMethod import VMBoundMethod
+
+class VMClosure(LoxCallable):
+  def __init__(self, function):
+    self.function = function
+    self.upvalues = []
+
+  def arity(self):
+    return self.function.arity
+
+  def call(self, interpreter, arguments):
+    return interpreter.callValue(self, arguments)
+
+  def bind(self, instance):
+    return VMBoundMethod(instance, self)
+
+  def toString(self):
+    return self.function.toString()
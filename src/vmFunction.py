@@ -0,0 +1,14 @@
+from chunkC import ChunkC
+
+class VMFunction:
+  def __init__(self, name):
+    self.name = name
+    self.arity = 0
+    self.upvalueCount = 0
+    self.chunk = ChunkC()
+
+  def toString(self):
+    if (self.name == None):
+      return "<script>"
+
+    return f"<fn {self.name}>"
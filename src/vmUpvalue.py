@@ -0,0 +1,10 @@
+class VMUpvalue:
+  def __init__(self, cells, index):
+    # While open, cells is the VM stack and index an absolute slot in it.
+    # Closing moves the value into a private one-element list.
+    self.cells = cells
+    self.index = index
+
+  def close(self):
+    self.cells = [self.cells[self.index]]
+    self.index = 0